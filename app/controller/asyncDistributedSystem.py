@@ -5,23 +5,29 @@ import time
 from abc import ABC, abstractmethod
 from asyncio import StreamReader, StreamWriter
 from logging import Logger, getLogger
-from time import perf_counter, time
-from typing import Any, Dict, List, Tuple
+from time import monotonic, perf_counter, time
+from typing import Any, Dict, List, Tuple, Union
 from uuid import uuid4
 
 import paho.mqtt.client as mqtt
 import psutil
 
+from ..model.asyncDatabase import AsyncPostgresqlDB, asyncCachedTravelCRUD
 from ..model.database import DatabaseConnection, cachedTravelCRUD
-from .asyncHttpServer import AsyncHttpServer
+from .asyncHttpServer import AsyncHttpServer, ServerConfig
+from .httpRequest import (HttpRequest, HttpRequestError, HttpRequestReader,
+                          HttpResponseHead, read_response_head,
+                          relay_response_body)
+from .httpResponse import HttpResponse
 from .logger import LoggerSetup, RequestContext
-from .monitoring import DashboardDisplay, PerformanceParams
+from .monitoring import (DashboardDisplay, HttpServerParams,
+                         PerformanceParams)
 from .names import CreativeNamer
 from .taskQueue import TaskQueue
 
 
 class asyncNode:
-    def __init__(self,crud:cachedTravelCRUD,host:str,port:int,node_name:str,node_id:int,parent_logger:Logger,nbr_qworkers:int=3,qsize:int=5,broker_addr:str='localhost'):
+    def __init__(self,crud:Union[cachedTravelCRUD,asyncCachedTravelCRUD],host:str,port:int,node_name:str,node_id:int,parent_logger:Logger,nbr_qworkers:int=3,qsize:int=5,broker_addr:str='localhost'):
         self.host = host
         self.port = port
         self._crud = crud
@@ -117,6 +123,10 @@ class asyncLoadBalancer(ABC):
     @abstractmethod
     def update_nodes_list(self,new_nodes:List[asyncNode]):
         pass
+
+    @abstractmethod
+    def mark_overloaded(self,node:asyncNode,retry_after:float):
+        pass
     
     @abstractmethod
     async def do_health_checks(self)->List[asyncNode]:
@@ -130,14 +140,14 @@ class asyncRoundRobinBalancer(asyncLoadBalancer):
     def __init__(self,nodes:List[asyncNode],parent_logger:Logger,broker_addr:str='localhost'):
         self._nodes = nodes
         self._current_idx = 0
+        self._overloaded_until:Dict[str,float] = {} # node id -> monotonic deadline from its Retry-After
         self._id=str(uuid4())
         self._name = f"LB-RR-{self._id[:8]}"
         self._logger = parent_logger.getChild(self._name)
         self._performance = PerformanceParams(self._name,str(self._id),40)
         self.is_running = False
         self.broker_address = broker_addr
-        self.mqtt_client = mqtt.Client()
-        self.mqtt_client.connect(self.broker_address,keepalive=120)
+        self.mqtt_client = mqtt.Client() # connected by publish_health
     
     def start(self):
         self.health_task = asyncio.create_task(self.publish_health())
@@ -154,9 +164,14 @@ class asyncRoundRobinBalancer(asyncLoadBalancer):
         if len(self._nodes) == 0:
             self._logger.error("No Nodes for routing left.")
             raise ValueError("No Nodes for routing left")
-        node = self._nodes[self._current_idx]
+        now = monotonic()
+        # skip nodes that asked for a break, unless every node did
+        for _ in range(len(self._nodes)):
+            node = self._nodes[self._current_idx]
+            self._current_idx = (self._current_idx + 1)%len(self._nodes)
+            if self._overloaded_until.get(node._id,0.0) <= now:
+                break
         response_time = perf_counter()-start_time
-        self._current_idx = (self._current_idx + 1)%len(self._nodes)
         context.add_response_time(self._name,response_time)
         self._performance.add_response_time(response_time)
         return node
@@ -165,6 +180,10 @@ class asyncRoundRobinBalancer(asyncLoadBalancer):
         self._nodes = new_nodes
         self._current_idx = self._current_idx % len(new_nodes)
 
+    def mark_overloaded(self,node:asyncNode,retry_after:float):
+        self._overloaded_until[node._id] = monotonic()+retry_after
+        self._logger.info("Node %s overloaded, skipping it for %.1f s.",node,retry_after)
+
     async def do_health_checks(self)->List[asyncNode]:
         death_book:List[asyncNode] = []
         for node in self._nodes: 
@@ -185,6 +204,7 @@ class asyncRoundRobinBalancer(asyncLoadBalancer):
         return {'name':self._name,
                 'id': self._id,
                 'current_idx': self._current_idx,
+                'overloaded_nodes': [node_id for node_id,until in self._overloaded_until.items() if until > monotonic()],
                 'performance_params': self._performance,
                 'nodes': [str(node) for node in self._nodes],
                 'logger': str(self._logger)}
@@ -196,6 +216,41 @@ class asyncRoundRobinBalancer(asyncLoadBalancer):
             self.mqtt_client.publish(f"health/{self._id}",json.dumps(self._performance.get_perf_report()))
             await asyncio.sleep(10)
 
+class asyncNodeConnectionPool:
+    def __init__(self,max_idle_per_node:int=10):
+        self.max_idle_per_node = max_idle_per_node
+        self._idle:Dict[Tuple[str,int],List[Tuple[StreamReader,StreamWriter]]] = {}
+
+    async def acquire(self,node:asyncNode,fresh:bool=False)->Tuple[StreamReader,StreamWriter,bool]:
+        idle = [] if fresh else self._idle.get((node.host,node.port),[])
+        while idle:
+            reader,writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader,writer,True
+            await self.discard(writer)
+        reader,writer = await asyncio.open_connection(node.host,node.port)
+        return reader,writer,False
+
+    def release(self,node:asyncNode,reader:StreamReader,writer:StreamWriter):
+        idle = self._idle.setdefault((node.host,node.port),[])
+        if len(idle) < self.max_idle_per_node and not writer.is_closing():
+            idle.append((reader,writer))
+        else:
+            writer.close()
+
+    async def discard(self,writer:StreamWriter):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    async def close(self):
+        for idle in self._idle.values():
+            for _,writer in idle:
+                await self.discard(writer)
+        self._idle.clear()
+
 class asyncDistributedBookingSystem:
     def __init__(self,host:str,port:int,db:DatabaseConnection, db_params: Dict[str,Any], table_name:str,global_q_params:Tuple[int,int],q_params:Tuple[int,int],logger_setup:LoggerSetup,logger_level:str,broker_addr:Tuple[str,int]):
         self.host = host
@@ -210,6 +265,7 @@ class asyncDistributedBookingSystem:
         self._id = str(uuid4())
         self._server = None
         self._is_running = False
+        self._node_connections = asyncNodeConnectionPool()
         self._qparams = q_params
         self._logger_setup = logger_setup
         self._logger_level = logger_level
@@ -227,18 +283,21 @@ class asyncDistributedBookingSystem:
         self.mqtt_broker_port = broker_addr[1]
         self.mqtt_client = mqtt.Client()
         self.mqtt_client.on_message = self._on_message
-        self.mqtt_client.connect(self.mqtt_broker_host,self.mqtt_broker_port)
         
         # services and health_data
         self.services:Dict[str,Any] = {}
         self.health_data:Dict[str,Any] = {}
         
         # Dashboard
-        self.performance = PerformanceParams(self._name,self._id,30)
+        self.config = ServerConfig(host,port)
+        self.performance = HttpServerParams(self._name,self._id,30,self.config.get_deadlines())
         self.dashboard = DashboardDisplay(self.create_health_report,self._name)
     
     def add_node(self,host:str,port:int):
-        crud = cachedTravelCRUD(self._db,self._db_params,self._table_name,parent_logger=self._logger)
+        if isinstance(self._db,type) and issubclass(self._db,AsyncPostgresqlDB):
+            crud = asyncCachedTravelCRUD(self._db,self._db_params,self._table_name,parent_logger=self._logger)
+        else:
+            crud = cachedTravelCRUD(self._db,self._db_params,self._table_name,parent_logger=self._logger)
         crud.start()
         node_id = self._id=str(uuid4())
         node = asyncNode(crud,host,port,self._namer.create_name(1),node_id,parent_logger=self._logger)
@@ -285,6 +344,7 @@ class asyncDistributedBookingSystem:
                 self.services[start_res['crud']['cache']['id']] =start_res['crud']['cache']['name']
             if start_res.get('http',None):
                 self.services[start_res['http']['id']]=start_res['http']['name']
+                self.services[start_res['http']['executor']['id']]=start_res['http']['executor']['name']
 
         self._server = await asyncio.start_server(self.handle_connection,self.host,self.port)
         self._is_running = True
@@ -292,6 +352,7 @@ class asyncDistributedBookingSystem:
         asyncio.create_task(self.health_check_routine())
 
         # subscribe to services
+        self.mqtt_client.connect(self.mqtt_broker_host,self.mqtt_broker_port)
         for service_id in self.services.keys():
             self.mqtt_client.subscribe(f"health/{service_id}")
         
@@ -311,6 +372,7 @@ class asyncDistributedBookingSystem:
             self._server.close()
             await self._server.wait_closed()
 
+        await self._node_connections.close()
         for node in self._nodes:
             await node.stop()
         
@@ -320,23 +382,51 @@ class asyncDistributedBookingSystem:
 
     async def handle_connection(self,reader: StreamReader, writer:StreamWriter):
         context = RequestContext()
-        node=self._load_balancer.get_next_node(context)
-        self._logger.info("-------------- Active node=%d.----------",node.port)
+        request_reader = HttpRequestReader(reader,self.config.max_header_size,self.config.max_body_size)
+        keep_alive = True
+        served_requests = 0
         try: 
-            while True:
-                data = await reader.read(1024)
-                if not data:
+            while keep_alive:
+                phase = 'header'
+                try:
+                    request = await asyncio.wait_for(request_reader.read_head(),self.config.keepalive_timeout if served_requests else self.config.header_timeout)
+                    if request is None:
+                        break
+                    phase = 'body'
+                    if request.content_length > self.config.max_body_size:
+                        # large uploads (bulk imports) go to the node piece by piece, the node applies its own limits
+                        request_reader.stream_body(request,self.config.max_stream_body_size,read_timeout=self.config.body_timeout)
+                    else:
+                        request.body = await asyncio.wait_for(request_reader.read_body(request),self.config.body_timeout)
+                    phase = 'handler'
+                    keep_alive = request.keep_alive
+                    #await self._global_task_queue.add_task(self.process_request,data,context,writer)
+                    context = await self.forward_data(request,context,writer)
+                    served_requests += 1
+                except asyncio.TimeoutError:
+                    if phase == 'header' and served_requests:
+                        break # idle keep-alive connection
+                    self.performance.add_expired(phase)
+                    self._logger.info("%s deadline expired. Closing connection.",phase,extra={'trace_context': context.to_dict()})
+                    writer.transport.abort()
                     break
-                #await self._global_task_queue.add_task(self.process_request,data,context,writer)
-                response,context = await self.forward_data(data,node,context)
-                writer.write(response)
-                await writer.drain()
+                except HttpRequestError as e:
+                    # nothing of a response went out yet -> the client learns why before the connection goes
+                    self._logger.info("Rejected client request: %s",str(e),extra={'trace_context': context.to_dict()})
+                    HttpResponse(e.status_code,str(e),e.headers).write_to(writer)
+                    await asyncio.wait_for(writer.drain(),self.config.write_timeout)
+                    break
+        except ConnectionError as e:
+            self._logger.info("Connection to client lost: %s",str(e),extra={'trace_context': context.to_dict()})
         except Exception as e: 
             self._logger.error("Error handling client request: %s",str(e),extra={'trace_context': context.to_dict()},exc_info=True)
             raise
         finally:
             writer.close()
-            await writer.wait_closed()
+            try:
+                await asyncio.wait_for(writer.wait_closed(),self.config.write_timeout)
+            except (asyncio.TimeoutError,ConnectionError):
+                writer.transport.abort()
             self._logger.info("Connection closed",extra={'trace_context': context.to_dict()})
     
     # async def process_request(self,data:bytes,context:RequestContext, writer:StreamWriter):
@@ -348,18 +438,84 @@ class asyncDistributedBookingSystem:
     #     writer.close()
     #     await writer.wait_closed()
     
-    async def forward_data(self,data:bytes,node:asyncNode,context:RequestContext):
-        reader,writer = await asyncio.open_connection(node.host,node.port)
-        try:
-            writer.write(data)
-            await writer.drain()
-            response = await reader.read(1024)
+    async def send_request(self,request:HttpRequest,writer:StreamWriter):
+        writer.write(request.head)
+        if request.body_stream is None:
+            writer.write(request.body)
+        else:
+            async for chunk in request.body_stream:
+                writer.write(chunk)
+                await writer.drain()
+        await writer.drain()
+
+    async def exchange(self,request:HttpRequest,node:asyncNode)->Tuple[StreamReader,StreamWriter,HttpResponseHead,bytes]:
+        # a streamed body can be sent only once -> fresh connection, no retry
+        streamed = request.body_stream is not None
+        for attempt in range(2):
+            reader,writer,reused = await self._node_connections.acquire(node,fresh=streamed)
+            try:
+                try:
+                    await self.send_request(request,writer)
+                except ConnectionError:
+                    # the node may have answered early (e.g. 413 on an upload) and closed -> its answer beats ours
+                    try:
+                        response_head,raw_head = await read_response_head(reader)
+                    except (ConnectionError,asyncio.IncompleteReadError):
+                        pass
+                    else:
+                        return reader,writer,response_head,raw_head
+                    raise
+                response_head,raw_head = await read_response_head(reader)
+                return reader,writer,response_head,raw_head
+            except (ConnectionError,asyncio.IncompleteReadError) as e:
+                await self._node_connections.discard(writer)
+                if reused and attempt == 0:
+                    # pooled connection was closed by the node in the meantime -> retry once on a fresh one
+                    self._logger.debug("Stale connection to node %s: %s. Reconnecting.",node,str(e))
+                    continue
+                raise
+            except BaseException:
+                await self._node_connections.discard(writer)
+                raise
+        raise ConnectionError(f"No connection to node {node}.")
+
+    async def forward_data(self,request:HttpRequest,context:RequestContext,client_writer:StreamWriter)->RequestContext:
+        streamed = request.body_stream is not None
+        # a streamed body is gone once sent -> it cannot be offered to a second node
+        attempts = 1 if streamed else max(1,len(self._nodes))
+        timeout = self.config.stream_handler_timeout if streamed else self.config.handler_timeout
+        for attempt in range(attempts):
+            node=self._load_balancer.get_next_node(context)
+            self._logger.info("-------------- Active node=%d.----------",node.port)
+            # a node gets the handler deadline to start answering, the response body is then paced by the client
+            try:
+                reader,writer,response_head,raw_head = await asyncio.wait_for(self.exchange(request,node),timeout)
+            except asyncio.TimeoutError:
+                self.performance.add_expired('handler')
+                raise HttpRequestError(504,f"Node {node.port} did not answer in time.")
+            except (OSError,asyncio.IncompleteReadError) as e:
+                self._logger.warning("Node %s failed: %s",node,str(e),extra={'trace_context': context.to_dict()})
+                raise HttpRequestError(502,f"Node {node.port} unavailable.")
+            if response_head.status_code == 503 and attempt < attempts-1:
+                # node sheds load -> respect its Retry-After and offer the request to the next node
+                retry_after = response_head.headers.get('retry-after','1')
+                self._load_balancer.mark_overloaded(node,float(retry_after) if retry_after.isdigit() else 1.0)
+                await self._node_connections.discard(writer)
+                continue
+            try:
+                client_writer.write(raw_head)
+                await relay_response_body(reader,client_writer,response_head,write_timeout=self.config.write_timeout)
+            except BaseException:
+                await self._node_connections.discard(writer)
+                raise
+            if response_head.keep_alive:
+                self._node_connections.release(node,reader,writer)
+            else:
+                await self._node_connections.discard(writer)
             context.add_response_time(f"{node.get_info()['name']}-response",perf_counter()-context.start_time)
-            self._logger.info("Received response: %s from node %s",response.decode(),node)
-            return response,context
-        finally:
-            writer.close()
-            await writer.wait_closed()
+            self._logger.info("Relayed response with status %d from node %s",response_head.status_code,node)
+            return context
+        return context
         
     async def replace_dead_nodes(self,dead_nodes:List[asyncNode]):
         for node in dead_nodes: 
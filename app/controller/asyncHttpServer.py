@@ -12,72 +12,284 @@ import asyncio
 import json
 from abc import ABC, abstractmethod
 from asyncio import StreamReader, StreamWriter
+from inspect import isasyncgenfunction, iscoroutinefunction
 from logging import Logger
 from time import perf_counter, time
-from typing import Any, Dict, Optional, Union
+from typing import (Any, AsyncIterator, Callable, Dict, List, Optional, Set,
+                    Tuple, Union)
 from uuid import uuid4
 
 import paho.mqtt.client as mqtt
+from pydantic import ValidationError
 
+from ..model.booking import Booking
+from ..model.cache import make_etag
 from ..model.database import BasicCRUD
+from .compression import ResponseCompressor
+from .dbExecutor import DatabaseExecutor
+from .httpRequest import (HttpRequest, HttpRequestError, HttpRequestReader,
+                          encode_page_token, page_query)
+from .httpResponse import (Body, ChunkedHttpResponse, HandlerResult,
+                           HttpResponse, connection_header)
 from .logger import RequestContext
-from .monitoring import PerformanceParams
+from .monitoring import HttpServerParams
+from .parser import JsonParser, JsonSizeError
+from .router import Router
 from .taskQueue import TaskQueue
 
 
+async def call_crud(executor:DatabaseExecutor,func:Callable[...,Any],*args:Any)->Any:
+    """Async CRUDs (asyncTravelCRUD) are awaited right on the loop, blocking ones run on a DB thread."""
+    if iscoroutinefunction(func):
+        return await func(*args)
+    return await executor.run(func,*args)
+
 class RequestHandler(ABC):
+    streams_body:bool = False # True -> gets request['body_stream'] instead of a buffered body
+    
     @abstractmethod
-    def handle_request(self,request: Dict[str,Any])->str:
+    async def handle_request(self,request: Dict[str,Any])->Union[str,bytes,AsyncIterator[bytes]]:
         pass
 
-class GetRequestHandler(RequestHandler):
-    def __init__(self,crud: BasicCRUD):
+class GetBookingHandler(RequestHandler):
+    def __init__(self,crud: BasicCRUD,executor:DatabaseExecutor,compressor:ResponseCompressor):
         self.crud = crud
+        self.executor = executor
+        self.compressor = compressor
     
-    def handle_request(self, request: Dict[str, Any]) -> str:
-        booking_id = request.get('path').split('/')[-1]
-        if booking_id:
-            if "-" in booking_id:
-                booking = self.crud.get_booking_id(booking_id)
-                if booking:
-                    return booking
-                else:
-                    return f"booking_id {booking_id} not found."
-            else:
-                all_booking_ids = self.crud.get_booking_id()
-                return dumps(all_booking_ids)
-        else:
-            return "No route matched."
+    @staticmethod
+    def etag_matches(if_none_match:str,etag:str)->bool:
+        if if_none_match.strip() == '*':
+            return True
+        # If-None-Match uses the weak comparison -> ignore W/ prefixes
+        return any(candidate.strip().removeprefix('W/') == etag for candidate in if_none_match.split(','))
+    
+    async def handle_request(self, request: Dict[str, Any]) -> HandlerResult:
+        booking_id = request['params']['booking_id']
+        # cache hits are answered on the loop, only misses go to the DB
+        booking = self.crud.get_cached_booking(booking_id)
+        etag = self.crud.get_cached_etag(booking_id) if booking else None
+        if not booking:
+            booking = await call_crud(self.executor,self.crud.load_booking,booking_id)
+            if not booking:
+                raise HttpRequestError(404,f"booking_id {booking_id} not found.")
+            etag = self.crud.get_cached_etag(booking_id)
+        if not etag:
+            etag = make_etag(booking)
+        
+        encoding = request.get('encoding') if self.compressor.should_compress(booking) else None
+        headers = {'ETag': self.compressor.representation_etag(etag,encoding)}
+        if_none_match = request['headers'].get('if-none-match')
+        if if_none_match and self.etag_matches(if_none_match,headers['ETag']):
+            # client copy is current -> neither serialization nor body transfer
+            return HandlerResult(b'',304,headers)
+        if encoding:
+            # compressed once per cache fill, afterwards served straight from the cache entry
+            compressed = self.crud.get_cached_variant(booking_id,encoding)
+            if compressed is None:
+                compressed = self.compressor.compress(booking,encoding)
+                self.crud.put_cached_variant(booking_id,encoding,compressed)
+            return HandlerResult(compressed,200,headers,encoding)
+        return HandlerResult(booking,200,headers)
+
+class ListBookingsHandler(RequestHandler):
+    def __init__(self,crud: BasicCRUD,executor:DatabaseExecutor,page_size:int=50,max_page_size:int=100000,batch_size:int=500):
+        self.crud = crud
+        self.executor = executor
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.batch_size = batch_size
+    
+    async def handle_request(self, request: Dict[str, Any]) -> AsyncIterator[bytes]:
+        page_size,after = page_query(request.get('query',{}),self.page_size,self.max_page_size)
+        return self.stream_booking_ids(page_size,after)
+
+    async def fetch_batches(self,page_size:int,after:Optional[str])->AsyncIterator[List[Dict[str,Any]]]:
+        batches = self.crud.iter_booking_ids(page_size,self.batch_size,after)
+        if isasyncgenfunction(self.crud.iter_booking_ids):
+            try:
+                async for batch in batches:
+                    yield batch
+            finally:
+                await batches.aclose()
+            return
+        try:
+            while (batch := await self.executor.run(next,batches,None)) is not None:
+                yield batch
+        finally:
+            await self.executor.run(batches.close) # releases cursor and connection also if the client went away mid-stream
+
+    async def stream_booking_ids(self,page_size:int,after:Optional[str]=None)->AsyncIterator[bytes]:
+        # one chunk per fetched DB batch -> memory stays constant for arbitrarily long pages
+        yield b'{"bookings":['
+        separator = b''
+        count = 0
+        last_id = None
+        batches = self.fetch_batches(page_size,after)
+        try:
+            async for batch in batches:
+                yield separator + b','.join(json.dumps(row).encode() for row in batch)
+                separator = b','
+                count += len(batch)
+                last_id = batch[-1]['booking_id']
+        finally:
+            await batches.aclose()
+        # a full page may have a successor, a short one is the end of the table
+        next_token = encode_page_token(last_id) if count == page_size and last_id else None
+        yield b'],"next_page_token":' + json.dumps(next_token).encode() + b'}'
         
 class PostRequestHandler(RequestHandler):
-    def __init__(self, crud: BasicCRUD) -> None:
+    streams_body = True
+    
+    def __init__(self, crud: BasicCRUD,executor:DatabaseExecutor,insert_batch_size:int=500,max_element_size:int=65536,max_document_size:int=1048576) -> None:
+        self.crud = crud
+        self.executor = executor
+        self.insert_batch_size = insert_batch_size
+        self.max_element_size = max_element_size # one booking of an array body
+        self.max_document_size = max_document_size # a non-array body is held as a whole -> same cap as a buffered body
+    
+    async def handle_request(self, request: Dict[str, Any]) -> str:
+        # bookings are inserted batch by batch while the rest of the array is still on the wire
+        parser = JsonParser(self.max_element_size,self.max_document_size)
+        batch:List[List[Any]] = []
+        inserted = 0
+        try:
+            async for chunk in request['body_stream']:
+                for booking in parser.feed(chunk):
+                    # rows in column order, whatever order the client sent the keys in
+                    batch.append(self.crud.row_from_mapping(booking))
+                    if len(batch) >= self.insert_batch_size:
+                        await call_crud(self.executor,self.crud.insert_data_from_list,batch)
+                        inserted += len(batch)
+                        batch = []
+            batch.extend(self.crud.row_from_mapping(booking) for booking in parser.close())
+            if batch:
+                await call_crud(self.executor,self.crud.insert_data_from_list,batch)
+                inserted += len(batch)
+        except JsonSizeError as e:
+            raise HttpRequestError(413,f"{str(e)} ({inserted} bookings inserted before)")
+        except (ValueError,AttributeError) as e:
+            raise HttpRequestError(400,f"Invalid Booking data after {inserted} inserted bookings: {str(e)}")
+        return "Booking created successfully" if inserted else "Invalid Booking data."
+
+class BulkImportHandler(RequestHandler):
+    """NDJSON import: one booking per line, validated while the body streams in, inserted in batches."""
+    streams_body = True
+    
+    def __init__(self,crud: BasicCRUD,executor:DatabaseExecutor,insert_batch_size:int=500,max_line_size:int=65536,max_reported_errors:int=100) -> None:
         self.crud = crud
+        self.executor = executor
+        self.insert_batch_size = insert_batch_size
+        self.max_line_size = max_line_size
+        self.max_reported_errors = max_reported_errors
+    
+    @staticmethod
+    def describe_error(e:Exception)->str:
+        if isinstance(e,ValidationError):
+            return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+        return str(e)
     
-    def handle_request(self, request: Dict[str, Any]) -> str:
-        booking_data = request.get('booking')
-        if booking_data:
-            if not isinstance(booking_data,Union[tuple,list]): booking_data = [booking_data,]
-            booking_list = [list(item.values()) for item in booking_data]
-            self.crud.insert_data_from_list(booking_list)
-            return "Booking created successfully"
-        else:
-            return "Invalid Booking data."
+    async def handle_request(self, request: Dict[str, Any]) -> HandlerResult:
+        summary:Dict[str,Any] = {'received': 0,'inserted': 0,'failed': 0,'errors': [],'failed_batches': []}
+        batch:List[List[Any]] = []
+        batch_lines:Tuple[int,int] = (0,0) # first and last line of the batch
+        pending = b''
+        line_number = 0
+        
+        async def flush():
+            nonlocal batch
+            # rows are validated Bookings already -> insert_rows skips the CRUD's own validation
+            written = await call_crud(self.executor,self.crud.insert_rows,batch)
+            if written is None:
+                # the CRUD logged the DB error -> the client learns which lines did not make it
+                summary['failed'] += len(batch)
+                summary['failed_batches'].append({'first_line': batch_lines[0],'last_line': batch_lines[1],'bookings': len(batch)})
+            else:
+                summary['inserted'] += written
+            batch = []
+        
+        def add_line(line:bytes):
+            nonlocal line_number,batch_lines
+            line_number += 1
+            if len(line) > self.max_line_size:
+                raise HttpRequestError(413,f"Line {line_number} exceeds {self.max_line_size} bytes.")
+            if not line.strip():
+                return
+            summary['received'] += 1
+            try:
+                booking = Booking(**json.loads(line))
+            except Exception as e:
+                summary['failed'] += 1
+                if len(summary['errors']) < self.max_reported_errors:
+                    summary['errors'].append({'line': line_number,'error': self.describe_error(e)})
+                return
+            batch_lines = (batch_lines[0] if batch else line_number,line_number)
+            batch.append(self.crud.row_from_mapping(booking.model_dump()))
+        
+        async for chunk in request['body_stream']:
+            lines = (pending+chunk).split(b'\n')
+            pending = lines.pop()
+            if len(pending) > self.max_line_size:
+                raise HttpRequestError(413,f"Line {line_number+len(lines)+1} exceeds {self.max_line_size} bytes.")
+            for line in lines:
+                add_line(line)
+                if len(batch) >= self.insert_batch_size:
+                    await flush()
+        add_line(pending) # last line without trailing newline
+        if batch:
+            await flush()
+        return HandlerResult(json.dumps(summary))
 
 class RequestHandlerFactory:
-    def __init__(self, crud: BasicCRUD):
+    def __init__(self, crud: BasicCRUD,executor:DatabaseExecutor,compressor:ResponseCompressor,insert_batch_size:int=500,page_size:int=50,max_page_size:int=100000,list_batch_size:int=500,
+                 max_element_size:int=65536,max_body_size:int=1048576):
         self.crud = crud
+        self.executor = executor
+        self.compressor = compressor
+        self.insert_batch_size = insert_batch_size
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.list_batch_size = list_batch_size
+        self.max_element_size = max_element_size
+        self.max_body_size = max_body_size
     
-    def create_handler(self, method:str) -> RequestHandler:
-        match method:
-            case 'GET':
-                return GetRequestHandler(self.crud)
-            case 'POST':
-                return PostRequestHandler(self.crud)
-            case _:
-                raise ValueError(f"Unsupported HTTP-method: {method}.")
+    def create_router(self) -> Router[RequestHandler]:
+        # one handler instance per endpoint, shared by all requests
+        router:Router[RequestHandler] = Router()
+        router.add_route('GET','/booking',ListBookingsHandler(self.crud,self.executor,self.page_size,self.max_page_size,self.list_batch_size))
+        router.add_route('GET','/booking/{booking_id:uuid}',GetBookingHandler(self.crud,self.executor,self.compressor))
+        router.add_route('POST','/booking',PostRequestHandler(self.crud,self.executor,self.insert_batch_size,self.max_element_size,self.max_body_size))
+        router.add_route('POST','/bookings:bulk',BulkImportHandler(self.crud,self.executor,self.insert_batch_size))
+        return router
 
 class ServerConfig:
     _instance = {}
+    max_header_size:int = 8192
+    max_body_size:int = 1048576
+    max_stream_body_size:int = 268435456 # streamed bodies are never held as a whole
+    max_element_size:int = 65536 # one booking of a streamed JSON array
+    keepalive_timeout:float = 5.0
+    max_requests_per_connection:int = 100
+    db_workers:int = 8
+    db_queue_size:int = 64
+    max_inflight_requests:int = 256
+    max_queue_depth:Optional[int] = 64 # DB calls queued in the executor (see db_queue_size); None -> only max_inflight_requests sheds
+    retry_after:int = 1
+    header_timeout:float = 10.0
+    body_timeout:float = 30.0
+    handler_timeout:float = 30.0
+    stream_handler_timeout:float = 600.0 # body-streaming handlers run as long as the upload, stalls are caught per read
+    insert_batch_size:int = 500
+    page_size:int = 50
+    max_page_size:int = 100000
+    list_batch_size:int = 500 # listing pages above this come from a server-side cursor, batch by batch
+    write_timeout:float = 30.0
+    compression_enabled:bool = True
+    compression_min_size:int = 1024
+    compression_levels:Dict[str,int] = {'gzip': 6, 'deflate': 6}
+
+    def get_deadlines(self)->Dict[str,float]:
+        return {'header':self.header_timeout,'body':self.body_timeout,'handler':self.handler_timeout,'write':self.write_timeout}
     
     def __new__(cls,host:Optional[str]=None,port:Optional[int]=None)->object: # host:str=,port:int=
         host = host if host else 'localhost'
@@ -90,24 +302,32 @@ class ServerConfig:
         return cls._instance[key]
 
 class AsyncHttpServer:
-    def __init__(self, crud: BasicCRUD,task_queue:TaskQueue,host:Optional[str],port:Optional[int],parent_logger:Logger,broker_addr:str='localhost'):
+    def __init__(self, crud: BasicCRUD,task_queue:TaskQueue,host:Optional[str],port:Optional[int],parent_logger:Logger,broker_addr:str='localhost',reuse_port:bool=False,executor:Optional[DatabaseExecutor]=None):
         self.config = ServerConfig(host,port)
         self.host = host
         self.port = port
+        self.reuse_port = reuse_port # several processes may bind the same port, the kernel spreads the connections
         self.crud = crud
         self.task_queue = task_queue
-        self.handler_factory = RequestHandlerFactory(self.crud,)
         self._running = False
+        self.is_running = False
+        self._connections:Set[StreamWriter] = set()
         self._id=str(uuid4())
         self._name = f"aHttpServer-{self._id[:8]}"
         self.logger = parent_logger.getChild(self._name)
-        self._performance = PerformanceParams(self._name,self._name,40)
+        self.executor = executor if executor else DatabaseExecutor(self.logger,self.config.db_workers,self.config.db_queue_size)
+        self.compressor = ResponseCompressor(self.config.compression_min_size,self.config.compression_levels,self.config.compression_enabled)
+        self.handler_factory = RequestHandlerFactory(self.crud,self.executor,self.compressor,self.config.insert_batch_size,
+                                                     self.config.page_size,self.config.max_page_size,self.config.list_batch_size,
+                                                     self.config.max_element_size,self.config.max_body_size)
+        self.router = self.handler_factory.create_router()
+        self._performance = HttpServerParams(self._name,self._name,40,self.config.get_deadlines())
+        self._inflight = 0
         self.broker_address = broker_addr
-        self.mqtt_client = mqtt.Client()
-        self.mqtt_client.connect(self.broker_address,keepalive=120)
+        self.mqtt_client = mqtt.Client() # connected by publish_health
         
     async def start(self):
-        self._server = await asyncio.start_server(self.handle_request,self.host,self.port)
+        self._server = await asyncio.start_server(self.handle_request,self.host,self.port,limit=self.config.max_header_size,reuse_port=self.reuse_port)
         self.health_task=asyncio.create_task(self.publish_health())
         self.crud.start()
         self.is_running=True
@@ -121,65 +341,157 @@ class AsyncHttpServer:
         if self._server:
             self.logger.info("Stopping server...")
             self._server.close()
+            # idle keep-alive connections would otherwise hold wait_closed until their timeout
+            for writer in list(self._connections):
+                writer.close()
             await self._server.wait_closed()
+        self.executor.shutdown(wait=False)
+        if iscoroutinefunction(getattr(self.crud,'close',None)):
+            await self.crud.close() # async CRUDs own a pool bound to this loop
     
     async def handle_request(self,reader:StreamReader,writer:StreamWriter):
-        start_time=perf_counter()
-        self._performance.add_request_time(time())
-        data = await reader.read(1024)
-        message = data.decode()
         addr = writer.get_extra_info('peername')
-        self.logger.info("Received %r from %r",message,addr)
-        
-        response = await self.process_request(message)
-        await self.task_queue.add_task(self.send_confirmation,response,addr)
-        self.logger.info("Sending back response: %r",response)
-        writer.write(response.encode())
-        response_time = perf_counter()-start_time
-        self._performance.add_response_time(response_time)
-        await writer.drain()
-        await writer.wait_closed()
-        
-    async def process_request(self,request: str)->str:
-        request_lines = request.split('\n')
-        method, path, _ = request_lines[0].split()        
-        headers = {}
-        body = ''
-        single_carrier_return_idx = request_lines.index('\r') if '\r' in request_lines else -1
-        #print(request_lines)
-        for line in request_lines[1:single_carrier_return_idx]:
+        request_reader = HttpRequestReader(reader,self.config.max_header_size,self.config.max_body_size)
+        served_requests = 0
+        keep_alive = True
+        self._connections.add(writer)
+        try:
+            # pipelined requests simply wait in the StreamReader buffer and are answered in order
+            while keep_alive and self.is_running:
+                phase = 'header'
+                try:
+                    if served_requests:
+                        try:
+                            request = await asyncio.wait_for(request_reader.read_head(),self.config.keepalive_timeout)
+                        except asyncio.TimeoutError:
+                            self.logger.debug("Closing idle connection from %r after %d requests",addr,served_requests)
+                            break
+                    else:
+                        request = await asyncio.wait_for(request_reader.read_head(),self.config.header_timeout)
+                    if request is None:
+                        break
+                    start_time=perf_counter()
+                    self._performance.add_request_time(time())
+                    if self.is_overloaded():
+                        # fail fast instead of queueing -> the body is never read, so the connection has to go
+                        self._performance.add_shed_request()
+                        self.logger.warning("Shedding %s %s from %r (inflight=%d, db queue=%d)",request.method,request.path,addr,self._inflight,self.executor.performance.queue_depth)
+                        self.create_response(503,"Server overloaded. Retry later.",headers={'Retry-After':str(self.config.retry_after)}).write_to(writer)
+                        await asyncio.wait_for(writer.drain(),self.config.write_timeout)
+                        break
+                    phase = 'body'
+                    if self.streams_body(request):
+                        # read by the handler itself, the deadline applies to every single read
+                        request_reader.stream_body(request,self.config.max_stream_body_size,read_timeout=self.config.body_timeout)
+                    else:
+                        request.body = await asyncio.wait_for(request_reader.read_body(request),self.config.body_timeout)
+                except asyncio.TimeoutError:
+                    self._performance.add_expired(phase)
+                    self.logger.info("%s deadline expired for %r. Closing connection.",phase,addr)
+                    self.create_response(408,f"{phase} deadline expired.").write_to(writer)
+                    break
+                except HttpRequestError as e:
+                    self.logger.info("Rejected request from %r: %s",addr,str(e))
+                    self.create_response(e.status_code,str(e),headers=e.headers).write_to(writer)
+                    await asyncio.wait_for(writer.drain(),self.config.write_timeout)
+                    break
+                served_requests += 1
+                keep_alive = request.keep_alive and served_requests < self.config.max_requests_per_connection
+                self.logger.info("Received %s %s from %r",request.method,request.path,addr)
+                self._inflight += 1
+                self._performance.set_inflight_requests(self._inflight)
+                try:
+                    response = await self.process_request(request,keep_alive)
+                    keep_alive = keep_alive and response.status_code != 504 and not self.body_pending(request)
+                    self.task_queue.try_add_task(self.send_confirmation,response,addr)
+                    self.logger.info("Sending back response: %r",response)
+                    await response.stream_to(writer,self.config.write_timeout)
+                except asyncio.TimeoutError:
+                    # client stopped reading -> its buffers must not pin our memory and file descriptor
+                    self._performance.add_expired('write')
+                    self.logger.info("write deadline expired for %r. Closing connection.",addr)
+                    writer.transport.abort()
+                    break
+                except ConnectionError:
+                    raise
+                except Exception as e:
+                    # status line is already out -> the only honest signal left is to cut the connection
+                    self.logger.error("Aborted streaming response to %r: %s",addr,str(e),exc_info=True)
+                    break
+                finally:
+                    self._inflight -= 1
+                    self._performance.set_inflight_requests(self._inflight)
+                self._performance.add_response_time(perf_counter()-start_time)
+        except ConnectionError as e:
+            self.logger.info("Connection to %r lost: %s",addr,str(e))
+        finally:
+            self._connections.discard(writer)
+            writer.close()
             try:
-                key,value = line.split(':',1)
-                headers[key.lower()] = value.strip()
-            except:
-                self.logger.info("Passed on Line: %s",line)
-        if single_carrier_return_idx < len(request_lines) -1:
-            body = '\n'.join(request_lines[single_carrier_return_idx+1:])
+                await asyncio.wait_for(writer.wait_closed(),self.config.write_timeout)
+            except (asyncio.TimeoutError,ConnectionError):
+                writer.transport.abort() # peer does not take the rest of our buffer -> drop it
+        
+    async def process_request(self,request:HttpRequest,keep_alive:bool=False)->HttpResponse:
         context = RequestContext()
-        context.request_method = method
-        context.request_path = path
+        context.request_method = request.method
+        context.request_path = request.path
         
         try:
-            handler = self.handler_factory.create_handler(method)
-            request_data:Dict[str,Any]= {'path':path,'headers':headers,'body':body}
-            if method == 'POST':
-                request_data['booking'] = json.loads(body)
-                await self.task_queue.add_task(self.send_confirmation,request_data['booking'])
-            result = handler.handle_request(request_data)
+            handler,params = self.router.match(request.method,request.path)
+            encoding = self.compressor.negotiate(request.headers.get('accept-encoding',''))
+            request_data:Dict[str,Any]= {'path':request.path,'params':params,'query':request.query,'headers':request.headers,'body':request.body,'encoding':encoding}
+            if request.body_stream is not None:
+                request_data['body_stream'] = request.body_stream
+            try:
+                handler_timeout = self.config.stream_handler_timeout if handler.streams_body else self.config.handler_timeout
+                result = await asyncio.wait_for(handler.handle_request(request_data),handler_timeout)
+            except asyncio.TimeoutError:
+                self._performance.add_expired('handler')
+                self.logger.warning("handler deadline expired for %s %s.",request.method,request.path,extra={'trace_context': context.to_dict()})
+                return self.create_response(504,"handler deadline expired.",False)
             self.logger.debug("Request processed",extra={'trace_context': context.to_dict()})
-            return self.create_response(200,result)
+            # unread body bytes would be taken for the next request -> such a connection cannot be reused
+            keep_alive = keep_alive and not self.body_pending(request)
+            if isinstance(result,HandlerResult):
+                headers = {**result.headers,**self.compressor.headers(result.encoding)} if result.encoding else result.headers
+                return self.create_response(result.status_code,result.body,keep_alive,headers)
+            if hasattr(result,'__aiter__'):
+                if encoding:
+                    return ChunkedHttpResponse(200,self.compressor.compress_stream(result,encoding),self.compressor.headers(encoding),connection=self.connection_header(keep_alive))
+                return ChunkedHttpResponse(200,result,connection=self.connection_header(keep_alive))
+            if encoding and self.compressor.should_compress(result):
+                return self.create_response(200,self.compressor.compress(result,encoding),keep_alive,self.compressor.headers(encoding))
+            return self.create_response(200,result,keep_alive)
+        except HttpRequestError as e:
+            if e.status_code == 408:
+                self._performance.add_expired('body')
+            return self.create_response(e.status_code,str(e),keep_alive and not self.body_pending(request),e.headers)
         except Exception as e:
-            return self.create_response(500,str(e))
+            return self.create_response(500,str(e),keep_alive and not self.body_pending(request))
     
-    def create_response(self, status_code: int, body: str) -> str:
-        status_messages = {200: 'OK', 500: 'Internal Server Error'}
-        headers = [
-            f"HTTP/1.1 {status_code} {status_messages.get(status_code)}",
-            "Content-Type: application/json",
-            f"Content-Length: {len(body)}",
-            "Connection: close"
-        ]
-        return '\r\n'.join(headers) + '\r\n\r\n' + body
+    def streams_body(self,request:HttpRequest)->bool:
+        try:
+            handler,_ = self.router.match(request.method,request.path)
+        except HttpRequestError:
+            return False # process_request answers with the routing error
+        return handler.streams_body
+
+    @staticmethod
+    def body_pending(request:HttpRequest)->bool:
+        return request.body_stream is not None and request.body_stream.remaining > 0
+    
+    def is_overloaded(self) -> bool:
+        # the TaskQueue only holds fire-and-forget confirmations (dropped when full) -> no measure of our capacity
+        if self._inflight >= self.config.max_inflight_requests:
+            return True
+        return self.config.max_queue_depth is not None and self.executor.performance.queue_depth >= self.config.max_queue_depth
+
+    def connection_header(self, keep_alive: bool) -> bytes:
+        return connection_header(keep_alive,self.config.keepalive_timeout,self.config.max_requests_per_connection)
+
+    def create_response(self, status_code: int, body: Body, keep_alive: bool = False, headers: Optional[Dict[str,str]] = None) -> HttpResponse:
+        return HttpResponse(status_code,body,headers,connection=self.connection_header(keep_alive))
 
     async def send_confirmation(self,booking_id:str,address:str)->int:
         await asyncio.sleep(1)  # Simulate some processing time
@@ -192,8 +504,10 @@ class AsyncHttpServer:
                 'id':self._id,
                 'host':self.host,
                 'port': self.port,
+                'reuse_port': self.reuse_port,
                 'crud': self.crud.get_info(),
                 'task_queue': self.task_queue.get_info(),
+                'executor': self.executor.get_info(),
                 'is_running': self._running,
                 'logger': str(self.logger),}
 
@@ -202,4 +516,5 @@ class AsyncHttpServer:
             if not self.mqtt_client.is_connected():
                 self.mqtt_client.connect(self.broker_address,keepalive=120)
             self.mqtt_client.publish(f"health/{self._id}",json.dumps(self._performance.get_perf_report()))
+            self.mqtt_client.publish(f"health/{self.executor.get_info()['id']}",json.dumps(self.executor.performance.get_perf_report()))
             await asyncio.sleep(10)
\ No newline at end of file
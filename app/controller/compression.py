@@ -0,0 +1,66 @@
+import zlib
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+
+SUPPORTED_ENCODINGS:Tuple[str,...] = ('gzip','deflate')
+_WBITS:Dict[str,int] = {'gzip': 31, 'deflate': 15} # 16+15 -> gzip container, 15 -> zlib container (HTTP "deflate")
+
+
+def negotiate_encoding(accept_encoding:str,supported:Tuple[str,...]=SUPPORTED_ENCODINGS)->Optional[str]:
+    """Picks the supported coding with the highest q-value from an Accept-Encoding header, None means identity."""
+    best,best_q = None,0.0
+    wildcard_q:Optional[float] = None
+    for item in accept_encoding.split(','):
+        coding,_,params = item.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding == '*':
+            wildcard_q = q
+        elif coding in supported and (q > best_q or (q == best_q and best and supported.index(coding) < supported.index(best))):
+            best,best_q = coding,q
+    if best is None and wildcard_q:
+        return supported[0]
+    return best
+
+class ResponseCompressor:
+    def __init__(self,min_size:int=1024,levels:Optional[Dict[str,int]]=None,enabled:bool=True):
+        self.min_size = min_size
+        self.levels = {'gzip': 6, 'deflate': 6, **(levels if levels else {})}
+        self.enabled = enabled
+
+    def negotiate(self,accept_encoding:str)->Optional[str]:
+        return negotiate_encoding(accept_encoding) if self.enabled and accept_encoding else None
+
+    def should_compress(self,body:Union[bytes,str])->bool:
+        # below the threshold the gzip header and CPU time cost more than they save
+        return len(body) >= self.min_size
+
+    def _compressor(self,encoding:str):
+        return zlib.compressobj(self.levels[encoding],zlib.DEFLATED,_WBITS[encoding])
+
+    def compress(self,body:Union[bytes,str],encoding:str)->bytes:
+        if isinstance(body,str):
+            body = body.encode('utf-8')
+        compressor = self._compressor(encoding)
+        return compressor.compress(body)+compressor.flush()
+
+    async def compress_stream(self,chunks:AsyncIterator[bytes],encoding:str)->AsyncIterator[bytes]:
+        compressor = self._compressor(encoding)
+        async for chunk in chunks:
+            # sync flush keeps every chunk decodable on arrival -> streaming keeps its low time-to-first-byte
+            yield compressor.compress(chunk)+compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+    @staticmethod
+    def representation_etag(etag:str,encoding:Optional[str])->str:
+        # a compressed body is a different representation -> a strong ETag must differ as well
+        return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+    @staticmethod
+    def headers(encoding:str)->Dict[str,str]:
+        return {'Content-Encoding': encoding,'Vary': 'Accept-Encoding'}
@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from logging import Logger
+from time import perf_counter, time
+from typing import Any, Callable, Dict, Tuple
+from uuid import uuid4
+
+from .monitoring import ExecutorParams
+
+
+class DatabaseExecutor:
+    def __init__(self,parent_logger:Logger,max_workers:int=8,max_queue:int=64,name:str=""):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._id=str(uuid4())
+        self._name = name if name else f"DBExecutor-{self._id[:8]}"
+        self._logger = parent_logger.getChild(self._name)
+        self._executor = ThreadPoolExecutor(max_workers,thread_name_prefix=self._name)
+        # workers + queue bound everything handed to the pool; callers beyond that wait here without blocking the loop
+        self._slots = asyncio.Semaphore(max_workers+max_queue)
+        self._pending = 0
+        self.performance = ExecutorParams(self._name,self._id,100)
+
+    @staticmethod
+    def _timed_call(func:Callable[...,Any],submitted:float)->Tuple[Any,float]:
+        wait_time = perf_counter()-submitted
+        return func(),wait_time
+
+    async def run(self,func:Callable[...,Any],*args:Any,**kwargs:Any)->Any:
+        # clock and depth start before the slot is taken -> time spent waiting for a slot is queueing too
+        submitted = perf_counter()
+        self.performance.add_request_time(time())
+        self._pending += 1
+        self.performance.set_queue_depth(max(0,self._pending-self.max_workers))
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                result,wait_time = await loop.run_in_executor(self._executor,self._timed_call,partial(func,*args,**kwargs),submitted)
+        finally:
+            self._pending -= 1
+            self.performance.set_queue_depth(max(0,self._pending-self.max_workers))
+        self.performance.add_wait_time(wait_time)
+        self.performance.add_response_time(perf_counter()-submitted)
+        if wait_time > 0.1:
+            self._logger.debug("%s waited %.3f s for a DB worker.",getattr(func,'__name__',str(func)),wait_time)
+        return result
+
+    def shutdown(self,wait:bool=True):
+        self._executor.shutdown(wait=wait,cancel_futures=True)
+
+    def get_info(self)->Dict[str,Any]:
+        return {'name':self._name,
+                'id': self._id,
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'performance_params': self.performance,
+                'logger': str(self._logger),}
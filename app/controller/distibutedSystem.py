@@ -8,13 +8,14 @@ from typing import Any, Dict, List
 from ..model.database import DatabaseConnection, cachedTravelCRUD
 from .httpServer import HTTPserver
 from .names import CreativeNamer
+from .selectorServer import SelectorHTTPserver
 
 
 class TaskQueue:
     pass
 
 class Node:
-    def __init__(self,crud:cachedTravelCRUD,host:str,port:int,node_name:str,node_id:int):
+    def __init__(self,crud:cachedTravelCRUD,host:str,port:int,node_name:str,node_id:int,engine:str='thread',worker_threads:int=0):
         self._host = host
         self._port = port
         self._crud = crud
@@ -22,9 +23,14 @@ class Node:
         self._thread = None
         self._name = node_name
         self._id = node_id
+        self._engine = engine
+        self._worker_threads = worker_threads
     
     def start(self):
-        self._httpServer=HTTPserver(self._crud,self._host,self._port)
+        if self._engine == 'selector':
+            self._httpServer=SelectorHTTPserver(self._crud,self._host,self._port,self._worker_threads)
+        else:
+            self._httpServer=HTTPserver(self._crud,self._host,self._port)
         self._thread = Thread(target=self._httpServer.start)
         print(self)
         self._thread.start()
@@ -113,10 +119,10 @@ class DistributedBookingSystem:
         self._server = None
         self._is_running = False
     
-    def add_node(self,host:str,port:int):
+    def add_node(self,host:str,port:int,engine:str='thread',worker_threads:int=0):
         crud = cachedTravelCRUD(self._db,self._db_params,self._table_name)
         node_id = len(self._nodes)
-        node = Node(crud,host,port,self._namer.create_name(1),node_id)
+        node = Node(crud,host,port,self._namer.create_name(1),node_id,engine,worker_threads)
         node_connection = NodeConnection(host,port)
         self._nodes.append(node)
         self._nodes_connection.append(node_connection)
@@ -0,0 +1,222 @@
+import json
+from asyncio import (IncompleteReadError, LimitOverrunError, StreamReader,
+                     StreamWriter, TimeoutError, wait_for)
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+from uuid import UUID
+
+HEADER_TERMINATOR = b"\r\n\r\n"
+LINE_TERMINATOR = b"\r\n"
+
+
+class HttpRequestError(Exception):
+    def __init__(self,status_code:int,message:str,headers:Optional[Dict[str,str]]=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers
+
+@dataclass
+class HttpRequest:
+    method: str
+    path: str
+    version: str
+    headers: Dict[str,str] = field(default_factory=dict)
+    query: Dict[str,str] = field(default_factory=dict)
+    body: bytes = b''
+    head: bytes = b''
+    body_stream: Optional['BodyStream'] = None
+
+    @property
+    def content_length(self)->int:
+        raw_length = self.headers.get('content-length')
+        if raw_length is None:
+            return 0
+        if not raw_length.isdigit():
+            raise HttpRequestError(400,f"Invalid Content-Length: {raw_length}.")
+        return int(raw_length)
+
+    @property
+    def keep_alive(self)->bool:
+        connection = self.headers.get('connection','').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+@dataclass
+class HttpResponseHead:
+    status_code: int
+    headers: Dict[str,str] = field(default_factory=dict)
+
+    @property
+    def keep_alive(self)->bool:
+        return self.headers.get('connection','').lower() != 'close'
+
+    @property
+    def chunked(self)->bool:
+        return self.headers.get('transfer-encoding','').lower() == 'chunked'
+
+    @property
+    def content_length(self)->int:
+        return int(self.headers.get('content-length','0'))
+
+def parse_headers(lines:List[bytes])->Dict[str,str]:
+    headers:Dict[str,str] = {}
+    for line in lines:
+        name,sep,value = line.partition(b":")
+        if not sep or not name or name != name.strip():
+            raise HttpRequestError(400,"Malformed header line.")
+        headers[name.decode('latin-1').lower()] = value.strip().decode('latin-1')
+    return headers
+
+def parse_request_head(head:bytes)->HttpRequest:
+    # head is everything up to (and maybe including) the empty line -> bytes only, decode just the pieces we need
+    lines = head.rstrip(LINE_TERMINATOR).split(LINE_TERMINATOR)
+    request_line = lines[0].split(b" ")
+    if len(request_line) != 3:
+        raise HttpRequestError(400,"Malformed request line.")
+    method, target, version = request_line
+    if not version.startswith(b"HTTP/"):
+        raise HttpRequestError(400,"Malformed HTTP version.")
+
+    headers = parse_headers(lines[1:])
+    path,_,query = target.decode('latin-1').partition('?')
+    return HttpRequest(method.decode('ascii'),path,version.decode('ascii'),headers,dict(parse_qsl(query)),head=head)
+
+def encode_page_token(booking_id:str)->str:
+    """Opaque continuation token: clients pass it back unchanged, the key inside may change without breaking them."""
+    return urlsafe_b64encode(json.dumps({'after': str(booking_id)}).encode()).rstrip(b'=').decode('ascii')
+
+def decode_page_token(token:str)->str:
+    try:
+        after = json.loads(urlsafe_b64decode(token+'='*(-len(token)%4)))['after']
+        return str(UUID(after))
+    except (Base64Error,UnicodeDecodeError,ValueError,KeyError,TypeError,AttributeError):
+        raise ValueError(f"Invalid page token {token}.")
+
+def page_query(query:Dict[str,str],default_page_size:int,max_page_size:int)->Tuple[int,Optional[str]]:
+    """page_size and page_token of a listing request -> (page_size, booking_id to continue after)."""
+    try:
+        page_size = int(query.get('page_size',default_page_size))
+    except ValueError:
+        raise HttpRequestError(400,"page_size must be an integer.")
+    if not 0 < page_size <= max_page_size:
+        raise HttpRequestError(400,f"page_size must be between 1 and {max_page_size}.")
+    token = query.get('page_token')
+    if not token:
+        return page_size,None
+    try:
+        return page_size,decode_page_token(token)
+    except ValueError as e:
+        raise HttpRequestError(400,str(e))
+
+def parse_response_head(head:bytes)->HttpResponseHead:
+    lines = head.rstrip(LINE_TERMINATOR).split(LINE_TERMINATOR)
+    status_line = lines[0].split(b" ",2)
+    if len(status_line) < 2 or not status_line[1].isdigit():
+        raise HttpRequestError(502,"Malformed status line in upstream response.")
+    return HttpResponseHead(int(status_line[1]),parse_headers(lines[1:]))
+
+async def read_response_head(reader:StreamReader)->Tuple[HttpResponseHead,bytes]:
+    head = await reader.readuntil(HEADER_TERMINATOR)
+    return parse_response_head(head), head
+
+async def relay_response_body(reader:StreamReader,writer:StreamWriter,response_head:HttpResponseHead,chunk_size:int=65536,write_timeout:Optional[float]=None):
+    """Copies the body belonging to response_head piece by piece, so large or chunked responses are never buffered as a whole."""
+    if response_head.chunked:
+        while True:
+            size_line = await reader.readuntil(LINE_TERMINATOR)
+            writer.write(size_line)
+            size = int(size_line.split(b";",1)[0],16)
+            if size == 0:
+                # optional trailer section is closed by an empty line
+                while (line := await reader.readuntil(LINE_TERMINATOR)) != LINE_TERMINATOR:
+                    writer.write(line)
+                writer.write(LINE_TERMINATOR)
+                break
+            writer.write(await reader.readexactly(size+len(LINE_TERMINATOR)))
+            await wait_for(writer.drain(),write_timeout)
+    else:
+        remaining = response_head.content_length
+        while remaining:
+            data = await reader.read(min(chunk_size,remaining))
+            if not data:
+                raise IncompleteReadError(b'',remaining)
+            writer.write(data)
+            remaining -= len(data)
+            await wait_for(writer.drain(),write_timeout)
+    await wait_for(writer.drain(),write_timeout)
+
+class BodyStream:
+    """Content-Length body handed to the handler piece by piece instead of being buffered up front."""
+    def __init__(self,reader:StreamReader,content_length:int,chunk_size:int=65536,read_timeout:Optional[float]=None):
+        self._reader = reader
+        self.remaining = content_length
+        self.chunk_size = chunk_size
+        self.read_timeout = read_timeout
+
+    def __aiter__(self)->AsyncIterator[bytes]:
+        return self
+
+    async def __anext__(self)->bytes:
+        if not self.remaining:
+            raise StopAsyncIteration
+        try:
+            # deadline per read -> a large upload is fine, a stalled one is not
+            data = await wait_for(self._reader.read(min(self.chunk_size,self.remaining)),self.read_timeout)
+        except TimeoutError:
+            raise HttpRequestError(408,"body deadline expired.")
+        if not data:
+            raise HttpRequestError(400,"Connection closed before request body was complete.")
+        self.remaining -= len(data)
+        return data
+
+class HttpRequestReader:
+    def __init__(self,reader:StreamReader,max_header_size:int=8192,max_body_size:int=1048576):
+        self._reader = reader
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+
+    async def read_head(self)->Optional[HttpRequest]:
+        try:
+            head = await self._reader.readuntil(HEADER_TERMINATOR)
+        except IncompleteReadError as e:
+            if not e.partial.strip():
+                return None # peer closed the connection between requests
+            raise HttpRequestError(400,"Connection closed before request head was complete.")
+        except LimitOverrunError:
+            raise HttpRequestError(431,"Request header fields too large.")
+        if len(head) > self.max_header_size:
+            raise HttpRequestError(431,"Request header fields too large.")
+        return parse_request_head(head)
+
+    def _checked_content_length(self,request:HttpRequest,max_body_size:int)->int:
+        if 'transfer-encoding' in request.headers:
+            raise HttpRequestError(501,"Transfer-Encoding in requests not supported. Use Content-Length.")
+        content_length = request.content_length
+        if content_length > max_body_size:
+            # reject before a single body byte is buffered
+            raise HttpRequestError(413,f"Request body of {content_length} bytes exceeds limit of {max_body_size} bytes.")
+        return content_length
+
+    async def read_body(self,request:HttpRequest)->bytes:
+        content_length = self._checked_content_length(request,self.max_body_size)
+        if content_length == 0:
+            return b''
+        try:
+            return await self._reader.readexactly(content_length)
+        except IncompleteReadError:
+            raise HttpRequestError(400,"Connection closed before request body was complete.")
+
+    def stream_body(self,request:HttpRequest,max_body_size:int,chunk_size:int=65536,read_timeout:Optional[float]=None)->BodyStream:
+        request.body_stream = BodyStream(self._reader,self._checked_content_length(request,max_body_size),chunk_size,read_timeout)
+        return request.body_stream
+
+    async def read_request(self)->Optional[HttpRequest]:
+        request = await self.read_head()
+        if request is None:
+            return None
+        request.body = await self.read_body(request)
+        return request
@@ -0,0 +1,136 @@
+from asyncio import StreamWriter, wait_for
+from dataclasses import dataclass, field
+from functools import lru_cache
+from socket import socket
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+Body = Union[bytes,bytearray,memoryview,str]
+
+STATUS_MESSAGES:Dict[int,str] = {200: 'OK',
+                                 304: 'Not Modified',
+                                 400: 'Bad Request',
+                                 404: 'Not Found',
+                                 405: 'Method Not Allowed',
+                                 408: 'Request Timeout',
+                                 413: 'Content Too Large',
+                                 431: 'Request Header Fields Too Large',
+                                 500: 'Internal Server Error',
+                                 501: 'Not Implemented',
+                                 503: 'Service Unavailable',
+                                 504: 'Gateway Timeout'}
+
+# everything that does not depend on the single request is encoded exactly once
+_STATUS_LINES:Dict[int,bytes] = {code: f"HTTP/1.1 {code} {message}\r\n".encode('ascii') for code,message in STATUS_MESSAGES.items()}
+CONTENT_TYPE_JSON = b"Content-Type: application/json\r\n"
+_CONNECTION_CLOSE = b"Connection: close\r\n"
+_TRANSFER_ENCODING_CHUNKED = b"Transfer-Encoding: chunked\r\n"
+_LAST_CHUNK = b"0\r\n\r\n"
+_CRLF = b"\r\n"
+_BODYLESS_STATUS = (204,304)
+
+
+def status_line(status_code:int)->bytes:
+    line = _STATUS_LINES.get(status_code)
+    if line is None:
+        line = _STATUS_LINES[status_code] = f"HTTP/1.1 {status_code} Unknown\r\n".encode('ascii')
+    return line
+
+@lru_cache(maxsize=16)
+def connection_header(keep_alive:bool,timeout:float=0.0,max_requests:int=0)->bytes:
+    if not keep_alive:
+        return _CONNECTION_CLOSE
+    return f"Connection: keep-alive\r\nKeep-Alive: timeout={int(timeout)}, max={max_requests}\r\n".encode('ascii')
+
+@dataclass
+class HandlerResult:
+    """What a handler returns when a plain body is not enough (status, extra headers, already encoded body)."""
+    body: Body = b''
+    status_code: int = 200
+    headers: Dict[str,str] = field(default_factory=dict)
+    encoding: Optional[str] = None
+
+class HttpResponse:
+    __slots__ = ('status_code','body','headers','content_type','connection')
+
+    def __init__(self,status_code:int,body:Body=b'',headers:Optional[Dict[str,str]]=None,content_type:bytes=CONTENT_TYPE_JSON,connection:bytes=_CONNECTION_CLOSE):
+        self.status_code = status_code
+        # str bodies are encoded once here, so Content-Length counts bytes and not characters
+        self.body:Union[bytes,bytearray,memoryview] = body.encode('utf-8') if isinstance(body,str) else body
+        self.headers = headers
+        self.content_type = content_type
+        self.connection = connection
+
+    @property
+    def content_length(self)->int:
+        return self.body.nbytes if isinstance(self.body,memoryview) else len(self.body)
+
+    def head(self)->bytes:
+        if self.status_code in _BODYLESS_STATUS:
+            parts = [status_line(self.status_code),self.connection]
+        else:
+            parts = [status_line(self.status_code),self.content_type,b"Content-Length: %d\r\n" % self.content_length,self.connection]
+        if self.headers:
+            parts.extend(f"{name}: {value}\r\n".encode('latin-1') for name,value in self.headers.items())
+        parts.append(_CRLF)
+        return b"".join(parts)
+
+    def to_buffers(self)->List[Union[bytes,bytearray,memoryview]]:
+        return [self.head(),self.body] if self.content_length else [self.head()]
+
+    def write_to(self,writer:StreamWriter):
+        writer.writelines(self.to_buffers())
+
+    async def stream_to(self,writer:StreamWriter,write_timeout:Optional[float]=None):
+        self.write_to(writer)
+        await wait_for(writer.drain(),write_timeout)
+
+    def send_to(self,conn:socket):
+        # one sendmsg for head and body -> no concatenation and no extra small packet waiting on a delayed ACK
+        buffers = [memoryview(buffer).cast('B') for buffer in self.to_buffers()]
+        while buffers:
+            sent = conn.sendmsg(buffers)
+            while sent:
+                if sent >= len(buffers[0]):
+                    sent -= len(buffers[0])
+                    buffers.pop(0)
+                else:
+                    buffers[0] = buffers[0][sent:]
+                    sent = 0
+
+    def __repr__(self)->str:
+        return f"HttpResponse({self.status_code}, {self.content_length} bytes)"
+
+class ChunkedHttpResponse(HttpResponse):
+    __slots__ = ('chunks',)
+
+    def __init__(self,status_code:int,chunks:AsyncIterator[Body],headers:Optional[Dict[str,str]]=None,content_type:bytes=CONTENT_TYPE_JSON,connection:bytes=_CONNECTION_CLOSE):
+        super().__init__(status_code,b'',headers,content_type,connection)
+        self.chunks = chunks
+
+    def head(self)->bytes:
+        parts = [status_line(self.status_code),self.content_type,_TRANSFER_ENCODING_CHUNKED,self.connection]
+        if self.headers:
+            parts.extend(f"{name}: {value}\r\n".encode('latin-1') for name,value in self.headers.items())
+        parts.append(_CRLF)
+        return b"".join(parts)
+
+    def write_to(self,writer:StreamWriter):
+        raise TypeError("Chunked responses have to be streamed with stream_to().")
+
+    async def stream_to(self,writer:StreamWriter,write_timeout:Optional[float]=None):
+        # the head goes out before the first chunk exists -> time-to-first-byte does not depend on the body size
+        writer.write(self.head())
+        async for chunk in self.chunks:
+            if isinstance(chunk,str):
+                chunk = chunk.encode('utf-8')
+            size = chunk.nbytes if isinstance(chunk,memoryview) else len(chunk)
+            if not size:
+                continue # an empty chunk would terminate the body
+            writer.writelines((b"%x\r\n" % size,chunk,_CRLF))
+            # deadline per drain -> a long stream is fine, a client that stops reading is not
+            await wait_for(writer.drain(),write_timeout)
+        writer.write(_LAST_CHUNK)
+        await wait_for(writer.drain(),write_timeout)
+
+    def __repr__(self)->str:
+        return f"ChunkedHttpResponse({self.status_code}, streaming)"
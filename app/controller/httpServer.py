@@ -12,8 +12,13 @@ from abc import ABC, abstractmethod
 from json import dumps, loads
 from socket import AF_INET, SOCK_STREAM, socket
 from typing import Any, Dict, Optional, Union
+from urllib.parse import parse_qsl
 
 from ..model.database import BasicCRUD, travelCRUD
+from .compression import ResponseCompressor
+from .httpRequest import HttpRequestError, encode_page_token, page_query
+from .httpResponse import Body, HttpResponse, connection_header
+from .router import Router
 
 
 class RequestHandler(ABC):
@@ -21,24 +26,29 @@ class RequestHandler(ABC):
     def handle_request(self,request: Dict[str,Any])->str:
         pass
 
-class GetRequestHandler(RequestHandler):
+class GetBookingHandler(RequestHandler):
     def __init__(self,crud: BasicCRUD):
         self.crud = crud
     
     def handle_request(self, request: Dict[str, Any]) -> str:
-        booking_id = request.get('path').split('/')[-1]
-        if booking_id:
-            if "-" in booking_id:
-                booking = self.crud.get_booking_id(booking_id)
-                if booking:
-                    return booking
-                else:
-                    return f"booking_id {booking_id} not found."
-            else:
-                all_booking_ids = self.crud.get_booking_id()
-                return dumps(all_booking_ids)
+        booking_id = request['params']['booking_id']
+        booking = self.crud.get_booking_id(booking_id)
+        if booking:
+            return booking
         else:
-            return "No route matched."
+            raise HttpRequestError(404,f"booking_id {booking_id} not found.")
+
+class ListBookingsHandler(RequestHandler):
+    def __init__(self,crud: BasicCRUD,page_size:int=50,max_page_size:int=1000):
+        self.crud = crud
+        self.page_size = page_size
+        self.max_page_size = max_page_size # whole page is buffered here, unlike the streaming async handler
+    
+    def handle_request(self, request: Dict[str, Any]) -> str:
+        page_size,after = page_query(request.get('query',{}),self.page_size,self.max_page_size)
+        booking_ids = self.crud.get_booking_id(page_size=page_size,after=after) or []
+        next_token = encode_page_token(booking_ids[-1]['booking_id']) if len(booking_ids) == page_size else None
+        return dumps({'bookings': booking_ids,'next_page_token': next_token})
         
 class PostRequestHandler(RequestHandler):
     def __init__(self, crud: BasicCRUD) -> None:
@@ -58,14 +68,13 @@ class RequestHandlerFactory:
     def __init__(self, crud: BasicCRUD):
         self.crud = crud
     
-    def create_handler(self, method:str) -> RequestHandler:
-        match method:
-            case 'GET':
-                return GetRequestHandler(self.crud)
-            case 'POST':
-                return PostRequestHandler(self.crud)
-            case _:
-                raise ValueError(f"Unsupported HTTP-method: {method}.")
+    def create_router(self) -> Router[RequestHandler]:
+        # one handler instance per endpoint, shared by all requests
+        router:Router[RequestHandler] = Router()
+        router.add_route('GET','/booking',ListBookingsHandler(self.crud))
+        router.add_route('GET','/booking/{booking_id:uuid}',GetBookingHandler(self.crud))
+        router.add_route('POST','/booking',PostRequestHandler(self.crud))
+        return router
 
 class ServerConfig:
     _instance = {}
@@ -84,7 +93,9 @@ class HTTPserver:
     def __init__(self, crud: BasicCRUD,host:Optional[str]=None,port:Optional[int]=None):
         self.config = ServerConfig(host,port)
         self.crud = crud
+        self.compressor = ResponseCompressor()
         self.handler_factory = RequestHandlerFactory(self.crud,)
+        self.router = self.handler_factory.create_router()
         self._running = False
         self._active_socket = None
     
@@ -106,14 +117,14 @@ class HTTPserver:
                     if not data: 
                         break
                     response = self.handle_request(data.decode('utf-8'))
-                    conn.sendall(response.encode('utf-8'))
+                    response.send_to(conn)
     def stop(self):
         print("Stopping server...")
         self.running=False
         if self._active_socket:
             self._active_socket.close()
     
-    def handle_request(self,request:str) -> str:
+    def handle_request(self,request:str) -> HttpResponse:
         request_lines = request.split('\n')
         method, path, _ = request_lines[0].split()
         headers = {}
@@ -128,23 +139,24 @@ class HTTPserver:
                 print(f"Passed on {line=}.")
         if single_carrier_return_idx < len(request_lines) -1:
             body = '\n'.join(request_lines[single_carrier_return_idx+1:])
-        
+        return self.dispatch(method,path,headers,body)
+    
+    def dispatch(self,method:str,path:str,headers:Dict[str,str],body:Union[str,bytes],keep_alive:bool=False) -> HttpResponse:
         try:
-            handler = self.handler_factory.create_handler(method)
-            request_data= {'path':path,'headers':headers,'body':body}
+            handler,params = self.router.match(method,path.partition('?')[0])
+            request_data= {'path':path,'params':params,'query':dict(parse_qsl(path.partition('?')[2])),'headers':headers,'body':body}
             if method == 'POST':
                 request_data['booking'] = loads(body)
             result = handler.handle_request(request_data)
-            return self.create_response(200,result)
+            encoding = self.compressor.negotiate(headers.get('accept-encoding',''))
+            if encoding and self.compressor.should_compress(result):
+                return self.create_response(200,self.compressor.compress(result,encoding),keep_alive,self.compressor.headers(encoding))
+            return self.create_response(200,result,keep_alive)
+        except HttpRequestError as e:
+            return self.create_response(e.status_code,str(e),keep_alive,e.headers)
         except Exception as e:
-            return self.create_response(500,str(e))
+            return self.create_response(500,str(e),keep_alive)
     
-    def create_response(self, status_code: int, body: str) -> str:
-        status_messages = {200: 'OK', 500: 'Internal Server Error'}
-        headers = [
-            f"HTTP/1.1 {status_code} {status_messages.get(status_code)}",
-            "Content Type: application/json",
-            f"Content-Length: {len(body)}",
-            "Connection: close"
-        ]
-        return '\r\n'.join(headers) + '\r\n\r\n' + body
\ No newline at end of file
+    def create_response(self, status_code: int, body: Body, keep_alive: bool = False, headers: Optional[Dict[str,str]] = None) -> HttpResponse:
+        # serves one connection at a time -> holding it open would block every other client
+        return HttpResponse(status_code,body,headers,connection=connection_header(keep_alive))
@@ -1,7 +1,7 @@
 import asyncio
 import os
 from time import time
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 from rich.console import Console
 from rich.layout import Layout
@@ -102,6 +102,109 @@ class CacheParams(PerformanceParams):
         report = {**base_report,**cache_report}
         return report
 
+class HttpServerParams(PerformanceParams):
+    def __init__(self, device_name: str, device_id: str, max_avg_length: int, deadlines:Optional[Dict[str,float]]=None):
+        super().__init__(device_name, device_id, max_avg_length)
+        self.inflight_requests:int = 0
+        self.shed_requests:int = 0
+        self.deadlines:Dict[str,float] = deadlines if deadlines else {}
+        self.expired:Dict[str,int] = {phase:0 for phase in self.deadlines}
+    
+    def add_expired(self,phase:str):
+        self.expired[phase] = self.expired.get(phase,0)+1
+        self.last_update = time()
+    
+    def set_inflight_requests(self,inflight_requests:int):
+        self.inflight_requests = inflight_requests
+    
+    def add_shed_request(self):
+        self.shed_requests+=1
+        self.last_update = time()
+    
+    def get_perf_report(self) -> Dict[str, Any]:
+        base_report:Dict[str,Any] = super().get_perf_report()
+        server_report:Dict[str,Any]={'inflight_requests':self.inflight_requests,
+                  'shed_requests': self.shed_requests,
+                  'deadlines': self.deadlines,
+                  'expired': self.expired}
+        report = {**base_report,**server_report}
+        return report
+
+class ExecutorParams(PerformanceParams):
+    def __init__(self, device_name: str, device_id: str, max_avg_length: int):
+        super().__init__(device_name, device_id, max_avg_length)
+        self.wait_times:List[float] = []
+        self.queue_depth:int = 0
+        self.max_queue_depth:int = 0
+        self.avg_wait_time:float = -1.0
+    
+    def add_wait_time(self,wait_time:float):
+        self.add_perf_property(self.wait_times,wait_time)
+    
+    def set_queue_depth(self,queue_depth:int):
+        self.queue_depth = queue_depth
+        self.max_queue_depth = max(self.max_queue_depth,queue_depth)
+        self.last_update = time()
+    
+    def get_perf_report(self) -> Dict[str, Any]:
+        if len(self.wait_times)>0:
+            self.avg_wait_time = self.calculate_average(self.wait_times)
+        base_report:Dict[str,Any] = super().get_perf_report()
+        executor_report:Dict[str,Any]={'queue_depth':self.queue_depth,
+                  'max_queue_depth': self.max_queue_depth,
+                  'avg_wait_time': self.avg_wait_time}
+        report = {**base_report,**executor_report}
+        return report
+
+class PoolParams(PerformanceParams):
+    def __init__(self, device_name: str, device_id: str, max_avg_length: int):
+        super().__init__(device_name, device_id, max_avg_length)
+        self.wait_times:List[float] = []
+        self.avg_wait_time:float = -1.0
+        self.max_wait_time:float = 0.0
+        self.checkouts:int = 0
+        self.checkout_timeouts:int = 0
+        self.created:int = 0
+        self.discarded:Dict[str,int] = {'broken':0,'expired':0,'failed_check':0}
+        self.in_use:int = 0
+        self.idle:int = 0
+
+    def add_wait_time(self,wait_time:float):
+        self.checkouts+=1
+        self.max_wait_time = max(self.max_wait_time,wait_time)
+        self.add_perf_property(self.wait_times,wait_time)
+
+    def add_checkout_timeout(self):
+        self.checkout_timeouts+=1
+        self.last_update = time()
+
+    def add_created(self):
+        self.created+=1
+        self.last_update = time()
+
+    def add_discarded(self,reason:str):
+        self.discarded[reason] = self.discarded.get(reason,0)+1
+        self.last_update = time()
+
+    def set_usage(self,in_use:int,idle:int):
+        self.in_use = in_use
+        self.idle = idle
+
+    def get_perf_report(self) -> Dict[str, Any]:
+        if len(self.wait_times)>0:
+            self.avg_wait_time = self.calculate_average(self.wait_times)
+        base_report:Dict[str,Any] = super().get_perf_report()
+        pool_report:Dict[str,Any]={'in_use':self.in_use,
+                  'idle': self.idle,
+                  'checkouts': self.checkouts,
+                  'checkout_timeouts': self.checkout_timeouts,
+                  'avg_wait_time': self.avg_wait_time,
+                  'max_wait_time': self.max_wait_time,
+                  'created': self.created,
+                  'discarded': self.discarded}
+        report = {**base_report,**pool_report}
+        return report
+
 class DashboardDisplay:
     def __init__(self,update_func:Callable[...,Any],main_device:str):
         self.update_func = update_func
@@ -1,6 +1,37 @@
+import csv
+import io
+import json
+import os
+import re
 from abc import abstractmethod
-from typing import Any, Dict, List, Tuple, Union
+from codecs import getincrementaldecoder
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Union
 
+# one C-level regex match per token -> whitespace, strings and numbers never loop in Python
+_TOKEN = re.compile(r"""[ \t\n\r]*(?:
+     "([^"\\\x00-\x1f]*)"                                          # 1: string without escapes
+    |(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+(?:[eE][-+]?[0-9]+)?|[eE][-+]?[0-9]+))  # 2: float
+    |(-?(?:0|[1-9][0-9]*))                                          # 3: int
+    |([{}\[\],:])                                                   # 4: structural character
+    |(true|false|null)                                              # 5: literal
+    |(")                                                            # 6: string with escapes, scanned separately
+)""",re.VERBOSE)
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING_CHUNK = re.compile(r'([^"\\\x00-\x1f]*)(["\\\x00-\x1f])')
+_ESCAPES:Dict[str,str] = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_LITERALS:Dict[str,Any] = {'true': True, 'false': False, 'null': None}
+# what the scanner accepts next
+_VALUE, _VALUE_OR_CLOSE, _KEY, _KEY_OR_CLOSE, _COLON, _COMMA_OR_CLOSE = range(6)
+# push mode: only what decides where an array element ends
+_STRUCTURAL = re.compile(r'["{}\[\],]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STREAM_START, _STREAM_ARRAY, _STREAM_SINGLE, _STREAM_DONE = range(4)
+
+class JsonSizeError(ValueError):
+    """A fed array element or document is larger than the parser's cap."""
 
 class Parser:
     @abstractmethod
@@ -11,9 +42,47 @@ class Parser:
     def parse_complete(self,source:str|List[str])->List[List[str]]:
         pass
 
+def _line_aligned_ranges(path:str,chunk_size:int)->List[Tuple[int,int]]:
+    """Cuts a file into byte ranges of about chunk_size that all start at the beginning of a line."""
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path,'rb') as f:
+        while boundaries[-1]+chunk_size < size:
+            f.seek(boundaries[-1]+chunk_size)
+            f.readline() # finish the line the cut landed in
+            if f.tell() >= size:
+                break
+            boundaries.append(f.tell())
+    boundaries.append(size)
+    return list(zip(boundaries[:-1],boundaries[1:]))
+
+def _parse_csv_range(path:str,start:int,end:int,skip_header:bool,batch_size:int)->List[List[List[str]]]:
+    # module level -> picklable for the process pool
+    with open(path,'rb') as f:
+        f.seek(start)
+        text = f.read(end-start).decode('utf-8')
+    rows = csv.reader(io.StringIO(text,newline=''))
+    if skip_header and start == 0:
+        next(rows,None)
+    batches:List[List[List[str]]] = []
+    batch:List[List[str]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+    return batches
+
 class CsvParser(Parser):
-    def __init__(self,skip_header:bool=True):
+    """CSV via the csv module (quoted fields may contain commas). Large files are cut into line-aligned byte
+    ranges that a process pool parses in parallel; fields with embedded line breaks are not supported there."""
+    def __init__(self,skip_header:bool=True,batch_size:int=10000,chunk_size:int=16*1024*1024,max_workers:Optional[int]=None):
         self.skip_header = skip_header
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers if max_workers else (os.cpu_count() or 1)
     
     def set_skip_header(self,skip_header:bool):
         self.skip_header = skip_header
@@ -24,107 +93,299 @@ class CsvParser(Parser):
         
         # catch if the file not exists
         try:
-            with open(source,"r") as f:
-                if self.skip_header: next(f)
+            with open(source,"r",newline='') as f:
+                rows = csv.reader(f)
+                if self.skip_header: next(rows,None)
                 # use a generator pattern to save storage, in case of big files
-                for csv_line in f:
-                    yield csv_line.strip().split(",")
+                yield from rows
         except FileNotFoundError:
             raise ValueError(f"File {source} not found.")
     
+    def parse_batches(self,source:str|List[str])->Iterator[List[List[str]]]:
+        """Yields row batches of one or many files in file order, every file is split into chunks parsed in parallel."""
+        paths = [source] if isinstance(source,str) else list(source)
+        jobs:List[Tuple[str,int,int]] = []
+        for path in paths:
+            if not os.path.isfile(path):
+                raise ValueError(f"File {path} not found.")
+            jobs.extend((path,start,end) for start,end in _line_aligned_ranges(path,self.chunk_size))
+        if len(jobs) <= 1 or self.max_workers <= 1:
+            # a process pool only pays off with something to split
+            for path,start,end in jobs:
+                yield from _parse_csv_range(path,start,end,self.skip_header,self.batch_size)
+            return
+        with ProcessPoolExecutor(min(self.max_workers,len(jobs))) as pool:
+            # bounded window of submitted chunks -> parallel, but memory does not grow with the file size
+            pending:Deque[Future] = deque()
+            remaining = iter(jobs)
+            for path,start,end in islice(remaining,2*self.max_workers):
+                pending.append(pool.submit(_parse_csv_range,path,start,end,self.skip_header,self.batch_size))
+            while pending:
+                batches = pending.popleft().result()
+                for path,start,end in islice(remaining,1):
+                    pending.append(pool.submit(_parse_csv_range,path,start,end,self.skip_header,self.batch_size))
+                yield from batches
+    
     def parse_complete(self,source:str|List[str])->List[List[str]]:
-        if isinstance(source,str):
-            result = list(self.parse_one(source))
-        else: 
-            raise NotImplementedError("Parsing of lists of files not implemented for csvParser yet.")
-        
-        return result
+        return [row for batch in self.parse_batches(source) for row in batch]
 
 class JsonParser(Parser):
-    
-    def _parse_string(self,idx:int) -> Tuple[str,int]:
-        nidx = 0
-        nidx+=idx
-        while self.source[nidx] != '"':
-            nidx+=1
-        #nidx+=1
-        return self.source[idx:nidx],nidx+1
-    
-    def _parse_array(self,idx:int) -> Tuple[List[Any],int]:
-        nidx = 0
-        nidx+=idx
-        new_array = []
-        while self.source[nidx] != ']':
-            value,nidx = self._parse_value(nidx)
-            new_array.append(value)
-            if self.source[idx] == ',':
-                nidx +=1
-        return new_array, nidx+1
-    
-    def _parse_number(self,idx:int) -> Tuple[float,int]:
-        nidx = 0
-        nidx +=idx
-        while self.source[nidx] in '0123456789.-eE':
-            nidx+=1
-        return float(self.source[idx:nidx]),nidx
-    
-    
-    def _parse_value(self,idx:int) -> Tuple[Any,int]:
-        nidx = 0
-        nidx+=idx
-        match self.source[nidx]:
-            case '"':
-                return self._parse_string(nidx+1)
-            case '{':
-                return self._parse_dict(nidx+1)
-            case '[':
-                return self._parse_array(nidx+1)
-            case _ if self.source[nidx].isdigit() or self.source[nidx]=='-':
-                return self._parse_number(nidx)
-            case _ if self.source[nidx:nidx+4] == 'true':
-                return True, nidx+4
-            case _ if self.source[nidx:nidx+5] == 'false':
-                return False, nidx+5
-            case _ if self.source[nidx:nidx+4] == 'null':
-                return None, nidx+4
-            case _:
-                raise ValueError(f"Unknown Datatype formatting entry-point found. Please check the raw string around {nidx=}.")
-            
-        
-    def _parse_dict(self,idx:int) -> Tuple[Dict[Any,Any],int]:
-        # searches for ':' 
-        nidx=0
-        nidx+=idx
-        new_object:Dict[str,Any] = {}
-        key,value = None,None
-        while self.source[nidx] != '}':
-            match self.source[nidx]:
-                case '"': # assuming string keys (not tuple or numbers)
-                    key,key_end_idx = self._parse_string(nidx+1)
-                    nidx = key_end_idx
-                case ':':
-                    #nidx+=1
-                    value,value_end_idx = self._parse_value(nidx+1)
-                    nidx=value_end_idx
-                    new_object[key]=value
-                case ',':
-                    nidx+=1
-                case _:
-                    raise ValueError(f"No matching case found in _parse_dict subroutine at {nidx=}.")
-        return new_object,nidx
-    
+    """Iterative JSON scanner: nesting lives on an explicit stack, so deep documents never hit the recursion limit.
+
+    Besides parse_one() it has a push mode: feed() takes the raw bytes of a top-level array piece by piece and
+    returns every element as soon as it is complete, close() ends the document.
+    """
+    def __init__(self,max_element_size:Optional[int]=None,max_document_size:Optional[int]=None):
+        # caps in characters for feed(): one array element / a whole non-array document
+        self.max_element_size = max_element_size
+        self.max_document_size = max_document_size
+        self.reset()
+
+    def reset(self):
+        self._decoder = getincrementaldecoder('utf-8')()
+        self._pending:List[str] = [] # pieces of the element (or non-array document) in progress, joined once it is complete
+        self._pending_size = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False # a backslash ended the last piece -> the first character of the next one is escaped
+        self._stream_state = _STREAM_START
+        self._expect_element = False # a ',' was seen -> another element must follow
+
+    @staticmethod
+    def _error(message:str,source:str,idx:int)->ValueError:
+        return ValueError(f"{message} at {idx=} (around {source[max(idx-10,0):idx+10]!r}).")
+
+    def _parse_string(self,source:str,idx:int)->Tuple[str,int]:
+        # idx points behind the opening quote
+        chunks:List[str] = []
+        while True:
+            found = _STRING_CHUNK.match(source,idx)
+            if found is None:
+                raise self._error("Unterminated string",source,idx)
+            content,terminator = found.groups()
+            chunks.append(content)
+            idx = found.end()
+            if terminator == '"':
+                return ''.join(chunks),idx
+            if terminator != '\\':
+                raise self._error("Invalid control character in string",source,idx-1)
+            escape = source[idx:idx+1]
+            if escape == 'u':
+                char,idx = self._parse_unicode_escape(source,idx+1)
+                chunks.append(char)
+            elif escape in _ESCAPES:
+                chunks.append(_ESCAPES[escape])
+                idx += 1
+            else:
+                raise self._error("Invalid escape",source,idx)
+
+    def _parse_unicode_escape(self,source:str,idx:int)->Tuple[str,int]:
+        code = self._parse_hex(source,idx)
+        idx += 4
+        if 0xd800 <= code <= 0xdbff and source[idx:idx+2] == '\\u':
+            low = self._parse_hex(source,idx+2)
+            if 0xdc00 <= low <= 0xdfff:
+                # surrogate pair -> one astral code point
+                return chr(0x10000+((code-0xd800) << 10)+(low-0xdc00)),idx+6
+        return chr(code),idx
+
+    def _parse_hex(self,source:str,idx:int)->int:
+        digits = source[idx:idx+4]
+        if len(digits) != 4 or not all(digit in '0123456789abcdefABCDEF' for digit in digits):
+            raise self._error("Invalid \\u escape",source,idx)
+        return int(digits,16)
+
     def parse_one(self, source: str) -> List[str] | Any:
-        self.source=source
-        self.parsed_source , _ = self._parse_value(0)
-        return self.parsed_source
-        
+        # open containers as [container, pending key]; arrays keep None as key
+        stack:List[List[Any]] = []
+        match = _TOKEN.match
+        expect = _VALUE
+        idx = 0
+        while True:
+            token = match(source,idx)
+            if token is None:
+                raise self._error("Unexpected character",source,_WHITESPACE.match(source,idx).end())
+            kind = token.lastindex
+            idx = token.end()
+            if kind == 1:
+                value = token.group(1)
+            elif kind == 4:
+                char = token.group(4)
+                if char == '{' or char == '[':
+                    if expect != _VALUE and expect != _VALUE_OR_CLOSE:
+                        raise self._error("Unexpected container",source,idx-1)
+                    if char == '{':
+                        stack.append([{},None])
+                        expect = _KEY_OR_CLOSE
+                    else:
+                        stack.append([[],None])
+                        expect = _VALUE_OR_CLOSE
+                    continue
+                if char == ':':
+                    if expect != _COLON:
+                        raise self._error("Unexpected ':'",source,idx-1)
+                    expect = _VALUE
+                    continue
+                if not stack:
+                    raise self._error(f"Unexpected '{char}'",source,idx-1)
+                is_object = type(stack[-1][0]) is dict
+                if char == ',':
+                    if expect != _COMMA_OR_CLOSE:
+                        raise self._error("Unexpected ','",source,idx-1)
+                    expect = _KEY if is_object else _VALUE
+                    continue
+                if char != ('}' if is_object else ']') or not (expect == _COMMA_OR_CLOSE or expect == (_KEY_OR_CLOSE if is_object else _VALUE_OR_CLOSE)):
+                    raise self._error(f"Unexpected '{char}'",source,idx-1)
+                value = stack.pop()[0]
+                expect = _VALUE # a closed container counts as a value of its parent
+            elif kind == 6:
+                value,idx = self._parse_string(source,idx)
+            elif kind == 3:
+                value = int(token.group(3))
+            elif kind == 2:
+                value = float(token.group(2))
+            else:
+                value = _LITERALS[token.group(5)]
+
+            if expect == _KEY or expect == _KEY_OR_CLOSE:
+                if kind != 1 and kind != 6:
+                    raise self._error("Expecting property name enclosed in double quotes",source,token.start(kind))
+                stack[-1][1] = value
+                expect = _COLON
+                continue
+            if expect != _VALUE and expect != _VALUE_OR_CLOSE:
+                raise self._error("Expecting ',' delimiter",source,token.start(kind))
+            if not stack:
+                if _WHITESPACE.match(source,idx).end() != len(source):
+                    raise self._error("Extra data",source,idx)
+                return value
+            frame = stack[-1]
+            if frame[1] is None:
+                frame[0].append(value)
+            else:
+                frame[0][frame[1]] = value
+                frame[1] = None
+            expect = _COMMA_OR_CLOSE
     
+    def feed(self,data:Union[bytes,str])->List[Any]:
+        text = self._decoder.decode(data) if isinstance(data,(bytes,bytearray,memoryview)) else data
+        elements:List[Any] = []
+        if self._stream_state == _STREAM_START:
+            idx = _WHITESPACE.match(text).end()
+            if idx == len(text):
+                return elements
+            if text[idx] == '[':
+                self._stream_state = _STREAM_ARRAY
+                idx += 1
+            else:
+                # a single document (e.g. one booking object) -> nothing to split, parsed on close()
+                self._stream_state = _STREAM_SINGLE
+            text = text[idx:]
+        if self._stream_state == _STREAM_ARRAY:
+            self._scan_elements(text,elements)
+        elif self._stream_state == _STREAM_SINGLE:
+            self._keep_pending(text,self.max_document_size,"JSON document")
+        elif text.strip():
+            raise self._error("Extra data",text,0)
+        return elements
+
+    def _keep_pending(self,text:str,limit:Optional[int],what:str):
+        # pieces are only collected here -> a large value costs one join instead of a copy per chunk
+        if text:
+            self._pending.append(text)
+            self._pending_size += len(text)
+        if limit is not None and self._pending_size > limit:
+            raise JsonSizeError(f"{what} exceeds {limit} characters.")
+
+    def _scan_elements(self,text:str,elements:List[Any]):
+        # only strings and brackets matter for the element boundaries -> jump from one of them to the next;
+        # depth and string state carry over, so every chunk is scanned exactly once
+        idx = 0
+        start = 0 # where the element in progress begins within text
+        if self._escaped and text:
+            self._escaped = False
+            idx = 1
+        while True:
+            if self._in_string:
+                found = _STRING_SPECIAL.search(text,idx)
+                if found is None:
+                    break
+                idx = found.end()
+                if found.group() == '\\':
+                    if idx == len(text):
+                        self._escaped = True # escaped character is in the next chunk
+                        break
+                    idx += 1
+                else:
+                    self._in_string = False
+                continue
+            found = _STRUCTURAL.search(text,idx)
+            if found is None:
+                break
+            char = found.group()
+            idx = found.end()
+            if char == '"':
+                self._in_string = True
+            elif char == '{' or char == '[':
+                self._depth += 1
+            elif self._depth:
+                if char != ',':
+                    self._depth -= 1
+            elif char == ',':
+                elements.append(self._parse_element(text[start:idx-1],True))
+                start = idx
+            elif char == ']':
+                segment = text[start:idx-1]
+                if segment.strip() or self._expect_element or any(piece.strip() for piece in self._pending):
+                    elements.append(self._parse_element(segment,False))
+                self._stream_state = _STREAM_DONE
+                if text[idx:].strip():
+                    raise self._error("Extra data",text,idx)
+                return
+            else:
+                raise self._error("Unexpected '}'",text,idx-1)
+        # completed elements are gone -> memory is bounded by the element in progress
+        self._keep_pending(text[start:],self.max_element_size,"Array element")
+
+    def _parse_element(self,tail:str,more:bool)->Any:
+        if self._pending:
+            self._pending.append(tail)
+            segment = ''.join(self._pending)
+            self._pending,self._pending_size = [],0
+        else:
+            segment = tail
+        if self.max_element_size is not None and len(segment) > self.max_element_size:
+            raise JsonSizeError(f"Array element exceeds {self.max_element_size} characters.")
+        if not segment.strip():
+            raise self._error("Expecting value",segment,len(segment))
+        self._expect_element = more
+        # the scanner already cut out the element -> the C decoder parses it, parse_one() is far slower per element
+        return _loads(segment)
+
+    def close(self)->List[Any]:
+        """Ends a feed() document and returns what was still pending (the whole value of a non-array document)."""
+        tail = self._decoder.decode(b'',final=True)
+        state,pending = self._stream_state,self._pending
+        self.reset()
+        if state == _STREAM_SINGLE:
+            return [_loads(''.join(pending)+tail)]
+        if state == _STREAM_DONE and not tail.strip():
+            return []
+        raise ValueError("Incomplete JSON document: the top-level array was not closed.")
+
     def parse_complete(self,source:str | List[str])->List[Any]:
         parsed_list:List[Any] = []
         for item in source:
             parsed_list.append(self.parse_one(item))
         return parsed_list
                              
+def _loads(segment:str)->Any:
+    try:
+        return json.loads(segment)
+    except RecursionError:
+        # deeply nested input is invalid data, not a server error
+        raise ValueError("JSON value is nested too deeply.") from None
+
 class ParserFactory:
     def __init__(self,parser_history:List[Parser]=[]):
         self._parser_history = parser_history
@@ -0,0 +1,171 @@
+import asyncio
+import os
+import signal
+from logging import Logger
+from time import monotonic, sleep
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from uuid import uuid4
+
+from ..model.database import BasicCRUD
+from .asyncHttpServer import AsyncHttpServer
+from .logger import LoggerSetup
+from .taskQueue import TaskQueue
+
+
+def async_http_worker(crud_factory:Callable[[Logger],BasicCRUD],host:str,port:int,parent_logger:Logger,nbr_qworkers:int=3,qsize:int=5,broker_addr:str='localhost',logger_setup:Optional[LoggerSetup]=None)->Callable[[int],Awaitable[Any]]:
+    """Builds the coroutine every forked worker runs: its own event loop, CRUD, TaskQueue and an AsyncHttpServer on the shared port."""
+    async def run(worker_idx:int):
+        if logger_setup:
+            # the queue listener thread of the parent does not survive fork()
+            logger_setup.setup_logging()
+        logger = parent_logger.getChild(f"worker-{worker_idx}")
+        task_queue = TaskQueue(logger,f"WorkerTQ-{worker_idx}",nworkers=nbr_qworkers,qsize=qsize)
+        await task_queue.start()
+        server = AsyncHttpServer(crud_factory(logger),task_queue,host,port,logger,broker_addr,reuse_port=True)
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM,lambda: asyncio.create_task(server.stop()))
+        loop.add_signal_handler(signal.SIGINT,lambda: asyncio.create_task(server.stop()))
+        try:
+            await server.start()
+        except asyncio.CancelledError:
+            pass # serve_forever is cancelled by server.stop()
+        finally:
+            await task_queue.stop()
+            if logger_setup:
+                await logger_setup.stop_logging()
+    return run
+
+class PreforkSupervisor:
+    def __init__(self,worker_factory:Callable[[int],Awaitable[Any]],nworkers:int,parent_logger:Logger,restart_delay:float=1.0,max_restart_delay:float=30.0,min_uptime:float=10.0,shutdown_timeout:float=10.0):
+        self.worker_factory = worker_factory
+        self.nworkers = nworkers if nworkers > 0 else (os.cpu_count() or 1)
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.min_uptime = min_uptime
+        self.shutdown_timeout = shutdown_timeout
+        self._workers:Dict[int,int] = {} # pid -> worker index
+        self._started_at:Dict[int,float] = {}
+        self._delays:Dict[int,float] = {}
+        self._restart_at:Dict[int,float] = {} # worker index -> monotonic time its back-off ends
+        self._restarts = 0
+        self._stopping = False
+        self._id = str(uuid4())
+        self._name = f"Prefork-{self._id[:8]}"
+        self._logger = parent_logger.getChild(self._name)
+
+    def _spawn(self,worker_idx:int):
+        pid = os.fork()
+        if pid == 0:
+            # child: forget the supervisor's handlers, asyncio installs its own
+            signal.signal(signal.SIGTERM,signal.SIG_DFL)
+            signal.signal(signal.SIGINT,signal.SIG_DFL)
+            exit_code = 0
+            try:
+                asyncio.run(self.worker_factory(worker_idx))
+            except Exception as e:
+                self._logger.error("Worker %d crashed: %s",worker_idx,str(e),exc_info=True)
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self._workers[pid] = worker_idx
+        self._started_at[worker_idx] = monotonic()
+        self._logger.info("Started worker %d with pid %d.",worker_idx,pid)
+
+    def _request_shutdown(self,signum:int,frame:Any):
+        if self._stopping:
+            return
+        self._stopping = True
+        self._logger.info("Received signal %d. Stopping %d workers...",signum,len(self._workers))
+        self._signal_workers(signal.SIGTERM)
+
+    def _signal_workers(self,signum:int):
+        for pid in list(self._workers):
+            try:
+                os.kill(pid,signum)
+            except ProcessLookupError:
+                pass
+
+    def _handle_exit(self,pid:int,status:int):
+        worker_idx = self._workers.pop(pid,None)
+        if worker_idx is None or self._stopping:
+            return
+        exit_code = os.waitstatus_to_exitcode(status)
+        uptime = monotonic()-self._started_at.get(worker_idx,0.0)
+        # crash loops back off exponentially, a worker that ran for a while restarts right away
+        delay = self.restart_delay if uptime >= self.min_uptime else min(self._delays.get(worker_idx,self.restart_delay)*2,self.max_restart_delay)
+        self._delays[worker_idx] = delay
+        self._logger.warning("Worker %d (pid %d) exited with code %d after %.1f s. Restarting in %.1f s.",worker_idx,pid,exit_code,uptime,delay)
+        # no sleep here -> the other workers are still reaped and restarted while this one backs off
+        self._restart_at[worker_idx] = monotonic()+delay
+
+    def _respawn_due(self):
+        now = monotonic()
+        for worker_idx,restart_at in list(self._restart_at.items()):
+            if restart_at <= now:
+                del self._restart_at[worker_idx]
+                self._restarts += 1
+                self._spawn(worker_idx)
+
+    def _wait_for_exit(self)->Optional[Tuple[int,int]]:
+        """Blocks until a worker exits, but no longer than the next restart is due -> None when that comes first."""
+        if not self._restart_at:
+            return os.wait()
+        deadline = min(self._restart_at.values())
+        while not self._stopping:
+            try:
+                pid,status = os.waitpid(-1,os.WNOHANG)
+            except ChildProcessError:
+                pid,status = 0,0 # every worker is backing off
+            if pid:
+                return pid,status
+            remaining = deadline-monotonic()
+            if remaining <= 0:
+                return None
+            sleep(min(remaining,0.1)) # short naps -> signals are handled promptly
+        return None
+
+    def _reap_remaining(self):
+        deadline = monotonic()+self.shutdown_timeout
+        while self._workers and monotonic() < deadline:
+            try:
+                pid,status = os.waitpid(-1,os.WNOHANG)
+            except ChildProcessError:
+                self._workers.clear()
+                break
+            if pid:
+                self._handle_exit(pid,status)
+            else:
+                sleep(0.1)
+        if self._workers:
+            self._logger.warning("Killing %d workers that did not stop within %.1f s.",len(self._workers),self.shutdown_timeout)
+            self._signal_workers(signal.SIGKILL)
+            for pid in list(self._workers):
+                os.waitpid(pid,0)
+            self._workers.clear()
+
+    def run(self):
+        signal.signal(signal.SIGTERM,self._request_shutdown)
+        signal.signal(signal.SIGINT,self._request_shutdown)
+        for worker_idx in range(self.nworkers):
+            self._spawn(worker_idx)
+        while (self._workers or self._restart_at) and not self._stopping:
+            try:
+                exited = self._wait_for_exit()
+            except ChildProcessError:
+                break
+            if exited:
+                self._handle_exit(*exited)
+            self._respawn_due()
+        self._restart_at.clear()
+        self._reap_remaining()
+        self._logger.info("All workers stopped.")
+
+    def get_info(self)->Dict[str,Any]:
+        return {'name':self._name,
+                'id': self._id,
+                'nworkers': self.nworkers,
+                'worker_pids': dict(self._workers),
+                'restarts': self._restarts,
+                'pending_restarts': {worker_idx: max(restart_at-monotonic(),0.0) for worker_idx,restart_at in self._restart_at.items()},
+                'is_stopping': self._stopping,
+                'logger': str(self._logger),}
@@ -0,0 +1,83 @@
+import re
+from typing import (Any, Callable, Dict, Generic, List, Optional, Pattern,
+                    Tuple, TypeVar)
+
+from .httpRequest import HttpRequestError
+
+Handler = TypeVar('Handler')
+
+# name -> (regex for one path segment, converter applied to the matched text)
+PARAM_TYPES:Dict[str,Tuple[str,Callable[[str],Any]]] = {
+    'uuid': (r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}",str.lower),
+    'int': (r"[0-9]+",int),
+    'str': (r"[^/]+",str),
+}
+_PARAM_PATTERN = re.compile(r"\{(?P<name>[A-Za-z_][A-Za-z0-9_]*)(?::(?P<type>[a-z]+))?\}")
+
+
+class Route(Generic[Handler]):
+    def __init__(self,pattern:str):
+        self.pattern = pattern
+        self.handlers:Dict[str,Handler] = {}
+        self.converters:Dict[str,Callable[[str],Any]] = {}
+        regex = ""
+        last_end = 0
+        for param in _PARAM_PATTERN.finditer(pattern):
+            param_type = param.group('type') or 'str'
+            if param_type not in PARAM_TYPES:
+                raise ValueError(f"Unknown parameter type '{param_type}' in route {pattern}.")
+            type_regex,converter = PARAM_TYPES[param_type]
+            regex += re.escape(pattern[last_end:param.start()]) + f"(?P<{param.group('name')}>{type_regex})"
+            self.converters[param.group('name')] = converter
+            last_end = param.end()
+        regex += re.escape(pattern[last_end:])
+        self.is_static = not self.converters
+        self.regex:Pattern[str] = re.compile(regex+"$")
+
+    def match(self,path:str)->Optional[Dict[str,Any]]:
+        found = self.regex.match(path)
+        if not found:
+            return None
+        return {name: self.converters[name](value) for name,value in found.groupdict().items()}
+
+class Router(Generic[Handler]):
+    def __init__(self):
+        self._static:Dict[str,Route[Handler]] = {}
+        # dynamic routes are bucketed by their number of segments -> only a handful of regexes per lookup
+        self._dynamic:Dict[int,List[Route[Handler]]] = {}
+        self._routes:Dict[str,Route[Handler]] = {}
+
+    @staticmethod
+    def _normalize(path:str)->str:
+        return path.rstrip('/') if len(path) > 1 else path
+
+    def add_route(self,method:str,pattern:str,handler:Handler):
+        pattern = self._normalize(pattern)
+        route = self._routes.get(pattern)
+        if route is None:
+            route = self._routes[pattern] = Route(pattern)
+            if route.is_static:
+                self._static[pattern] = route
+            else:
+                self._dynamic.setdefault(pattern.count('/'),[]).append(route)
+        route.handlers[method.upper()] = handler
+
+    def match(self,method:str,path:str)->Tuple[Handler,Dict[str,Any]]:
+        path = self._normalize(path)
+        route = self._static.get(path)
+        params:Dict[str,Any] = {}
+        if route is None:
+            for candidate in self._dynamic.get(path.count('/'),()):
+                found = candidate.match(path)
+                if found is not None:
+                    route,params = candidate,found
+                    break
+            else:
+                raise HttpRequestError(404,f"No route matches {path}.")
+        handler = route.handlers.get(method)
+        if handler is None:
+            raise HttpRequestError(405,f"Method {method} not allowed for {path}.",{'Allow': ", ".join(sorted(route.handlers))})
+        return handler,params
+
+    def get_routes(self)->Dict[str,List[str]]:
+        return {pattern: sorted(route.handlers) for pattern,route in self._routes.items()}
@@ -0,0 +1,291 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from selectors import EVENT_READ, EVENT_WRITE, DefaultSelector
+from socket import (AF_INET, SO_REUSEADDR, SOCK_STREAM, SOL_SOCKET, socket,
+                    socketpair)
+from time import monotonic
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..model.database import BasicCRUD
+from .httpRequest import (HEADER_TERMINATOR, HttpRequest, HttpRequestError,
+                          parse_request_head)
+from .httpResponse import Body, HttpResponse, connection_header
+from .httpServer import HTTPserver
+
+_WAKEUP = object()
+
+
+class ConnectionState(Enum):
+    READING = 'reading'
+    PROCESSING = 'processing'
+    WRITING = 'writing'
+
+class SelectorConnection:
+    __slots__ = ('sock','addr','inbuf','outbuf','state','request','served','keep_alive','events','last_active','phase','deadline')
+
+    def __init__(self,sock:socket,addr:Any):
+        self.sock = sock
+        self.addr = addr
+        self.inbuf = bytearray()
+        self.outbuf:List[memoryview] = []
+        self.state = ConnectionState.READING
+        self.request:Optional[HttpRequest] = None # head parsed, body still incomplete
+        self.served = 0
+        self.keep_alive = True
+        self.events = 0
+        self.last_active = monotonic()
+        self.phase = 'header'
+        self.deadline = 0.0
+
+    def expect(self,phase:str,timeout:float):
+        # counted from the start of the phase, not from the last byte -> trickling clients cannot hold a connection
+        self.phase = phase
+        self.deadline = monotonic()+timeout
+
+class SelectorHTTPserver(HTTPserver):
+    """Event-driven engine for HTTPserver: one selector thread multiplexes all connections, handlers optionally run on a thread pool."""
+    max_header_size:int = 8192
+    max_body_size:int = 1048576
+    recv_size:int = 65536
+    backlog:int = 128
+    keepalive_timeout:float = 5.0
+    header_timeout:float = 10.0
+    body_timeout:float = 30.0
+    write_timeout:float = 30.0
+    max_requests_per_connection:int = 100
+    select_timeout:float = 1.0 # only paces the idle sweep, stop() wakes the loop right away
+
+    def __init__(self,crud:BasicCRUD,host:Optional[str]=None,port:Optional[int]=None,worker_threads:int=0):
+        super().__init__(crud,host,port)
+        self.worker_threads = worker_threads
+        self.running = False
+        self._pool = ThreadPoolExecutor(worker_threads,thread_name_prefix='SelectorHTTP') if worker_threads > 0 else None
+        self._selector:Optional[DefaultSelector] = None
+        self._connections:Dict[int,SelectorConnection] = {}
+        self.expired:Dict[str,int] = {'header':0,'body':0}
+        # finished handler calls are handed back to the selector thread -> sockets are only ever touched there
+        self._completed:Deque[Tuple[SelectorConnection,Future]] = deque()
+        self._wakeup_recv,self._wakeup_send = socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
+
+    def start(self):
+        with socket(AF_INET,SOCK_STREAM) as self._active_socket:
+            self._active_socket.setsockopt(SOL_SOCKET,SO_REUSEADDR,1)
+            self._active_socket.bind((self.config.host,self.config.port))
+            self._active_socket.listen(self.backlog)
+            self._active_socket.setblocking(False)
+            print(f"Server listening on {self.config.host}:{self.config.port} (selector engine, {self.worker_threads} worker threads).")
+            self._selector = DefaultSelector()
+            self._selector.register(self._active_socket,EVENT_READ,None)
+            self._selector.register(self._wakeup_recv,EVENT_READ,_WAKEUP)
+            self.running = True
+            try:
+                while self.running:
+                    for key,mask in self._selector.select(self.select_timeout):
+                        if key.data is None:
+                            self._accept()
+                        elif key.data is _WAKEUP:
+                            self._drain_wakeup()
+                        else:
+                            conn = key.data
+                            if mask & EVENT_READ:
+                                self._on_readable(conn)
+                            if mask & EVENT_WRITE and conn.state is ConnectionState.WRITING:
+                                self._on_writable(conn)
+                    self._close_expired()
+            finally:
+                for conn in list(self._connections.values()):
+                    self._close(conn)
+                self._selector.close()
+                self._selector = None
+
+    def stop(self):
+        print("Stopping server...")
+        self.running = False
+        self._wake()
+        if self._pool:
+            self._pool.shutdown(wait=False,cancel_futures=True)
+
+    def _wake(self):
+        try:
+            self._wakeup_send.send(b'\0')
+        except (BlockingIOError,OSError):
+            pass # a wakeup byte is already pending or the loop is gone
+
+    def _drain_wakeup(self):
+        try:
+            while self._wakeup_recv.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+        while self._completed:
+            conn,future = self._completed.popleft()
+            if conn.sock.fileno() < 0:
+                continue # connection was closed while its handler ran
+            try:
+                response = future.result()
+            except Exception as e:
+                response = self.create_response(500,str(e))
+                conn.keep_alive = False
+            self._respond(conn,response)
+
+    def _accept(self):
+        while True:
+            try:
+                sock,addr = self._active_socket.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            conn = SelectorConnection(sock,addr)
+            conn.expect('header',self.header_timeout)
+            self._connections[sock.fileno()] = conn
+            self._watch(conn,EVENT_READ)
+
+    def _watch(self,conn:SelectorConnection,events:int):
+        if events == conn.events:
+            return
+        if not events:
+            self._selector.unregister(conn.sock)
+        elif not conn.events:
+            self._selector.register(conn.sock,events,conn)
+        else:
+            self._selector.modify(conn.sock,events,conn)
+        conn.events = events
+
+    def _close(self,conn:SelectorConnection):
+        if conn.sock.fileno() < 0:
+            return
+        self._connections.pop(conn.sock.fileno(),None)
+        if conn.events:
+            self._selector.unregister(conn.sock)
+            conn.events = 0
+        conn.sock.close()
+
+    def _close_expired(self):
+        now = monotonic()
+        for conn in list(self._connections.values()):
+            # a handler may take its time, idle readers, slow requests and stalled writers may not
+            if conn.state is ConnectionState.READING and now > conn.deadline:
+                if conn.phase == 'idle':
+                    self._close(conn)
+                    continue
+                self.expired[conn.phase] += 1
+                conn.keep_alive = False
+                self._respond(conn,self.create_response(408,f"{conn.phase} deadline expired."))
+            elif conn.state is ConnectionState.WRITING and now-conn.last_active > self.write_timeout:
+                self._close(conn)
+
+    def _on_readable(self,conn:SelectorConnection):
+        try:
+            data = conn.sock.recv(self.recv_size)
+        except BlockingIOError:
+            return
+        except ConnectionError:
+            self._close(conn)
+            return
+        if not data:
+            self._close(conn)
+            return
+        conn.inbuf += data
+        conn.last_active = monotonic()
+        if conn.phase == 'idle':
+            conn.expect('header',self.header_timeout)
+        try:
+            self._advance(conn)
+        except HttpRequestError as e:
+            conn.keep_alive = False
+            self._respond(conn,self.create_response(e.status_code,str(e),False,e.headers))
+
+    def _advance(self,conn:SelectorConnection):
+        """Parses as far as the buffered bytes allow, hands a complete request to its handler."""
+        if conn.request is None:
+            end = conn.inbuf.find(HEADER_TERMINATOR)
+            if end < 0:
+                if len(conn.inbuf) > self.max_header_size:
+                    raise HttpRequestError(431,"Request header fields too large.")
+                return
+            end += len(HEADER_TERMINATOR)
+            if end > self.max_header_size:
+                raise HttpRequestError(431,"Request header fields too large.")
+            conn.request = parse_request_head(bytes(conn.inbuf[:end]))
+            del conn.inbuf[:end]
+            if 'transfer-encoding' in conn.request.headers:
+                raise HttpRequestError(501,"Transfer-Encoding in requests not supported. Use Content-Length.")
+            if conn.request.content_length > self.max_body_size:
+                raise HttpRequestError(413,f"Request body of {conn.request.content_length} bytes exceeds limit of {self.max_body_size} bytes.")
+            conn.expect('body',self.body_timeout)
+        content_length = conn.request.content_length
+        if len(conn.inbuf) < content_length:
+            return
+        request,conn.request = conn.request,None
+        request.body = bytes(conn.inbuf[:content_length])
+        del conn.inbuf[:content_length]
+        conn.served += 1
+        conn.keep_alive = request.keep_alive and conn.served < self.max_requests_per_connection
+        conn.state = ConnectionState.PROCESSING
+        # no reads while the handler runs -> pipelined requests wait in the kernel buffer instead of ours
+        self._watch(conn,0)
+        if self._pool:
+            future = self._pool.submit(self.dispatch,request.method,request.path,request.headers,request.body,conn.keep_alive)
+            future.add_done_callback(lambda done: self._handler_done(conn,done))
+        else:
+            self._respond(conn,self.dispatch(request.method,request.path,request.headers,request.body,conn.keep_alive))
+
+    def _handler_done(self,conn:SelectorConnection,future:Future):
+        self._completed.append((conn,future))
+        self._wake()
+
+    def _respond(self,conn:SelectorConnection,response:HttpResponse):
+        conn.outbuf = [memoryview(buffer).cast('B') for buffer in response.to_buffers()]
+        conn.state = ConnectionState.WRITING
+        conn.last_active = monotonic()
+        # optimistic write -> small responses leave without another select round
+        self._on_writable(conn)
+
+    def _on_writable(self,conn:SelectorConnection):
+        try:
+            while conn.outbuf:
+                sent = conn.sock.sendmsg(conn.outbuf)
+                conn.last_active = monotonic()
+                while sent:
+                    if sent >= len(conn.outbuf[0]):
+                        sent -= len(conn.outbuf.pop(0))
+                    else:
+                        conn.outbuf[0] = conn.outbuf[0][sent:]
+                        sent = 0
+        except BlockingIOError:
+            self._watch(conn,EVENT_WRITE)
+            return
+        except ConnectionError:
+            self._close(conn)
+            return
+        if not conn.keep_alive:
+            self._close(conn)
+            return
+        conn.state = ConnectionState.READING
+        # a pipelined request has started already, otherwise the connection idles until the next one
+        if conn.inbuf:
+            conn.expect('header',self.header_timeout)
+        else:
+            conn.expect('idle',self.keepalive_timeout)
+        self._watch(conn,EVENT_READ)
+        try:
+            self._advance(conn) # a pipelined request may already be buffered
+        except HttpRequestError as e:
+            conn.keep_alive = False
+            self._respond(conn,self.create_response(e.status_code,str(e),False,e.headers))
+
+    def create_response(self, status_code: int, body: Body, keep_alive: bool = False, headers: Optional[Dict[str,str]] = None) -> HttpResponse:
+        return HttpResponse(status_code,body,headers,connection=connection_header(keep_alive,self.keepalive_timeout,self.max_requests_per_connection))
+
+    def get_info(self)->Dict[str,Any]:
+        return {'host': self.config.host,
+                'port': self.config.port,
+                'engine': 'selector',
+                'worker_threads': self.worker_threads,
+                'open_connections': len(self._connections),
+                'deadlines': {'header': self.header_timeout,'body': self.body_timeout,'keepalive': self.keepalive_timeout,'write': self.write_timeout},
+                'expired': self.expired,
+                'is_running': self.running,}
@@ -1,5 +1,5 @@
 import asyncio
-from asyncio import Queue, TimeoutError
+from asyncio import Queue, QueueFull, TimeoutError
 from dataclasses import dataclass
 from logging import Logger
 from typing import Any, Callable, Dict, List, Optional
@@ -31,6 +31,22 @@ class TaskQueue:
         await self._queue.put(task)
         self._logger.info("Added task to queue: %s",func.__name__)
 
+    def try_add_task(self,func:Callable[...,Any],*args:Any,**kwargs:Any)->bool:
+        """Non-blocking add_task -> returns False instead of waiting when the queue is full."""
+        try:
+            self._queue.put_nowait(Task(func,args,kwargs))
+        except QueueFull:
+            self._logger.warning("Queue full, dropped task: %s",func.__name__)
+            return False
+        self._logger.info("Added task to queue: %s",func.__name__)
+        return True
+
+    def qsize(self)->int:
+        return self._queue.qsize()
+    
+    def maxsize(self)->int:
+        return self._queue.maxsize
+
     async def run_worker(self, worker_id: int):
         while self.is_running:
             try:
@@ -40,13 +56,12 @@ class TaskQueue:
             
             self._logger.info("Worker %s processing task: %s",worker_id,task.func.__name__)
             try:
-                result = await task.func(*task.args,**task.kwargs)
+                await task.func(*task.args,**task.kwargs)
                 self._logger.info("Worker %s completed task: %s",worker_id,task.func.__name__)
                 
                 if task.dependent_task:
                     await self._queue.put(task.dependent_task)
                     self._logger.info("Queued dependent task: %s",task.dependent_task.func.__name__)
-                return result
             except Exception as e:
                 self._logger.error("Error in task %s: %s",task.func.__name__,str(e),exc_info=True)#self._logger.error(format_exc())
                 if task.retries < task.max_retries:
@@ -62,15 +77,16 @@ class TaskQueue:
 
     async def start(self):    
         self.is_running = True
-        self.workers = [asyncio.create_task(self.run_worker(i)) for i in range(self._nworkers)]
+        self._workers = [asyncio.create_task(self.run_worker(i)) for i in range(self._nworkers)]
         self._logger.info("Started %d workers",self._nworkers)
     
     async def stop(self):
-        self.is_running = False
+        # workers keep running until the queue is drained, otherwise join() would wait for tasks nobody takes
         await self._queue.join()
+        self.is_running = False
         for worker in self._workers:
             worker.cancel()
-        await asyncio.gather(*self.workers,return_exceptions=True)
+        await asyncio.gather(*self._workers,return_exceptions=True)
         self._logger.info("All workers stopped")
     
     def get_info(self)->Dict[str,Any]:
@@ -78,5 +94,5 @@ class TaskQueue:
                 'id': self._id,
                 'nworkers':self._nworkers,
                 'max_qsize': self._queue.maxsize,
-                'current_qsize': self._queue.qsize,
+                'current_qsize': self._queue.qsize(),
                 'logger': str(self._logger),}
\ No newline at end of file
@@ -0,0 +1,87 @@
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .booking import Booking, BookingRecord
+from .columnar import COLUMN_KINDS, BookingColumns, ColumnBuilder
+
+AGGREGATIONS = ('count','sum','mean')
+
+
+class ColumnarBookingAnalyzer:
+    """Aggregations over BookingColumns: every operation is a handful of NumPy calls, no loop over bookings."""
+    def __init__(self,columns:BookingColumns):
+        self.columns = columns
+
+    @classmethod
+    def from_bookings(cls,bookings:Sequence[Union[Booking,BookingRecord]],batch_size:int=100000)->'ColumnarBookingAnalyzer':
+        """Adapter for the List[Booking] world (BookingManager.get_all_bookings())."""
+        builder = ColumnBuilder()
+        for start in range(0,len(bookings),batch_size):
+            builder.add_batch([booking.get_values_as_list() for booking in bookings[start:start+batch_size]])
+        return cls(builder.build())
+
+    def __len__(self)->int:
+        return len(self.columns)
+
+    def _group_codes(self,key:str)->Tuple[np.ndarray,List[Any]]:
+        if COLUMN_KINDS.get(key) == 'category':
+            return np.asarray(self.columns[key]),self.columns.categories[key]
+        # any other column is factorized on the fly
+        labels,codes = np.unique(self.columns[key],return_inverse=True)
+        return codes,labels.tolist()
+
+    def group_by(self,key:str,aggregation:str='count',value:str='total_price')->List[Tuple[Any,float]]:
+        """(label, aggregate) per group of key, largest first; groups without bookings are left out."""
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation {aggregation}. Options: {', '.join(AGGREGATIONS)}.")
+        codes,labels = self._group_codes(key)
+        counts = np.bincount(codes,minlength=len(labels))
+        if aggregation == 'count':
+            result = counts
+        else:
+            values = np.asarray(self.columns[value],dtype=np.float64)
+            valid = ~np.isnan(values) # a missing price must not turn a whole group into nan
+            result = np.bincount(codes[valid],weights=values[valid],minlength=len(labels))
+            if aggregation == 'mean':
+                valid_counts = np.bincount(codes[valid],minlength=len(labels))
+                result = np.divide(result,valid_counts,out=np.full(len(labels),np.nan),where=valid_counts > 0)
+        present = np.flatnonzero(counts)
+        order = present[np.argsort(-result[present],kind='stable')]
+        return [(labels[idx],result[idx].item()) for idx in order]
+
+    def top_k(self,key:str,k:int=1,aggregation:str='count',value:str='total_price')->List[Tuple[Any,float]]:
+        return self.group_by(key,aggregation,value)[:k]
+
+    def between(self,start:Optional[Union[date,str]]=None,end:Optional[Union[date,str]]=None,column:str='booking_date')->'ColumnarBookingAnalyzer':
+        """Bookings with start <= column <= end (both optional, NaT never matches)."""
+        dates = np.asarray(self.columns[column])
+        mask = ~np.isnat(dates)
+        if start is not None:
+            mask &= dates >= np.datetime64(start,'D')
+        if end is not None:
+            mask &= dates <= np.datetime64(end,'D')
+        return ColumnarBookingAnalyzer(self.columns.filter(mask))
+
+    def where(self,column:str,label:Any)->'ColumnarBookingAnalyzer':
+        if COLUMN_KINDS.get(column) == 'category':
+            return ColumnarBookingAnalyzer(self.columns.filter(np.asarray(self.columns[column]) == self.columns.code_of(column,label)))
+        return ColumnarBookingAnalyzer(self.columns.filter(np.asarray(self.columns[column]) == label))
+
+    def percentiles(self,q:Sequence[float]=(50,90,99),column:str='total_price')->Dict[float,float]:
+        values = np.asarray(self.columns[column],dtype=np.float64)
+        if not len(values) or np.isnan(values).all():
+            return {percent: float('nan') for percent in q}
+        return dict(zip(q,np.nanpercentile(values,q).tolist()))
+
+    def average_booking_price(self)->float:
+        values = np.asarray(self.columns['total_price'],dtype=np.float64)
+        return float(np.nanmean(values)) if len(values) and not np.isnan(values).all() else float('nan')
+
+    def most_frequent_destination(self)->Optional[str]:
+        top = self.top_k('destination')
+        return top[0][0] if top else None
+
+    def bookings_per_departure_city(self)->List[Tuple[str,int]]:
+        return [(city,int(count)) for city,count in self.group_by('departure_city')]
@@ -0,0 +1,270 @@
+import asyncio
+from functools import wraps
+from logging import Logger
+from time import perf_counter
+from typing import (Any, AsyncIterator, Callable, Dict, List, Optional, Tuple,
+                    Type)
+from uuid import uuid4
+
+import asyncpg
+
+from ..controller.monitoring import PerformanceParams
+from .booking import BookingManager
+from .cache import Cache, LruCache
+from .serializer import BookingSerializer
+
+
+class AsyncPostgresqlDB:
+    """Owns an asyncpg pool. It is created on first use, inside the loop that uses it (asyncpg pools are bound to one loop)."""
+    def __init__(self,host:str,port:int,dbname:str,user:str,password:str,parent_logger:Logger,min_size:int=2,max_size:int=20,
+                 max_inactive_connection_lifetime:float=300.0,command_timeout:Optional[float]=30.0)->None:
+        self.host = host
+        self.port = port
+        self.dbname = dbname
+        self.user = user
+        self.password = password
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        self.command_timeout = command_timeout
+        self.logger = parent_logger.getChild('asyncpgDB')
+        self.pool:Optional[asyncpg.Pool] = None
+        self._pool_lock:Optional[asyncio.Lock] = None
+
+    async def get_pool(self)->asyncpg.Pool:
+        if self.pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock: # concurrent first requests must not open two pools
+                if self.pool is None:
+                    self.pool = await asyncpg.create_pool(host=self.host,port=self.port,database=self.dbname,user=self.user,password=self.password,
+                                                          min_size=self.min_size,max_size=self.max_size,command_timeout=self.command_timeout,
+                                                          max_inactive_connection_lifetime=self.max_inactive_connection_lifetime)
+                    self.logger.debug('Pool established')
+        return self.pool
+
+    async def close(self):
+        if self.pool is not None:
+            pool,self.pool = self.pool,None
+            await pool.close()
+            self.logger.debug('Pool closed.')
+
+    def get_info(self)->Dict[str,Any]:
+        return {'host': self.host,
+                'port': self.port,
+                'dbname': self.dbname,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self.pool.get_size() if self.pool else 0,
+                'idle': self.pool.get_idle_size() if self.pool else 0,}
+
+class AsyncBasicCRUD:
+
+    @staticmethod
+    def db_operation(func:Callable[...,Any])->Callable[...,Any]:
+        """Borrows a pooled connection and wraps the call in a transaction (commit on success, rollback on error)."""
+        @wraps(func)
+        async def wrapper(self,*args,**kwargs):
+            result = None
+            pool = await self.db.get_pool()
+            async with pool.acquire() as conn:
+                try:
+                    async with conn.transaction():
+                        result = await func(self,conn,*args,**kwargs)
+                except Exception as e:
+                    # same contract as BasicCRUD.db_operation -> logged, caller gets None
+                    self.logger.error("Error during DB operation: %s.",str(e),exc_info=True)
+            return result if result else None
+        return wrapper
+
+class asyncTravelCRUD(AsyncBasicCRUD):
+    """travelCRUD on asyncpg: every method is a coroutine, so AsyncHttpServer awaits it on the loop instead of a DB thread."""
+    columns:Tuple[str,...] = ('booking_id','customer_id','customer_name','email','phone','booking_date','travel_date','return_date','destination','departure_city',
+                              'flight_number','hotel_name','room_type','total_price','payment_status','payment_method','travel_agency','special_requests','loyalty_program_number')
+
+    def __init__(self,db:Type[AsyncPostgresqlDB],db_params:Dict[str,Any],table_name:str,parent_logger:Logger,store_history:bool=False):
+        self.logger = parent_logger.getChild('asyncTravelCRUD')
+        self.db = db(parent_logger=self.logger,**db_params)
+        self.db_params = db_params
+        self.table_name = table_name
+        self.store_history = store_history
+        self.fetch_results_history:List[Tuple[Any,Any]] = []
+        self.serializer = BookingSerializer(self.columns)
+        self._booking_manager = BookingManager([])
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    async def close(self):
+        await self.db.close()
+
+    def to_db_row(self,row:List[Any])->List[Any]:
+        """asyncpg binds typed values only (no '2024-01-01' for a DATE) -> rows go through Booking like the cached insert path."""
+        return self._booking_manager.convert_params_to_booking(row).get_values_as_list()
+
+    def _conflict_clause(self,on_conflict:str)->str:
+        if on_conflict == 'update':
+            return f"ON CONFLICT (booking_id) DO UPDATE SET {', '.join(f'{column} = EXCLUDED.{column}' for column in self.columns[1:])}"
+        if on_conflict == 'ignore':
+            return "ON CONFLICT (booking_id) DO NOTHING"
+        raise ValueError(f"Unknown conflict handling {on_conflict}. Options: update, ignore.")
+
+    async def insert_data_from_list(self,data:List[List[Any]],on_conflict:str='update')->Optional[int]:
+        return await self.insert_rows([self.to_db_row(row) for row in data],on_conflict)
+
+    @AsyncBasicCRUD.db_operation
+    async def insert_rows(self,conn,rows:List[List[Any]],on_conflict:str='update')->Optional[int]:
+        """Rows with typed values in column order (see to_db_row), upserted like travelCRUD -> number of rows sent, None on failure."""
+        query = f"""INSERT INTO {self.table_name} ({','.join(self.columns)})
+            VALUES ({', '.join(f'${idx}' for idx in range(1,len(self.columns)+1))})
+            {self._conflict_clause(on_conflict)};
+        """
+        await conn.executemany(query,rows) # pipelined by asyncpg -> no round trip per row
+        self.logger.debug("Inserted the data into %s successfully.",self.table_name)
+        return len(rows) # one transaction -> all rows or an error
+
+    @AsyncBasicCRUD.db_operation
+    async def get_booking_id(self,conn,booking_id:Optional[str]=None,page_size:int=50,after:Optional[str]=None):
+        if booking_id:
+            query = f"""SELECT *
+                        FROM {self.table_name}
+                        WHERE booking_id = $1
+                        """
+            row = await conn.fetchrow(query,booking_id)
+            result = self.serializer.serialize(tuple(row)) if row else None
+        else:
+            query,params = self._page_query(page_size,after)
+            result = [{'booking_id':str(row[0])} for row in await conn.fetch(query,*params)]
+        if self.store_history: self.fetch_results_history.append((query,result))
+        return result
+
+    def _page_query(self,page_size:int,after:Optional[str])->Tuple[str,Tuple[Any,...]]:
+        # keyset pagination on the primary key, like travelCRUD
+        if after:
+            return f"SELECT booking_id FROM {self.table_name} WHERE booking_id > $1 ORDER BY booking_id LIMIT $2",(after,page_size)
+        return f"SELECT booking_id FROM {self.table_name} ORDER BY booking_id LIMIT $1",(page_size,)
+
+    async def iter_booking_ids(self,page_size:int=50,batch_size:int=500,after:Optional[str]=None)->AsyncIterator[List[Dict[str,Any]]]:
+        query,params = self._page_query(page_size,after)
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction(): # cursors only live inside a transaction
+                cursor = await conn.cursor(query,*params)
+                while rows := await cursor.fetch(batch_size):
+                    yield [{'booking_id':str(row[0])} for row in rows]
+
+    @AsyncBasicCRUD.db_operation
+    async def update_payment_status(self,conn,booking_id:str,new_status:str):
+        query = f"""UPDATE {self.table_name}
+            SET payment_status = $1
+            WHERE booking_id = $2
+        """
+        await conn.execute(query,new_status,booking_id)
+        self.logger.debug("Payment status of booking %s set to %s",booking_id,new_status)
+
+    @AsyncBasicCRUD.db_operation
+    async def delete_booking(self,conn,booking_id:str):
+        query = f"""DELETE FROM {self.table_name}
+            WHERE booking_id = $1
+        """
+        await conn.execute(query,booking_id)
+
+    def row_from_mapping(self,booking:Dict[str,Any])->List[Any]:
+        return [booking.get(column) for column in self.columns]
+
+    def get_cached_booking(self,booking_id:str)->Optional[bytes]:
+        return None
+
+    async def load_booking(self,booking_id:str)->Optional[bytes]:
+        return await self.get_booking_id(booking_id)
+
+    def get_cached_etag(self,booking_id:str)->Optional[str]:
+        return None
+
+    def get_cached_variant(self,booking_id:str,variant:str)->Optional[bytes]:
+        return None
+
+    def put_cached_variant(self,booking_id:str,variant:str,value:bytes):
+        pass
+
+    def get_info(self)->Dict[str,Any]:
+        return {'db': self.db.get_info(),
+                'db_table_name': self.table_name,
+                'store_history': self.store_history,
+                'logger': str(self.logger),}
+
+class asyncCachedTravelCRUD(asyncTravelCRUD):
+    def __init__(self,db:Type[AsyncPostgresqlDB],db_params:Dict[str,Any],table_name:str,parent_logger:Logger,store_history:bool=False,cache:Optional[Cache]=None):
+        super().__init__(db,db_params,table_name,parent_logger,store_history)
+        self.cache = cache if cache else LruCache(20,30)
+        self.logger = parent_logger.getChild('asyncCachedTravelCRUD')
+        self._id = str(uuid4())
+        self.name = f"actCRUD-{self._id[:8]}"
+        self.performance = PerformanceParams(self.name,self._id,20)
+
+    def start(self):
+        if not self.cache.is_running:
+            self.cache.start()
+
+    def stop(self):
+        if self.cache.is_running:
+            self.cache.stop()
+
+    def get_cached_booking(self,booking_id:str)->Optional[bytes]:
+        start_time = perf_counter()
+        cached_booking = self.cache.get(booking_id)
+        self.cache.performance.add_response_time(perf_counter()-start_time)
+        return cached_booking
+
+    async def load_booking(self,booking_id:str)->Optional[bytes]:
+        start_time = perf_counter()
+        booking = await super().get_booking_id(booking_id)
+        self.performance.add_response_time(perf_counter()-start_time)
+        if booking:
+            self.cache.put(booking_id,booking)
+        return booking
+
+    def get_cached_etag(self,booking_id:str)->Optional[str]:
+        return self.cache.get_etag(booking_id)
+
+    def get_cached_variant(self,booking_id:str,variant:str)->Optional[bytes]:
+        return self.cache.get_variant(booking_id,variant)
+
+    def put_cached_variant(self,booking_id:str,variant:str,value:bytes):
+        self.cache.put_variant(booking_id,variant,value)
+
+    async def get_booking_id(self,booking_id:Optional[str]=None,page_size:int=50,after:Optional[str]=None):
+        if booking_id:
+            return self.get_cached_booking(booking_id) or await self.load_booking(booking_id)
+        return await super().get_booking_id(booking_id,page_size,after)
+
+    async def insert_data_from_list(self,data:List[List[Any]],on_conflict:str='update')->Optional[int]:
+        start_time = perf_counter()
+        written = await super().insert_data_from_list(data,on_conflict)
+        self.performance.add_request_time(perf_counter()-start_time)
+        return written
+
+    async def insert_rows(self,rows:List[List[Any]],on_conflict:str='update')->Optional[int]:
+        written = await super().insert_rows(rows,on_conflict)
+        if written:
+            # upserted or skipped by the DB -> the cached copy may be stale, the next read refills it (a failed insert changed nothing)
+            for row in rows:
+                self.cache.invalidate(str(row[0]))
+        return written
+
+    async def update_payment_status(self,booking_id:str,new_status:str):
+        await super().update_payment_status(booking_id,new_status)
+        self.cache.invalidate(booking_id)
+
+    async def delete_booking(self,booking_id:str):
+        await super().delete_booking(booking_id)
+        self.cache.invalidate(booking_id)
+
+    def get_info(self)->Dict[str,Any]:
+        return {'name': self.name,
+                'id': self._id,
+                **super().get_info(),
+                'cache': self.cache.get_info(),}
@@ -1,5 +1,6 @@
 from datetime import date
-from typing import Any, List, Optional, Tuple
+from typing import (Any, Iterable, List, NamedTuple, Optional, Sequence,
+                    Tuple, Union)
 
 from pydantic import BaseModel
 
@@ -25,24 +26,71 @@ class Booking(BaseModel):
     special_requests: Optional[str]
     loyalty_program_number: Optional[str]
     
+    @classmethod
+    def from_trusted(cls,values:Sequence[Any])->'Booking':
+        """No validation (model_construct) -> only for data that already passed it, e.g. rows of our own table."""
+        return cls.model_construct(**dict(zip(cls.model_fields,values)))
+    
     def get_as_dict(self):
         return self.model_dump()
     
     def get_keys_as_list(self)->List[Any]: 
-        model_dict = self.get_as_dict()
-        return model_dict.keys()
+        return list(type(self).model_fields)
         
     def get_values_as_list(self)->List[Any]:
-        model_dict = self.get_as_dict()
-        return list(model_dict.values())
+        # flat model -> plain attribute reads instead of a full model_dump
+        return [getattr(self,field) for field in type(self).model_fields]
+    
+    def to_record(self)->'BookingRecord':
+        return BookingRecord._make(self.get_values_as_list())
     
     class Config:
         arbitrary_types_allowed = True
         anystr_strip_whitespace = True
 
+class BookingRecord(NamedTuple):
+    """Compact booking for bulk in-memory sets: a plain tuple (no __dict__, no validation) in table column order."""
+    booking_id:str
+    customer_id:str
+    customer_name:str
+    email:str
+    phone: str
+    booking_date: date
+    travel_date: date
+    return_date: Optional[date]
+    destination: str
+    departure_city: str
+    flight_number: str
+    hotel_name: str
+    room_type: str
+    total_price: float
+    payment_status: str
+    payment_method: str
+    travel_agency: Optional[str]
+    special_requests: Optional[str]
+    loyalty_program_number: Optional[str]
+    
+    @classmethod
+    def from_row(cls,row:Sequence[Any])->'BookingRecord':
+        """DB rows are trusted and already in column order -> no checks, no per-field work."""
+        return cls._make(row)
+    
+    def to_row(self)->Tuple[Any,...]:
+        return self # already a tuple -> goes to executemany/COPY as it is
+    
+    def to_booking(self)->Booking:
+        return Booking.from_trusted(self)
+    
+    def get_keys_as_list(self)->List[str]:
+        return list(self._fields)
+    
+    def get_values_as_list(self)->List[Any]:
+        return list(self)
+
 class BookingManager:
-    def __init__(self,bookings:List[Booking]=[])->None:
-        self._bookings:List[Booking] = bookings
+    def __init__(self,bookings:Optional[List[Union[Booking,BookingRecord]]]=None)->None:
+        # no shared default list -> managers must not see each other's bookings
+        self._bookings:List[Union[Booking,BookingRecord]] = bookings if bookings is not None else []
         self._booking_fields:List[str] = list(Booking.model_fields.keys())
     
     def convert_params_to_booking(self,booking_values:List[Any]):
@@ -52,17 +100,21 @@ class BookingManager:
         assert isinstance(bookings[0][0],str), "No list of strings given or degree of list nesting not matching"
         self._bookings+=[self.convert_params_to_booking(item) for item in bookings]
     
+    def add_records(self,rows:Iterable[Sequence[Any]])->None:
+        """Trusted rows (DB, own exports) are kept as BookingRecord without validation."""
+        self._bookings.extend(map(BookingRecord._make,rows))
+    
     def add_booking(self,booking:List[str])->None:
         self._bookings.append(Booking(*booking))
     
-    def get_all_bookings(self)->List[Booking]:
+    def get_all_bookings(self)->List[Union[Booking,BookingRecord]]:
         return self._bookings
     
     def to_list(self,idx):
         return [self._bookings[idx].get_keys_as_list(),self._bookings[idx].get_values_as_list()]
     
     def all_bookings_to_list(self):
-        new_keys=self._bookings[0].get_keys_as_list()
+        new_keys=list(self._booking_fields)
         new_values=[booking.get_values_as_list() for booking in self._bookings]
         return new_keys,new_values
         
@@ -76,8 +128,12 @@ class BookingAnalyzer:
         # sort from biggest to smallest
         return sorted(city_counter.items(),key=lambda item: item[1],reverse=True) 
     
-    def average_booking_price(self):
-        pass
+    def average_booking_price(self,bookings:List[Booking])->float:
+        # small lists only, large sets go through analytics.ColumnarBookingAnalyzer
+        return sum(book.total_price for book in bookings)/len(bookings) if bookings else float('nan')
     
-    def most_frequent_destination(self):
-        pass
\ No newline at end of file
+    def most_frequent_destination(self,bookings:List[Booking])->Optional[str]:
+        destination_counter:dict[str,int] = {}
+        for book in bookings:
+            destination_counter[book.destination] = destination_counter.get(book.destination,0)+1
+        return max(destination_counter,key=destination_counter.get) if destination_counter else None
\ No newline at end of file
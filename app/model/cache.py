@@ -2,8 +2,11 @@ import asyncio
 import json
 from abc import ABC, abstractmethod
 from collections import OrderedDict
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from threading import Lock
 from time import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
 from uuid import uuid4
 
 import paho.mqtt.client as mqtt
@@ -24,6 +27,18 @@ class Cache(ABC):
     def put(self,key:str,value:str):
         pass
     
+    @abstractmethod
+    def get_etag(self,key:str) -> Optional[str]:
+        pass
+    
+    @abstractmethod
+    def get_variant(self,key:str,variant:str) -> Optional[bytes]:
+        pass
+    
+    @abstractmethod
+    def put_variant(self,key:str,variant:str,value:bytes):
+        pass
+    
     @abstractmethod
     def invalidate(self,key:str):
         pass
@@ -32,9 +47,23 @@ class Cache(ABC):
     def clear(self):
         pass
 
+def make_etag(value:Union[str,bytes])->str:
+    """Strong ETag over the exact bytes of a representation."""
+    if isinstance(value,str):
+        value = value.encode('utf-8')
+    return f'"{blake2b(value,digest_size=16).hexdigest()}"'
+
+@dataclass
+class CacheEntry:
+    value: Any
+    created: float
+    etag: str = ""
+    variants: Dict[str,bytes] = field(default_factory=dict) # e.g. pre-compressed bodies, dropped together with value
+
 class LruCache(Cache):
     def __init__(self, capacity: int,age_limit:int,max_avg_length:int=500, broker_addr:str='localhost'):
-        self.cache:OrderedDict[str,Any]=OrderedDict()
+        self.cache:OrderedDict[str,CacheEntry]=OrderedDict()
+        self._lock = Lock() # DB executor threads fill the cache while the event loop reads it
         self.capacity = capacity
         self.age_limit = age_limit
         self._id=str(uuid4())
@@ -56,24 +85,51 @@ class LruCache(Cache):
     
     def get(self,key:str) -> Optional[str]:
         self.performance.add_request_time(time())
-        if key in self.cache and time()-self.cache[key][1] <= self.age_limit:
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry and time()-entry.created <= self.age_limit:
+                self.cache.move_to_end(key)
+            else:
+                entry = None
+        if entry:
             self.performance.add_cache_hit()
-            self.cache.move_to_end(key)
-            return self.cache[key][0]
+            return entry.value
         else:
             self.performance.add_cache_miss()
             return None
     
     def put(self,key:str,value:str):
-        if key in self.cache:
-            self.cache.move_to_end(key)
-        self.cache[key] = value,time()
-        if len(self.cache) > self.capacity:
-            self.cache.popitem(last=False)
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+            self.cache[key] = CacheEntry(value,time(),make_etag(value) if isinstance(value,(str,bytes)) else "")
+            if len(self.cache) > self.capacity:
+                self.cache.popitem(last=False)
+    
+    def get_etag(self,key:str) -> Optional[str]:
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry and entry.etag and time()-entry.created <= self.age_limit:
+                return entry.etag
+        return None
+    
+    def get_variant(self,key:str,variant:str) -> Optional[bytes]:
+        # no hit/miss accounting -> the lookup of the plain value already counted
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry and time()-entry.created <= self.age_limit:
+                return entry.variants.get(variant)
+        return None
+    
+    def put_variant(self,key:str,variant:str,value:bytes):
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry:
+                entry.variants[variant] = value
     
     def invalidate(self,key:str):
-        if key in self.cache:
-            del self.cache[key]
+        with self._lock:
+            self.cache.pop(key,None)
     
     def clear(self):
         self.cache.clear()
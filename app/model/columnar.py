@@ -0,0 +1,150 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..controller.parser import CsvParser
+
+# column order of travel_bookings.csv (= Booking fields) and how each column is stored
+COLUMN_KINDS:Dict[str,str] = {'booking_id': 'str',
+                              'customer_id': 'str',
+                              'customer_name': 'str',
+                              'email': 'str',
+                              'phone': 'str',
+                              'booking_date': 'date',
+                              'travel_date': 'date',
+                              'return_date': 'date',
+                              'destination': 'category',
+                              'departure_city': 'category',
+                              'flight_number': 'str',
+                              'hotel_name': 'str',
+                              'room_type': 'category',
+                              'total_price': 'float',
+                              'payment_status': 'category',
+                              'payment_method': 'category',
+                              'travel_agency': 'str',
+                              'special_requests': 'category',
+                              'loyalty_program_number': 'str'}
+CATEGORY_DTYPE = np.int32
+_CACHE_VERSION = 1
+
+
+class BookingColumns:
+    """Bookings as one typed NumPy array per field; categorical fields hold integer codes into `categories`."""
+    def __init__(self,columns:Dict[str,np.ndarray],categories:Dict[str,List[str]]):
+        self.columns = columns
+        self.categories = categories
+
+    def __len__(self)->int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self,name:str)->np.ndarray:
+        return self.columns[name]
+
+    def labels(self,name:str)->np.ndarray:
+        """Decodes a categorical column back to its strings."""
+        return np.asarray(self.categories[name],dtype=object)[self.columns[name]]
+
+    def code_of(self,name:str,label:str)->int:
+        try:
+            return self.categories[name].index(label)
+        except ValueError:
+            return -1 # matches no row
+
+    def filter(self,mask:np.ndarray)->'BookingColumns':
+        return BookingColumns({name: column[mask] for name,column in self.columns.items()},self.categories)
+
+class ColumnBuilder:
+    """Collects row batches column by column -> the row lists die with their batch."""
+    def __init__(self,kinds:Dict[str,str]=COLUMN_KINDS):
+        self.kinds = kinds
+        self._chunks:Dict[str,List[np.ndarray]] = {name: [] for name in kinds}
+        # label -> code, shared by all batches so codes stay stable
+        self._lookups:Dict[str,Dict[str,int]] = {name: {} for name,kind in kinds.items() if kind == 'category'}
+
+    def add_batch(self,rows:Sequence[Sequence[Any]]):
+        if not rows:
+            return
+        for (name,kind),values in zip(self.kinds.items(),zip(*rows)):
+            self._chunks[name].append(self._convert(name,kind,values))
+
+    def _convert(self,name:str,kind:str,values:Sequence[Any])->np.ndarray:
+        # CSV gives strings, Booking objects give date/float/None -> both end up in the same dtypes
+        if kind == 'date':
+            return np.array([value if value is not None else '' for value in values],dtype='datetime64[D]') # '' -> NaT
+        if kind == 'float':
+            return np.array([value if value not in ('',None) else 'nan' for value in values],dtype=np.float64)
+        if kind == 'category':
+            lookup = self._lookups[name]
+            return np.fromiter((lookup.setdefault(value if value is not None else '',len(lookup)) for value in values),dtype=CATEGORY_DTYPE,count=len(values))
+        return np.array([value if value is not None else '' for value in values],dtype=np.str_)
+
+    def build(self)->BookingColumns:
+        columns = {name: np.concatenate(chunks) if chunks else np.array([],dtype=self._empty_dtype(self.kinds[name])) for name,chunks in self._chunks.items()}
+        return BookingColumns(columns,{name: list(lookup) for name,lookup in self._lookups.items()})
+
+    @staticmethod
+    def _empty_dtype(kind:str)->np.dtype:
+        return np.dtype({'date': 'datetime64[D]', 'float': np.float64, 'category': CATEGORY_DTYPE}.get(kind,np.str_))
+
+class ColumnarBookingLoader:
+    """Loads a bookings CSV straight into BookingColumns and keeps a .npy cache next to it.
+
+    Cached columns are opened with mmap_mode='r', so a reload costs a few page faults instead of a parse
+    and the OS shares the pages between processes. The cache is rebuilt when size or mtime of the CSV changes.
+    """
+    def __init__(self,parser:Optional[CsvParser]=None,use_cache:bool=True,cache_dir:Optional[str]=None):
+        self.parser = parser if parser else CsvParser()
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+
+    def _cache_path(self,path:str)->str:
+        if self.cache_dir:
+            return os.path.join(self.cache_dir,os.path.basename(path)+'.columns')
+        return path+'.columns'
+
+    @staticmethod
+    def _fingerprint(path:str)->Dict[str,int]:
+        stat = os.stat(path)
+        return {'version': _CACHE_VERSION,'size': stat.st_size,'mtime_ns': stat.st_mtime_ns}
+
+    def load(self,path:str)->BookingColumns:
+        if not os.path.isfile(path):
+            raise ValueError(f"File {path} not found.")
+        if self.use_cache:
+            cached = self._read_cache(path)
+            if cached is not None:
+                return cached
+        builder = ColumnBuilder()
+        for batch in self.parser.parse_batches(path):
+            builder.add_batch(batch)
+        columns = builder.build()
+        if self.use_cache:
+            self._write_cache(path,columns)
+            # hand out the mapped arrays -> same memory behaviour on first and later loads
+            return self._read_cache(path) or columns
+        return columns
+
+    def _read_cache(self,path:str)->Optional[BookingColumns]:
+        cache_path = self._cache_path(path)
+        try:
+            with open(os.path.join(cache_path,'meta.json')) as f:
+                meta = json.load(f)
+        except (FileNotFoundError,json.JSONDecodeError):
+            return None
+        if meta.get('source') != self._fingerprint(path):
+            return None
+        columns = {name: np.load(os.path.join(cache_path,f"{name}.npy"),mmap_mode='r') for name in meta['columns']}
+        return BookingColumns(columns,meta['categories'])
+
+    def _write_cache(self,path:str,columns:BookingColumns):
+        cache_path = self._cache_path(path)
+        os.makedirs(cache_path,exist_ok=True)
+        for name,column in columns.columns.items():
+            np.save(os.path.join(cache_path,f"{name}.npy"),column)
+        # meta.json is written last -> a cache interrupted halfway is never taken as valid
+        tmp_path = os.path.join(cache_path,'meta.json.tmp')
+        with open(tmp_path,'w') as f:
+            json.dump({'source': self._fingerprint(path),'columns': list(columns.columns),'categories': columns.categories},f)
+        os.replace(tmp_path,os.path.join(cache_path,'meta.json'))
@@ -1,22 +1,31 @@
 import asyncio
 import json
+import os
+import re
 from abc import abstractmethod
-from functools import wraps
+from collections import deque
+from functools import partial, wraps
+from itertools import chain, islice
 from logging import Logger
-from time import perf_counter
+from threading import Condition, Lock
+from time import monotonic, perf_counter
 from traceback import TracebackException
-from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from typing import (Any, Callable, Deque, Dict, Iterable, Iterator, List,
+                    Optional, Sequence, Set, Tuple, Type)
 from uuid import uuid4
 
 import paho.mqtt.client as mqtt
 from psycopg2 import connect, extensions
 
-from ..controller.monitoring import PerformanceParams
+from ..controller.monitoring import PerformanceParams, PoolParams
 from .booking import BookingManager
 from .cache import Cache, LruCache
+from .serializer import BookingSerializer
 
 
 class DatabaseConnection:
+    reuses_connections:bool = False # True -> session state like prepared statements outlives one operation
+    
     def __init__(self,host:str,port:int,dbname:str,user:str,password:str)->None:
         self.host = host
         self.port = port
@@ -32,7 +41,50 @@ class DatabaseConnection:
     @abstractmethod
     def __exit__(self,exc_type:Optional[Type[BaseException]],exc_val:Optional[BaseException],exc_tb:Optional[TracebackException]) -> None:
         pass
+
+    @classmethod
+    def get_pool_info(cls,**db_params)->Optional[Dict[str,Any]]:
+        return None # unpooled -> one connection per operation
  
+class PreparedStatementRegistry:
+    """Names of the statements each connection has prepared, keyed by id(conn).
+
+    PREPARE lives as long as the DB session -> every pooled connection prepares a hot query once. The backend pid is
+    stored with the names, so a new connection that happens to get the id of a closed one starts from scratch.
+    """
+    def __init__(self):
+        self._prepared:Dict[int,Tuple[Any,Set[str]]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _session(conn:Any)->Any:
+        get_backend_pid = getattr(conn,'get_backend_pid',None)
+        return get_backend_pid() if get_backend_pid else None # libpq keeps the pid locally -> no round trip
+
+    def is_prepared(self,conn:Any,name:str)->bool:
+        with self._lock:
+            session,names = self._prepared.get(id(conn),(None,set()))
+            return name in names and session == self._session(conn)
+
+    def mark_prepared(self,conn:Any,name:str):
+        session = self._session(conn)
+        with self._lock:
+            known_session,names = self._prepared.get(id(conn),(session,set()))
+            if known_session != session:
+                names = set()
+            names.add(name)
+            self._prepared[id(conn)] = (session,names)
+
+    def forget(self,conn:Any):
+        with self._lock:
+            self._prepared.pop(id(conn),None)
+
+    def __len__(self)->int:
+        return len(self._prepared)
+
+# shared by all CRUDs: statement names are per DB session, not per CRUD
+PREPARED_STATEMENTS = PreparedStatementRegistry()
+
 class PostgresqlDB(DatabaseConnection):
 
     def __init__(self, host: str, port: int, dbname: str, user: str, password: str, parent_logger:Logger) -> None:
@@ -58,6 +110,235 @@ class PostgresqlDB(DatabaseConnection):
         self.conn.close()
         self.logger.debug('Connection closed.')
 
+class PoolTimeoutError(Exception):
+    pass
+
+class PooledConnection:
+    __slots__ = ('conn','created','last_used')
+
+    def __init__(self,conn:Any):
+        self.conn = conn
+        self.created = monotonic()
+        self.last_used = self.created
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections: min_size are opened up front, never more than max_size exist at once.
+
+    Idle connections are handed out LIFO -> the warm ones get reused and surplus ones age out via max_lifetime.
+    """
+    def __init__(self,connect:Callable[[],Any],parent_logger:Logger,min_size:int=1,max_size:int=10,max_lifetime:float=1800.0,
+                 checkout_timeout:float=5.0,health_check_after:float=30.0):
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}.")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after # idle longer than this -> probed with SELECT 1 before reuse
+        self.logger = parent_logger.getChild('pool')
+        self._id = str(uuid4())
+        self.performance = PoolParams(f"pgPool-{self._id[:8]}",self._id,100)
+        self._idle:Deque[PooledConnection] = deque()
+        self._in_use = 0 # handed out or being opened -> in_use+idle never exceeds max_size
+        self._available = Condition(Lock())
+        self._closed = False
+        for _ in range(min_size):
+            self._idle.append(self._open())
+        self._update_usage()
+
+    def _open(self)->PooledConnection:
+        entry = PooledConnection(self._connect())
+        self.performance.add_created()
+        self.logger.debug('Connection established')
+        return entry
+
+    def _discard(self,entry:PooledConnection,reason:str):
+        self.performance.add_discarded(reason)
+        self.logger.debug('Connection discarded (%s).',reason)
+        PREPARED_STATEMENTS.forget(entry.conn)
+        try:
+            entry.conn.close()
+        except Exception:
+            pass # already gone
+
+    def _update_usage(self):
+        self.performance.set_usage(self._in_use,len(self._idle))
+
+    def _check(self,entry:PooledConnection)->Optional[str]:
+        """Reason why a connection must not be handed out, None if it is fine."""
+        if entry.conn.closed:
+            return 'broken'
+        if monotonic()-entry.created > self.max_lifetime:
+            return 'expired'
+        if monotonic()-entry.last_used > self.health_check_after:
+            try:
+                cur = entry.conn.cursor()
+                cur.execute('SELECT 1')
+                cur.close()
+                entry.conn.rollback() # no transaction left open by the probe
+            except Exception:
+                return 'failed_check'
+        return None
+
+    def checkout(self)->PooledConnection:
+        start_time = perf_counter()
+        with self._available:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed.")
+                if self._idle:
+                    entry:Optional[PooledConnection] = self._idle.pop()
+                    break
+                if self._in_use < self.max_size:
+                    entry = None
+                    break
+                remaining = start_time+self.checkout_timeout-perf_counter()
+                if remaining <= 0:
+                    self.performance.add_checkout_timeout()
+                    raise PoolTimeoutError(f"No DB connection available after {self.checkout_timeout}s ({self.max_size} in use).")
+                self._available.wait(remaining)
+            self._in_use += 1
+            self._update_usage()
+        # health checks and connects are network I/O -> done outside the lock
+        try:
+            if entry is not None:
+                reason = self._check(entry)
+                if reason:
+                    self._discard(entry,reason)
+                    entry = None
+            if entry is None:
+                entry = self._open()
+        except Exception:
+            with self._available:
+                self._in_use -= 1
+                self._update_usage()
+                self._available.notify()
+            raise
+        self.performance.add_wait_time(perf_counter()-start_time)
+        return entry
+
+    def checkin(self,entry:PooledConnection,broken:bool=False):
+        entry.last_used = monotonic()
+        reason = 'broken' if broken or entry.conn.closed else 'expired' if entry.last_used-entry.created > self.max_lifetime else None
+        if reason:
+            self._discard(entry,reason)
+        with self._available:
+            self._in_use -= 1
+            if self._closed and not reason:
+                self._discard(entry,'expired')
+            elif not reason:
+                self._idle.append(entry)
+            self._update_usage()
+            self._available.notify()
+
+    def close(self):
+        with self._available:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop(),'expired')
+            self._update_usage()
+            self._available.notify_all()
+
+    def get_info(self)->Dict[str,Any]:
+        return {'min_size': self.min_size,
+                'max_size': self.max_size,
+                'max_lifetime': self.max_lifetime,
+                'checkout_timeout': self.checkout_timeout,
+                'health_check_after': self.health_check_after,
+                'performance': self.performance.get_perf_report(),}
+
+class PooledPostgresqlDB(PostgresqlDB):
+    """PostgresqlDB that borrows a connection from a pool instead of connecting per operation.
+
+    BasicCRUD creates a new DB object for every call, so the pools live on the class: keyed by process and
+    connection params -> all CRUDs with the same db_params share one pool, forked workers never reuse their parent's sockets.
+    Pool options (min_size, max_size, max_lifetime, checkout_timeout, health_check_after) can be given in db_params.
+    """
+    reuses_connections = True
+    _pools:Dict[Tuple[Any,...],ConnectionPool] = {}
+    _pools_lock = Lock()
+
+    def __init__(self, host: str, port: int, dbname: str, user: str, password: str, parent_logger:Logger, **pool_options) -> None:
+        super().__init__(host, port, dbname, user, password, parent_logger)
+        key = self._pool_key(host,port,dbname,user)
+        with self._pools_lock:
+            self.pool = self._pools.get(key)
+            if self.pool is None:
+                self.pool = self._pools[key] = ConnectionPool(partial(connect,host=host,port=port,dbname=dbname,user=user,password=password),
+                                                              self.logger,**pool_options)
+        self.entry:Optional[PooledConnection] = None
+
+    @staticmethod
+    def _pool_key(host:Optional[str],port:Optional[int],dbname:Optional[str],user:Optional[str])->Tuple[Any,...]:
+        return (os.getpid(),host,port,dbname,user)
+
+    def __enter__(self) -> Callable[...,extensions.connection]:
+        self.entry = self.pool.checkout()
+        self.conn = self.entry.conn
+        return self.conn
+
+    def __exit__(self, exc_type: type[BaseException] | None, exc_val: BaseException | None, exc_tb: TracebackException | None) -> None:
+        broken = False
+        try:
+            if exc_type:
+                self.conn.rollback()
+                self.logger.error('Exception %s happened. Rollback done. Nothing commited.',str(exc_type),exc_info=True)
+            else:
+                self.conn.commit()
+                self.logger.debug('Commit successfully done.')
+        except Exception:
+            broken = True # state unknown after a failed commit/rollback -> never handed out again
+            raise
+        finally:
+            self.pool.checkin(self.entry,broken)
+            self.entry = None
+            self.conn = None
+            self.logger.debug('Connection returned to pool.')
+
+    @classmethod
+    def get_pool_info(cls,**db_params)->Optional[Dict[str,Any]]:
+        pool = cls._pools.get(cls._pool_key(db_params.get('host'),db_params.get('port'),db_params.get('dbname'),db_params.get('user')))
+        return pool.get_info() if pool else None
+
+    @classmethod
+    def close_pools(cls):
+        with cls._pools_lock:
+            for key in [key for key in cls._pools if key[0] == os.getpid()]:
+                cls._pools.pop(key).close()
+
+# COPY text format: backslash, tab and line breaks are escaped, NULL is \N
+_COPY_ESCAPES = str.maketrans({'\\':'\\\\','\t':'\\t','\n':'\\n','\r':'\\r'})
+
+class CopyStream:
+    """File-like view of a row iterator in COPY text format -> copy_expert pulls rows while it sends, nothing is materialized."""
+    def __init__(self,rows:Iterator[Sequence[Any]]):
+        self._rows = rows
+        self._buffer = ''
+        self.rows_sent = 0
+
+    @staticmethod
+    def format_value(value:Any)->str:
+        return '\\N' if value is None else str(value).translate(_COPY_ESCAPES)
+
+    def read(self,size:int=-1)->str:
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            row = next(self._rows,None)
+            if row is None:
+                break
+            line = '\t'.join(map(self.format_value,row))+'\n'
+            parts.append(line)
+            length += len(line)
+            self.rows_sent += 1
+        data = ''.join(parts)
+        if size < 0 or len(data) <= size:
+            self._buffer = ''
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
 class BasicCRUD:
     
     @staticmethod
@@ -70,6 +351,7 @@ class BasicCRUD:
                 with self.db(parent_logger=self.logger,**self.db_params) as active_db:
                     if autocommit: active_db.autocommit = True # -> needed for drop
                     cur = active_db.cursor()
+                    result = None
                     try: 
                         result = func(self,cur,*args,**kwargs)
                         if cur.rowcount >=0:
@@ -91,7 +373,30 @@ class BasicCRUD:
         
         return decorator
 
+    @staticmethod
+    def db_stream_operation(func:Callable[...,Iterator[Any]]) -> Callable[...,Iterator[Any]]:
+        """Like db_operation, but for generators: connection and cursor stay open until the generator is exhausted or closed."""
+        @wraps(func)
+        def wrapper(self,*args,**kwargs):
+            with self.db(parent_logger=self.logger,**self.db_params) as active_db:
+                cur = active_db.cursor()
+                try:
+                    yield from func(self,cur,*args,**kwargs)
+                except Exception as e:
+                    # no swallowing here -> a half-sent stream has to be aborted by the consumer
+                    self.logger.error("Error during streaming DB operation: %s.",str(e),exc_info=True)
+                    raise
+                finally:
+                    self.executed_queries_history = getattr(cur, 'executed_queries', None)
+                    cur.close()
+        return wrapper
+
 class travelCRUD(BasicCRUD):
+    # column order of the table -> every positional row (insert, select *) follows it
+    columns:Tuple[str,...] = ('booking_id','customer_id','customer_name','email','phone','booking_date','travel_date','return_date','destination','departure_city',
+                              'flight_number','hotel_name','room_type','total_price','payment_status','payment_method','travel_agency','special_requests','loyalty_program_number')
+    copy_threshold:int = 1000 # rows; below that a multi-row INSERT beats setting up COPY (19 params/row stays far below the 65535 limit)
+    
     def __init__(self,db:DatabaseConnection,db_params:Dict[str,Any],table_name:str,parent_logger:Logger,store_history:bool=False,):
         self.db = db
         self.db_params = db_params
@@ -100,6 +405,17 @@ class travelCRUD(BasicCRUD):
         self.fetch_results_history:List[Tuple[Any,Any]] = []
         self.store_history = store_history
         self.logger = parent_logger.getChild('travelCRUD')
+        self.serializer = BookingSerializer(self.columns)
+        # hot queries, executed by name on pooled connections (see execute_statement)
+        self.statements:Dict[str,str] = {'booking_by_id': f"SELECT * FROM {self.table_name} WHERE booking_id = %s",
+                                         # keyset pagination: ORDER BY the primary key -> every page is an index range scan, no OFFSET
+                                         'booking_ids': f"SELECT booking_id FROM {self.table_name} ORDER BY booking_id LIMIT %s",
+                                         'booking_ids_after': f"SELECT booking_id FROM {self.table_name} WHERE booking_id > %s ORDER BY booking_id LIMIT %s",
+                                         'update_payment_status': f"UPDATE {self.table_name} SET payment_status = %s WHERE booking_id = %s",
+                                         'delete_booking': f"DELETE FROM {self.table_name} WHERE booking_id = %s",}
+        self._statement_prefix = re.sub(r'\W','_',self.table_name)
+        self.prepared_hits = 0
+        self.prepared_misses = 0
 
     @BasicCRUD.db_operation
     def create_schema(self,cur):
@@ -128,14 +444,78 @@ class travelCRUD(BasicCRUD):
         cur.execute(query)
         self.logger.debug("Created table %s successfully.",self.table_name)
 
+    def execute_statement(self,cur,name:str,params:Tuple[Any,...]):
+        """Runs self.statements[name]; on reused (pooled) connections it is prepared once per connection and executed by name."""
+        if not self.db.reuses_connections:
+            cur.execute(self.statements[name],params) # fresh connection per call -> a PREPARE would never pay off
+            return
+        conn = cur.connection
+        statement = f"{self._statement_prefix}_{name}"
+        if PREPARED_STATEMENTS.is_prepared(conn,statement):
+            self.prepared_hits += 1
+        else:
+            self.prepared_misses += 1
+            counter = iter(range(1,len(params)+1))
+            cur.execute(f"PREPARE {statement} AS {re.sub('%s',lambda _: f'${next(counter)}',self.statements[name])}")
+            PREPARED_STATEMENTS.mark_prepared(conn,statement)
+        cur.execute(f"EXECUTE {statement} ({', '.join(['%s']*len(params))})" if params else f"EXECUTE {statement}",params)
+
+    def _conflict_clause(self,on_conflict:str)->str:
+        if on_conflict == 'update':
+            return f"ON CONFLICT (booking_id) DO UPDATE SET {', '.join(f'{column} = EXCLUDED.{column}' for column in self.columns[1:])}"
+        if on_conflict == 'ignore':
+            return "ON CONFLICT (booking_id) DO NOTHING"
+        raise ValueError(f"Unknown conflict handling {on_conflict}. Options: update, ignore.")
+
     @BasicCRUD.db_operation
-    def insert_data_from_list(self,cur,data:List[str]):
-        """eg create_schema()"""
-        query = f"""INSERT INTO {self.table_name} (booking_id, customer_id,customer_name, email,phone,booking_date,travel_date,return_date,destination,departure_city,flight_number,hotel_name,room_type,total_price, payment_status,payment_method,travel_agency,special_requests,loyalty_program_number)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+    def insert_data_from_list(self,cur,data:Iterable[Sequence[Any]],on_conflict:str='update',returning:bool=False):
+        """Upserts rows in column order; data may be a generator, it is consumed once.
+
+        Fewer than copy_threshold rows -> one multi-row INSERT. More -> COPY into a staging table, then one upsert from it.
+        Returns the number of rows written, or with returning=True the booking_ids written (rows skipped by on_conflict='ignore' are left out).
+        None -> nothing written or the insert failed.
+        """
+        returning_clause = "RETURNING booking_id" if returning else ""
+        conflict_clause = self._conflict_clause(on_conflict)
+        rows = iter(data)
+        head = list(islice(rows,self.copy_threshold))
+        if len(head) < self.copy_threshold:
+            # ON CONFLICT may touch a row only once per statement -> last duplicate wins, like it would in the staging path
+            head = list({row[0]: row for row in head}.values())
+            if not head:
+                return
+            placeholders = '('+', '.join(['%s']*len(self.columns))+')'
+            query = f"""INSERT INTO {self.table_name} ({','.join(self.columns)})
+                VALUES {', '.join([placeholders]*len(head))}
+                {conflict_clause}
+                {returning_clause};
+            """
+            cur.execute(query,[value for row in head for value in row])
+            self.logger.debug("Inserted %d rows into %s.",len(head),self.table_name)
+            return self._written(cur,returning)
+        staging = f"{self.table_name}_staging"
+        cur.execute(f"""CREATE TEMP TABLE {staging} (LIKE {self.table_name} INCLUDING DEFAULTS, copy_seq BIGSERIAL) ON COMMIT DROP;""")
+        stream = CopyStream(chain(head,rows))
+        cur.copy_expert(f"COPY {staging} ({','.join(self.columns)}) FROM STDIN",stream)
+        # copy_seq keeps the input order -> the last duplicate of a booking_id wins
+        query = f"""INSERT INTO {self.table_name} ({','.join(self.columns)})
+            SELECT DISTINCT ON (booking_id) {','.join(self.columns)}
+            FROM {staging}
+            ORDER BY booking_id, copy_seq DESC
+            {conflict_clause}
+            {returning_clause};
         """
-        cur.executemany(query,data)
-        self.logger.debug("Inserted the data into %s successfully.",self.table_name)
+        cur.execute(query)
+        self.logger.debug("Copied %d rows into %s.",stream.rows_sent,self.table_name)
+        return self._written(cur,returning)
+
+    @staticmethod
+    def _written(cur,returning:bool)->Any:
+        return [str(row[0]) for row in cur.fetchall()] if returning else cur.rowcount
+
+    def insert_rows(self,rows:List[List[Any]],on_conflict:str='update')->Optional[int]:
+        """Rows that are validated already (Booking values in column order) -> number of rows written, None on failure."""
+        return self.insert_data_from_list(rows,on_conflict)
     
     @BasicCRUD.db_operation
     def get_email_addresses(self,cur):
@@ -150,42 +530,83 @@ class travelCRUD(BasicCRUD):
         return result
     
     @BasicCRUD.db_operation
-    def get_booking_id(self,cur,booking_id:Optional[str]=None,page_size:int=50):
+    def get_booking_id(self,cur,booking_id:Optional[str]=None,page_size:int=50,after:Optional[str]=None):
         if booking_id:
-            query = f"""SELECT * 
-                        FROM {self.table_name} 
-                        WHERE booking_id = %s
-                        """
-            cur.execute(query,(booking_id,))
-            result = cur.fetchone()
-            result = BookingManager().convert_params_to_booking(result).json()
+            self.execute_statement(cur,'booking_by_id',(booking_id,))
+            row = cur.fetchone()
+            # rows from our own table are trusted -> no Booking validation on the read path
+            result = self.serializer.serialize(row) if row else None
         else:
-            query = f"""SELECT booking_id
-                        FROM {self.table_name} 
-                        LIMIT %s;
-                        """
-            cur.execute(query,(page_size,))
+            self.execute_statement(cur,*self._page_statement(page_size,after))
             result = cur.fetchall()
             result = [{'booking_id':res[0]} for res in result]
         if self.store_history: self.fetch_results_history.append((getattr(cur, 'executed_queries', None),result))
         return result
     
+    def row_from_mapping(self,booking:Dict[str,Any])->List[Any]:
+        """Positional insert row from field names -> independent of the key order a client sent."""
+        return [booking.get(column) for column in self.columns]
+    
+    def get_cached_booking(self,booking_id:str)->Optional[bytes]:
+        return None # nothing in front of the DB -> every lookup is a miss
+    
+    def load_booking(self,booking_id:str)->Optional[bytes]:
+        return self.get_booking_id(booking_id)
+    
+    def get_cached_etag(self,booking_id:str)->Optional[str]:
+        return None
+    
+    def get_cached_variant(self,booking_id:str,variant:str)->Optional[bytes]:
+        return None
+    
+    def put_cached_variant(self,booking_id:str,variant:str,value:bytes):
+        pass
+
+    @staticmethod
+    def _page_statement(page_size:int,after:Optional[str])->Tuple[str,Tuple[Any,...]]:
+        return ('booking_ids_after',(after,page_size)) if after else ('booking_ids',(page_size,))
+
+    @BasicCRUD.db_stream_operation
+    def iter_booking_ids(self,cur,page_size:int=50,batch_size:int=500,after:Optional[str]=None)->Iterator[List[Dict[str,Any]]]:
+        """Page of ids after `after` in booking_id order, batch by batch."""
+        name,params = self._page_statement(page_size,after)
+        if page_size <= batch_size:
+            # fits one batch -> prepared statement and a single round trip
+            self.execute_statement(cur,name,params)
+            if rows := cur.fetchall():
+                yield [{'booking_id':row[0]} for row in rows]
+            return
+        # large page -> named (server-side) cursor: the server holds the result, only batch_size rows are in memory at once
+        server_cursor = cur.connection.cursor(name=f"booking_ids_{uuid4().hex}")
+        try:
+            server_cursor.itersize = batch_size
+            server_cursor.execute(self.statements[name],params)
+            while rows := server_cursor.fetchmany(batch_size):
+                yield [{'booking_id':row[0]} for row in rows]
+        finally:
+            server_cursor.close()
+
     @BasicCRUD.db_operation
     def update_payment_status(self,cur,booking_id:str,new_status:str):
-        query = f"""UPDATE {self.table_name}
-            SET payment_status = %s
-            WHERE booking_id = %s
-        """
-        cur.execute(query,(booking_id,new_status))
+        self.execute_statement(cur,'update_payment_status',(new_status,booking_id))
         self.logger.debug("Payment status of booking %s set to %s",booking_id,new_status)    
 
     @BasicCRUD.db_operation
     def delete_booking(self,cur,booking_id:str):
-        query= f"""DELETE FROM {self.table_name}
-            WHERE booking_id = %s
-        """
-        cur.execute(query,(booking_id,))
+        self.execute_statement(cur,'delete_booking',(booking_id,))
         
+    def get_prepared_info(self)->Dict[str,Any]:
+        return {'hits': self.prepared_hits,
+                'misses': self.prepared_misses,
+                'connections': len(PREPARED_STATEMENTS),}
+
+    def get_info(self)->Dict[str,Any]:
+        return {'db':str(self.db),
+                'db_table_name': self.table_name,
+                'store_history': self.store_history,
+                'prepared_statements': self.get_prepared_info(),
+                'logger': str(self.logger),}
+
     @BasicCRUD.db_operation
     def check_table_exists(self,cur):
         query=f"""SELECT 1 FROM pg_database WHERE datname = 'sqlalchemy1'"""
@@ -203,6 +624,7 @@ class travelCRUD(BasicCRUD):
         self.logger.debug("Database %s dropped successfully, if it existed in the first place.",self.table_name)
 
 class cachedTravelCRUD(travelCRUD):
+    invalidate_limit:int = 1000 # bookings of one insert whose cache entries are dropped one by one; a larger insert clears the cache
     def __init__(self, db: DatabaseConnection, db_params: Dict[str, Any], table_name: str, parent_logger:Logger,store_history: bool = False,cache:Optional[Cache]=None,broker_addr:str='localhost'):
         super().__init__(db, db_params, table_name, parent_logger,store_history)
         self.cache = cache if cache else LruCache(20,30)
@@ -210,8 +632,7 @@ class cachedTravelCRUD(travelCRUD):
         self._id=str(uuid4())
         self.name = f"ctCRUD-{self._id[:8]}"
         self.broker_address = broker_addr
-        self.mqtt_client = mqtt.Client()
-        self.mqtt_client.connect(self.broker_address,keepalive=120)
+        self.mqtt_client = mqtt.Client() # connected by publish_health -> building a CRUD needs no broker
         self.performance = PerformanceParams(self.name,self._id,20)
         self.is_running=False
         
@@ -225,39 +646,96 @@ class cachedTravelCRUD(travelCRUD):
         self.is_running=False
         if self.health_task:
             self.health_task.cancel()
-    def get_booking_id(self,booking_id:Optional[str]=None,page_size:int=50):
+    def get_cached_booking(self,booking_id:str)->Optional[bytes]:
+        start_time = perf_counter()
+        cached_booking = self.cache.get(booking_id)
+        self.cache.performance.add_response_time(perf_counter()-start_time)
+        if cached_booking:
+            self.logger.debug("Read from cache.")
+        return cached_booking
+    
+    def load_booking(self,booking_id:str,page_size:int=50)->Optional[bytes]:
+        start_time = perf_counter()
+        booking = super().get_booking_id(booking_id,page_size)
+        self.performance.add_response_time(perf_counter()-start_time)
+        self.logger.debug("Read from DB and wrote to cache.")
+        if booking:
+            self.cache.put(booking_id,booking)
+        return booking
+
+    def get_cached_etag(self,booking_id:str)->Optional[str]:
+        return self.cache.get_etag(booking_id)
+    
+    def get_cached_variant(self,booking_id:str,variant:str)->Optional[bytes]:
+        return self.cache.get_variant(booking_id,variant)
+    
+    def put_cached_variant(self,booking_id:str,variant:str,value:bytes):
+        self.cache.put_variant(booking_id,variant,value)
+
+    def get_booking_id(self,booking_id:Optional[str]=None,page_size:int=50,after:Optional[str]=None):
         if booking_id:
-            start_time = perf_counter()
-            cached_booking = self.cache.get(booking_id)
-            self.cache.performance.add_response_time(perf_counter()-start_time)
+            cached_booking = self.get_cached_booking(booking_id)
             if cached_booking:
-                self.logger.debug("Read from cache.")
                 return cached_booking
-            start_time = perf_counter()
-            booking = super().get_booking_id(booking_id,page_size)
-            self.performance.add_response_time(perf_counter()-start_time)
-            self.logger.debug("Read from DB and wrote to cache.")
-            if booking:
-                self.cache.put(booking_id,booking)
-            return booking
+            return self.load_booking(booking_id,page_size)
         else:
             self.logger.debug("Read from DB.")
-            return super().get_booking_id(booking_id,page_size)
+            return super().get_booking_id(booking_id,page_size,after)
     
-    def insert_data_from_list(self,data:List[str]):
+    def insert_data_from_list(self,data:Iterable[Sequence[Any]],on_conflict:str='update')->Optional[int]:
         start_time = perf_counter()
-        super().insert_data_from_list(data)
-        for booking in data:
-            booking_id = booking[0]
-            self.cache.invalidate(booking_id)
-            self.cache.put(booking_id,booking)
+        invalid:List[ValueError] = []
+        written = self.insert_rows(self._validated(data,invalid),on_conflict)
         self.performance.add_request_time(perf_counter()-start_time)
+        if invalid:
+            # db_operation swallowed it after the insert was aborted (transaction rolled back) -> the caller still gets the ValidationError
+            raise invalid[0]
+        return written
+
+    @staticmethod
+    def _validated(data:Iterable[Sequence[Any]],invalid:List[ValueError])->Iterator[List[Any]]:
+        """Validates row by row while the insert pulls them -> a bulk insert never holds all rows at once."""
+        booking_manager = BookingManager([])
+        for booking in data:
+            try:
+                yield booking_manager.convert_params_to_booking(booking).get_values_as_list()
+            except ValueError as e:
+                invalid.append(e)
+                raise
+
+    def insert_rows(self,rows:Iterable[Sequence[Any]],on_conflict:str='update')->Optional[int]:
+        touched:Set[str] = set()
+        def track(rows:Iterable[Sequence[Any]])->Iterator[Sequence[Any]]:
+            for row in rows:
+                if len(touched) <= self.invalidate_limit:
+                    touched.add(str(row[0]))
+                yield row
+        written = super().insert_data_from_list(track(rows),on_conflict)
+        if not written:
+            return None
+        # cached entries of written bookings are stale -> dropped, the next read refills them with a fresh ETag
+        if len(touched) > self.invalidate_limit:
+            self.cache.clear()
+        else:
+            for booking_id in touched:
+                self.cache.invalidate(booking_id)
+        return written
+
+    def update_payment_status(self,booking_id:str,new_status:str):
+        super().update_payment_status(booking_id,new_status)
+        self.cache.invalidate(booking_id) # next read refills from the DB with a new ETag
+
+    def delete_booking(self,booking_id:str):
+        super().delete_booking(booking_id)
+        self.cache.invalidate(booking_id)
 
     def get_info(self)->Dict[str,Any]:
         return {'name':self.name,
                 'id': self._id,
                 'db_params': self.db_params,
                 'db':str(self.db),
+                'db_pool': self.db.get_pool_info(**self.db_params),
+                'prepared_statements': self.get_prepared_info(),
                 'db_table_name': self.table_name,
                 'executed_queries_history': self.executed_queries_history,
                 'store_history': self.store_history,
@@ -0,0 +1,51 @@
+from datetime import date, datetime
+from decimal import Decimal
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, Sequence
+from uuid import UUID
+
+from .booking import Booking
+
+
+def _encode_float(value:float)->str:
+    if value != value or value in (float('inf'),float('-inf')):
+        return 'null' # same as pydantic for values JSON cannot express
+    return repr(value)
+
+# exact type -> encoder; all output matches Booking.json() for the same values
+_ENCODERS:Dict[type,Callable[[Any],str]] = {str: encode_basestring, # C implementation, keeps non-ASCII like pydantic
+                                            type(None): lambda value: 'null',
+                                            bool: lambda value: 'true' if value else 'false',
+                                            int: str,
+                                            float: _encode_float,
+                                            Decimal: lambda value: _encode_float(float(value)), # NUMERIC columns, Booking.total_price is a float
+                                            date: lambda value: f'"{value.isoformat()}"',
+                                            datetime: lambda value: f'"{value.isoformat()}"',
+                                            UUID: lambda value: f'"{value}"'}
+
+
+class BookingSerializer:
+    """Turns trusted booking rows (DB tuples, already validated values) into JSON bytes without building a Booking.
+
+    Untrusted input still has to go through Booking for validation first.
+    """
+    def __init__(self,fields:Sequence[str]=tuple(Booking.model_fields)):
+        self.fields = tuple(fields)
+        # '{"booking_id":' and ',"customer_id":' ... are built once, only the values are encoded per row
+        self._prefixes = tuple(('{' if idx == 0 else ',')+encode_basestring(name)+':' for idx,name in enumerate(self.fields))
+
+    def serialize(self,row:Sequence[Any])->bytes:
+        if len(row) != len(self.fields):
+            raise ValueError(f"Expected {len(self.fields)} booking values, got {len(row)}.")
+        encoders = _ENCODERS
+        parts = [prefix+(encoders.get(type(value)) or self._fallback(value))(value) for prefix,value in zip(self._prefixes,row)]
+        parts.append('}')
+        return ''.join(parts).encode('utf-8')
+
+    @staticmethod
+    def _fallback(value:Any)->Callable[[Any],str]:
+        # subclasses (e.g. str enums) are rare -> resolved along the MRO instead of the exact-type table
+        for base in type(value).__mro__:
+            if base in _ENCODERS:
+                return _ENCODERS[base]
+        raise TypeError(f"Cannot serialize booking value of type {type(value).__name__}.")
@@ -9,9 +9,12 @@ from app.controller.httpServer import HTTPserver
 from app.controller.logger import LoggerSetup
 #from app.controller.httpClient import HttpClient
 from app.controller.parser import ParserFactory
+from app.controller.preforkServer import PreforkSupervisor, async_http_worker
+from app.controller.selectorServer import SelectorHTTPserver
 from app.model.booking import BookingAnalyzer, BookingManager
+from app.model.asyncDatabase import AsyncPostgresqlDB
 from app.model.cache import LruCache
-from app.model.database import PostgresqlDB, cachedTravelCRUD, travelCRUD
+from app.model.database import PooledPostgresqlDB, cachedTravelCRUD, travelCRUD
 
 test_booking = False
 test_getRequest = False
@@ -20,6 +23,9 @@ test_httpServer = False
 test_cache = False
 test_LoadBalancing = False
 test_TaskQueue = True
+test_Prefork = False
+test_SelectorServer = False
+use_async_db = False # asyncpg CRUD awaited on the nodes' loops instead of DB threads
 
 basicConfig(level=INFO)
 logger = getLogger('main')
@@ -63,7 +69,7 @@ def test_crud_func()->None:
     print('Crud test: Started.')
     parser_factory = ParserFactory()
     db_params=postgres_db_params
-    crud = travelCRUD(PostgresqlDB,db_params,'bookings')
+    crud = travelCRUD(PooledPostgresqlDB,db_params,'bookings')
     
     file_path = 'data/travel_bookings.csv'
     parser = parser_factory.getParser('csv')
@@ -89,22 +95,30 @@ def test_crud_func()->None:
 def test_httpServer_func()->None:
     print('HttpServer test: Started.')
     db_params=postgres_db_params
-    crud = travelCRUD(PostgresqlDB,db_params,'bookings')
+    crud = travelCRUD(PooledPostgresqlDB,db_params,'bookings')
     server = HTTPserver(crud)
     server.start()
     print('HttpServer test: Ended.')
  
+def test_SelectorServer_func()->None:
+    print('SelectorServer test: Started.')
+    cachedCrud = cachedTravelCRUD(PooledPostgresqlDB,postgres_db_params,'bookings',parent_logger=logger,cache=LruCache(20,30))
+    server = SelectorHTTPserver(cachedCrud,worker_threads=4)
+    signal.signal(signal.SIGINT,lambda signum,frame: server.stop())
+    server.start()
+    print('SelectorServer test: Done.')
+
 def test_cache_func()->None:
     print('Cache test: Started.')
     db_params=postgres_db_params
-    cachedCrud = cachedTravelCRUD(PostgresqlDB,db_params,'bookings',False,LruCache(20,30))
+    cachedCrud = cachedTravelCRUD(PooledPostgresqlDB,db_params,'bookings',parent_logger=logger,cache=LruCache(20,30))
     server = HTTPserver(cachedCrud)
     server.start()
     print('Cache test: Done.')
 
 def test_LoadBalancing_func()->None:
     print('LoadBalancing test: Started.')
-    db = PostgresqlDB
+    db = PooledPostgresqlDB
     db_params = postgres_db_params
     table_name = 'bookings'
     #cache = LruCache(20,30)
@@ -128,7 +142,7 @@ def test_LoadBalancing_func()->None:
 async def test_TaskQueue_func()->None:
     logger_setup = LoggerSetup("app/controller/logging_config.json")
     print('TaskQueue test: Started.')
-    db = PostgresqlDB
+    db = AsyncPostgresqlDB if use_async_db else PooledPostgresqlDB
     db_params = postgres_db_params
     table_name = 'bookings'
     host="localhost"
@@ -152,6 +166,16 @@ async def test_TaskQueue_func()->None:
     print(dbs.get_status())
     print('TaskQueue test: Done.')
 
+def test_Prefork_func()->None:
+    print('Prefork test: Started.')
+    logger_setup = LoggerSetup("app/controller/logging_config.json")
+    crud_factory = lambda worker_logger: cachedTravelCRUD(PooledPostgresqlDB,postgres_db_params,'bookings',parent_logger=worker_logger)
+    # every worker binds port 8181 itself (SO_REUSEPORT) -> no proxy hop, the kernel balances the connections
+    worker = async_http_worker(crud_factory,"localhost",8181,logger,logger_setup=logger_setup)
+    supervisor = PreforkSupervisor(worker,nworkers=0,parent_logger=logger)
+    supervisor.run()
+    print('Prefork test: Done.')
+
 if __name__ == '__main__':
     print("こんにちは！元気ですか?")
     # do something
@@ -163,5 +187,7 @@ if __name__ == '__main__':
     if test_cache:          test_cache_func()
     if test_LoadBalancing:  test_LoadBalancing_func()
     if test_TaskQueue:      asyncio.run(test_TaskQueue_func())
+    if test_Prefork:        test_Prefork_func()
+    if test_SelectorServer: test_SelectorServer_func()
 
     print("'Elegance is the elimination of excess.' – Bruce Lee")
@@ -0,0 +1,38 @@
+"""Compares JsonParser with json.loads on booking payloads (run from the repository root: python test/benchmarkJsonParser.py)."""
+import json
+import random
+from timeit import repeat
+from uuid import uuid4
+
+from app.controller.parser import JsonParser
+
+destinations = ['Paris (France)', 'Tokyo (Japan)', 'New York (USA)', 'Berlin (Germany)', 'Sydney (Australia)']
+payment_statuses = ['Paid', 'Pending', 'Cancelled']
+
+
+def make_booking()->dict:
+    return {'booking_id': str(uuid4()),
+            'customer_id': str(uuid4()),
+            'customer_name': 'Jane "JD" Doe',
+            'email': 'jane.doe@example.com',
+            'booking_date': '2024-09-13',
+            'destination': random.choice(destinations),
+            'flight_number': f"LH{random.randint(100,999)}",
+            'total_price': round(random.uniform(500,5000),2),
+            'payment_status': random.choice(payment_statuses),
+            'special_requests': None,
+            'loyalty_program_number': f"LP{random.randint(10000,99999)}"}
+
+def benchmark(name:str,source:str,number:int):
+    parser = JsonParser()
+    assert parser.parse_one(source) == json.loads(source), f"{name}: results differ"
+    own = min(repeat(lambda: parser.parse_one(source),number=number,repeat=5))/number
+    stdlib = min(repeat(lambda: json.loads(source),number=number,repeat=5))/number
+    print(f"{name:<24} {len(source):>9} chars  JsonParser {own*1e6:>10.1f} us  json.loads {stdlib*1e6:>8.1f} us  ratio {own/stdlib:>5.1f}x")
+
+
+if __name__ == '__main__':
+    random.seed(42)
+    benchmark('single booking',json.dumps(make_booking()),2000)
+    benchmark('POST of 100 bookings',json.dumps([make_booking() for _ in range(100)]),50)
+    benchmark('1000 bookings, indented',json.dumps([make_booking() for _ in range(1000)],indent=2),5)
@@ -0,0 +1,33 @@
+from typing import Any, Dict, Optional
+
+from app.controller.monitoring import CacheParams
+from app.model.cache import Cache, make_etag
+
+
+class MockCache(Cache):
+    """In-memory cache without MQTT, shared by the CRUD tests."""
+    def __init__(self,capacity:int=20,age_limit:int=30):
+        self.entries:Dict[str,Any] = {}
+        self.is_running = False
+        self.performance = CacheParams('MockCache','mock',10)
+    
+    def get(self,key:str) -> Optional[str]:
+        return self.entries.get(key)
+    
+    def put(self,key:str,value:str):
+        self.entries[key] = value
+    
+    def get_etag(self,key:str) -> Optional[str]:
+        return make_etag(self.entries[key]) if key in self.entries else None
+    
+    def get_variant(self,key:str,variant:str) -> Optional[bytes]:
+        return None
+    
+    def put_variant(self,key:str,variant:str,value:bytes):
+        pass
+    
+    def invalidate(self,key:str):
+        self.entries.pop(key,None)
+    
+    def clear(self):
+        self.entries.clear()
@@ -0,0 +1,53 @@
+from datetime import date
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.model.analytics import ColumnarBookingAnalyzer
+from app.model.booking import BookingAnalyzer, BookingRecord
+
+
+def record(idx:int,destination:str,city:str,price:float,booking_date:date)->BookingRecord:
+    return BookingRecord(f'b{idx}',f'c{idx}','Jane Doe','jane@example.com','555',booking_date,booking_date,None,destination,city,
+                         'AB123','Plaza Hotel','Penthouse',price,'Paid','PayPal',None,None,None)
+
+BOOKINGS = [record(0,'Paris (France)','London (UK)',100.0,date(2024,1,1)),
+            record(1,'Tokyo (Japan)','London (UK)',300.0,date(2024,1,15)),
+            record(2,'Paris (France)','Dubai (UAE)',200.0,date(2024,2,1)),
+            record(3,'Paris (France)','London (UK)',400.0,date(2024,3,1))]
+
+
+class TestColumnarBookingAnalyzer(TestCase):
+    def initialize(self):
+        self.analyzer = ColumnarBookingAnalyzer.from_bookings(BOOKINGS)
+
+    def test_group_by(self):
+        Asserter.assert_equal(self.analyzer.group_by('destination'),[('Paris (France)',3),('Tokyo (Japan)',1)])
+        Asserter.assert_equal(self.analyzer.group_by('destination','sum'),[('Paris (France)',700.0),('Tokyo (Japan)',300.0)])
+        Asserter.assert_equal(self.analyzer.group_by('departure_city','mean'),[('London (UK)',800.0/3),('Dubai (UAE)',200.0)])
+        Asserter.assert_equal(self.analyzer.group_by('hotel_name'),[('Plaza Hotel',4)])
+
+    def test_top_k(self):
+        Asserter.assert_equal(self.analyzer.top_k('departure_city',1),[('London (UK)',3)])
+        Asserter.assert_equal(self.analyzer.most_frequent_destination(),'Paris (France)')
+
+    def test_between(self):
+        january = self.analyzer.between('2024-01-01','2024-01-31')
+        Asserter.assert_equal(len(january),2)
+        Asserter.assert_equal(january.average_booking_price(),200.0)
+        Asserter.assert_equal(len(self.analyzer.between(start=date(2024,2,1))),2)
+
+    def test_percentiles(self):
+        Asserter.assert_equal(self.analyzer.percentiles((0,50,100)),{0: 100.0,50: 250.0,100: 400.0})
+
+    def test_matches_python_analyzer(self):
+        Asserter.assert_equal(self.analyzer.bookings_per_departure_city(),BookingAnalyzer().bookings_per_departure_city(BOOKINGS))
+        Asserter.assert_equal(self.analyzer.average_booking_price(),BookingAnalyzer().average_booking_price(BOOKINGS))
+        Asserter.assert_equal(self.analyzer.most_frequent_destination(),BookingAnalyzer().most_frequent_destination(BOOKINGS))
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestColumnarBookingAnalyzer) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestColumnarBookingAnalyzer(method))
+    test_suite.do_tests()
@@ -0,0 +1,109 @@
+import asyncio
+from datetime import date
+from logging import getLogger
+from typing import Any, List, Optional, Tuple
+
+from mockCache import MockCache
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.model.asyncDatabase import AsyncPostgresqlDB, asyncCachedTravelCRUD
+
+ROW = ['fb6b3247-7a34-48d3-8611-99dd0eb600b1','625cd3c9-0116-452f-816c-91aa6e236110','John Doe','john@example.com','1234567890',
+       '2023-01-01','2023-02-01',None,'Paris','New York','FL123','Hotel Paris','Double',1000.0,'Paid','Credit Card','Best Travel',None,'LP12345']
+
+
+class MockTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self,exc_type,exc_val,exc_tb):
+        return False
+
+class MockAsyncConnection:
+    def __init__(self):
+        self.executed_queries:List[Tuple[str,Any]] = []
+        self.fetch_results:List[Any] = []
+
+    def transaction(self)->MockTransaction:
+        return MockTransaction()
+
+    async def execute(self,query:str,*args:Any):
+        self.executed_queries.append((query,args))
+
+    async def executemany(self,query:str,rows:List[Any]):
+        self.executed_queries.append((query,rows))
+
+    async def fetchrow(self,query:str,*args:Any)->Optional[Any]:
+        self.executed_queries.append((query,args))
+        return self.fetch_results[0] if self.fetch_results else None
+
+class MockPool:
+    def __init__(self):
+        self.conn = MockAsyncConnection()
+
+    def acquire(self)->'MockPool':
+        return self
+
+    async def __aenter__(self)->MockAsyncConnection:
+        return self.conn
+
+    async def __aexit__(self,exc_type,exc_val,exc_tb):
+        return False
+
+class MockAsyncPostgresqlDB(AsyncPostgresqlDB):
+    def __init__(self,parent_logger,**kwargs):
+        self.pool = MockPool()
+
+    async def get_pool(self)->MockPool:
+        return self.pool
+
+class TestAsyncCachedTravelCrud(TestCase):
+    def initialize(self):
+        self.crud = asyncCachedTravelCRUD(MockAsyncPostgresqlDB,{},'test_bookings',getLogger('test'),cache=MockCache())
+        self.conn = self.crud.db.pool.conn
+
+    def test_insert_binds_typed_values(self):
+        asyncio.run(self.crud.insert_data_from_list([ROW]))
+        query,rows = self.conn.executed_queries[-1]
+        Asserter.assert_true("INSERT INTO test_bookings" in query and "$19" in query,"INSERT query with asyncpg placeholders not executed.")
+        Asserter.assert_equal(rows[0][5],date(2023,1,1),"Date strings not converted for asyncpg")
+
+    def test_insert_is_upsert(self):
+        self.crud.cache.put(ROW[0],b'stale')
+        asyncio.run(self.crud.insert_data_from_list([ROW]))
+        query,_ = self.conn.executed_queries[-1]
+        Asserter.assert_true("ON CONFLICT (booking_id) DO UPDATE SET customer_id = EXCLUDED.customer_id" in query,"INSERT is no upsert.")
+        Asserter.assert_true(self.crud.get_cached_booking(ROW[0]) is None,"Stale entry of an upserted booking kept")
+        asyncio.run(self.crud.insert_data_from_list([ROW],on_conflict='ignore'))
+        Asserter.assert_true("ON CONFLICT (booking_id) DO NOTHING" in self.conn.executed_queries[-1][0])
+
+    def test_failed_insert_caches_nothing(self):
+        async def fail(query:str,rows:List[Any]):
+            raise RuntimeError("connection lost")
+        self.conn.executemany = fail
+        Asserter.assert_true(asyncio.run(self.crud.insert_data_from_list([ROW])) is None,"Failed insert reported as written")
+        Asserter.assert_true(self.crud.get_cached_booking(ROW[0]) is None,"Row of a failed insert cached")
+
+    def test_get_booking_id_uses_cache(self):
+        self.conn.fetch_results = [self.crud.to_db_row(ROW)]
+        booking = asyncio.run(self.crud.get_booking_id(ROW[0]))
+        Asserter.assert_true(booking.startswith(b'{"booking_id":"fb6b3247'),"Booking not serialized from the DB row")
+        calls = len(self.conn.executed_queries)
+        Asserter.assert_equal(asyncio.run(self.crud.get_booking_id(ROW[0])),booking)
+        Asserter.assert_equal(len(self.conn.executed_queries),calls,"Cached booking read from the DB again")
+
+    def test_update_invalidates_cache(self):
+        asyncio.run(self.crud.insert_data_from_list([ROW]))
+        asyncio.run(self.crud.update_payment_status(ROW[0],'Refunded'))
+        query,params = self.conn.executed_queries[-1]
+        Asserter.assert_true("SET payment_status = $1" in query,"UPDATE query not executed.")
+        Asserter.assert_equal(params,('Refunded',ROW[0]))
+        Asserter.assert_true(self.crud.get_cached_booking(ROW[0]) is None,"Updated booking still cached")
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestAsyncCachedTravelCrud) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestAsyncCachedTravelCrud(method))
+    test_suite.do_tests()
@@ -0,0 +1,162 @@
+import asyncio
+import json
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.asyncDistributedSystem import (
+    asyncDistributedBookingSystem, asyncLoadBalancer, asyncRoundRobinBalancer)
+from app.controller.httpRequest import HttpRequestReader
+from app.controller.httpResponse import HttpResponse, connection_header
+from app.controller.logger import LoggerSetup, RequestContext
+
+
+class QuietLoggerSetup(LoggerSetup):
+    def setup_logging(self):
+        pass
+
+class MockNode:
+    """Answers every request with the number of body bytes it read (status and headers are configurable)."""
+    def __init__(self,status_code:int=200,headers:Optional[Dict[str,str]]=None):
+        self.host = '127.0.0.1'
+        self.port = 0
+        self._id = str(uuid4())
+        self.status_code = status_code
+        self.headers = headers
+        self.received:List[int] = []
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle,self.host,0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self,reader:asyncio.StreamReader,writer:asyncio.StreamWriter):
+        request_reader = HttpRequestReader(reader)
+        while (request := await request_reader.read_head()) is not None:
+            size = 0
+            async for chunk in request_reader.stream_body(request,1 << 30):
+                size += len(chunk)
+            self.received.append(size)
+            HttpResponse(self.status_code,json.dumps({'received': size}),self.headers,connection=connection_header(True)).write_to(writer)
+            await writer.drain()
+        writer.close()
+
+    def get_info(self)->Dict[str,Any]:
+        return {'name': 'mock-node'}
+
+class MockBalancer(asyncLoadBalancer):
+    def __init__(self,node:MockNode):
+        self.node = node
+
+    def get_next_node(self,context:RequestContext)->MockNode:
+        return self.node
+
+    def update_nodes_list(self,new_nodes:List[MockNode]):
+        pass
+
+    def mark_overloaded(self,node:MockNode,retry_after:float):
+        pass
+
+    async def do_health_checks(self)->List[MockNode]:
+        return []
+
+    async def get_health_reports(self)->Dict[str,Dict[str,Any]]:
+        return {}
+
+class TestLoadBalancerRelay(TestCase):
+    def initialize(self):
+        self.node = MockNode()
+        self.nodes = [self.node]
+        self.system = asyncDistributedBookingSystem('127.0.0.1',0,None,{},'bookings',(1,1),(1,1),QuietLoggerSetup(''),'ERROR',('localhost',1883))
+        self.system._load_balancer = MockBalancer(self.node)
+
+    async def roundtrip(self,head:bytes,body:bytes=b'',node_running:bool=True)->Tuple[int,bytes]:
+        for node in self.nodes:
+            await node.start()
+            if not node_running:
+                await node.stop() # port stays known, nothing listens on it
+        server = await asyncio.start_server(self.system.handle_connection,'127.0.0.1',0)
+        try:
+            reader,writer = await asyncio.open_connection('127.0.0.1',server.sockets[0].getsockname()[1])
+            writer.write(head)
+            for idx in range(0,len(body),65536):
+                writer.write(body[idx:idx+65536])
+                await writer.drain()
+            response = await asyncio.wait_for(reader.read(),10)
+            writer.close()
+        finally:
+            server.close()
+            await self.system._node_connections.close()
+            if node_running:
+                for node in self.nodes:
+                    await node.stop()
+        status = int(response.split(b' ',2)[1]) if response else 0
+        return status,response.partition(b'\r\n\r\n')[2]
+
+    def post(self,body_size:int)->bytes:
+        return f"POST /bookings:bulk HTTP/1.1\r\nHost: lb\r\nContent-Length: {body_size}\r\nConnection: close\r\n\r\n".encode()
+
+    def test_large_body_is_streamed(self):
+        size = 3*self.system.config.max_body_size
+        status,body = asyncio.run(self.roundtrip(self.post(size),b'x'*size))
+        Asserter.assert_equal(status,200)
+        Asserter.assert_equal(json.loads(body),{'received': size})
+
+    def test_small_body(self):
+        status,body = asyncio.run(self.roundtrip(self.post(5),b'hello'))
+        Asserter.assert_equal(status,200)
+        Asserter.assert_equal(self.node.received,[5])
+
+    def test_header_too_large(self):
+        head = b"GET /booking HTTP/1.1\r\nX-Filler: "+b'a'*self.system.config.max_header_size+b"\r\n\r\n"
+        status,_ = asyncio.run(self.roundtrip(head))
+        Asserter.assert_equal(status,431)
+
+    def test_malformed_request(self):
+        status,_ = asyncio.run(self.roundtrip(b"GARBAGE\r\n\r\n"))
+        Asserter.assert_equal(status,400)
+
+    def test_body_over_stream_limit(self):
+        status,_ = asyncio.run(self.roundtrip(self.post(self.system.config.max_stream_body_size+1)))
+        Asserter.assert_equal(status,413)
+        Asserter.assert_equal(self.node.received,[],"Rejected body reached the node")
+
+    def test_node_unavailable(self):
+        status,_ = asyncio.run(self.roundtrip(b"GET /booking HTTP/1.1\r\nConnection: close\r\n\r\n",node_running=False))
+        Asserter.assert_equal(status,502)
+
+    def test_overloaded_node_is_skipped(self):
+        busy = MockNode(503,{'Retry-After': '30'})
+        self.nodes = [busy,self.node]
+        self.system._nodes = self.nodes # one attempt per node
+        balancer = asyncRoundRobinBalancer(self.nodes,getLogger('test'))
+        self.system._load_balancer = balancer
+        request = b"GET /booking HTTP/1.1\r\nConnection: close\r\n\r\n"
+        # 503 from the first node -> marked for its Retry-After, the request goes on to the next node
+        status,_ = asyncio.run(self.roundtrip(request))
+        Asserter.assert_equal(status,200)
+        Asserter.assert_equal((len(busy.received),len(self.node.received)),(1,1))
+        Asserter.assert_equal(balancer.get_info()['overloaded_nodes'],[busy._id])
+        # while marked, the round robin passes the node by
+        status,_ = asyncio.run(self.roundtrip(request))
+        Asserter.assert_equal(status,200)
+        Asserter.assert_equal((len(busy.received),len(self.node.received)),(1,2))
+
+    def test_all_nodes_overloaded(self):
+        self.node.status_code,self.node.headers = 503,{'Retry-After': '1'}
+        status,_ = asyncio.run(self.roundtrip(b"GET /booking HTTP/1.1\r\nConnection: close\r\n\r\n"))
+        Asserter.assert_equal(status,503) # last node's answer is relayed
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestLoadBalancerRelay) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestLoadBalancerRelay(method))
+    test_suite.do_tests()
@@ -0,0 +1,345 @@
+import asyncio
+import json
+from logging import getLogger
+from time import sleep
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.asyncHttpServer import (AsyncHttpServer,
+                                            BulkImportHandler,
+                                            GetBookingHandler,
+                                            PostRequestHandler, ServerConfig)
+from app.controller.compression import ResponseCompressor
+from app.controller.dbExecutor import DatabaseExecutor
+from app.controller.httpRequest import (HttpRequestError, HttpResponseHead,
+                                        parse_response_head)
+from app.controller.taskQueue import TaskQueue
+from app.model.database import travelCRUD
+
+BOOKING_ID = 'fb6b3247-7a34-48d3-8611-99dd0eb600b1'
+
+
+def booking(booking_id:Optional[str]=None)->Dict[str,Any]:
+    return {'booking_id': booking_id or str(uuid4()),'customer_id': str(uuid4()),'customer_name': 'John Doe','email': 'john@example.com',
+            'phone': '1234567890','booking_date': '2023-01-01','travel_date': '2023-02-01','return_date': None,'destination': 'Paris',
+            'departure_city': 'New York','flight_number': 'FL123','hotel_name': 'Hotel Paris','room_type': 'Double','total_price': 1000.0,
+            'payment_status': 'Paid','payment_method': 'Credit Card','travel_agency': 'Best Travel','special_requests': None,'loyalty_program_number': 'LP12345'}
+
+class MockCrud:
+    """Records the batches handed to insert_rows; batches listed in fail_batches fail like a DB error (None)."""
+    columns = travelCRUD.columns
+
+    def __init__(self,fail_batches:Optional[List[int]]=None):
+        self.batches:List[List[List[Any]]] = []
+        self.fail_batches = fail_batches if fail_batches else []
+
+    def insert_rows(self,rows:List[List[Any]])->Optional[int]:
+        self.batches.append(rows)
+        return None if len(self.batches)-1 in self.fail_batches else len(rows)
+
+    def insert_data_from_list(self,data:List[List[Any]]):
+        raise AssertionError("Validated rows sent through insert_data_from_list.")
+
+    def row_from_mapping(self,booking:Dict[str,Any])->List[Any]:
+        return [booking.get(column) for column in self.columns]
+
+async def body_stream(body:bytes,chunk_size:int)->AsyncIterator[bytes]:
+    for idx in range(0,len(body),chunk_size):
+        yield body[idx:idx+chunk_size]
+
+class TestBulkImportHandler(TestCase):
+    def initialize(self):
+        self.executor = DatabaseExecutor(getLogger('test'),2,4)
+
+    def finalize(self):
+        self.executor.shutdown(wait=True)
+
+    def run_import(self,crud:MockCrud,lines:List[bytes],chunk_size:int=7,**kwargs:Any)->Dict[str,Any]:
+        handler = BulkImportHandler(crud,self.executor,**kwargs)
+        result = asyncio.run(handler.handle_request({'body_stream': body_stream(b'\n'.join(lines),chunk_size)}))
+        return json.loads(result.body)
+
+    def test_batches(self):
+        crud = MockCrud()
+        summary = self.run_import(crud,[json.dumps(booking()).encode() for _ in range(7)],insert_batch_size=3)
+        Asserter.assert_equal([len(batch) for batch in crud.batches],[3,3,1])
+        Asserter.assert_equal(summary['inserted'],7)
+        Asserter.assert_equal(crud.batches[0][0][5].isoformat(),'2023-01-01',"Rows are not the validated Booking values")
+
+    def test_malformed_lines(self):
+        invalid = booking()
+        invalid['booking_date'] = 'not a date'
+        lines = [json.dumps(booking()).encode(),b'{"booking_id": ',b'',json.dumps(invalid).encode(),json.dumps(booking()).encode()]
+        summary = self.run_import(MockCrud(),lines)
+        Asserter.assert_equal((summary['received'],summary['inserted'],summary['failed']),(4,2,2))
+        Asserter.assert_equal([error['line'] for error in summary['errors']],[2,4])
+        Asserter.assert_true('booking_date' in summary['errors'][1]['error'],"Validation error does not name the field")
+
+    def test_failed_batch_is_reported(self):
+        crud = MockCrud(fail_batches=[1])
+        summary = self.run_import(crud,[json.dumps(booking()).encode() for _ in range(5)],insert_batch_size=2)
+        Asserter.assert_equal((summary['received'],summary['inserted'],summary['failed']),(5,3,2))
+        Asserter.assert_equal(summary['failed_batches'],[{'first_line': 3,'last_line': 4,'bookings': 2}])
+
+    def test_line_cap(self):
+        oversized = json.dumps(booking()).encode()
+        # a long line inside a single chunk is caught as well as one spread over chunks
+        for chunk_size in (65536,7):
+            Asserter.assert_raises(HttpRequestError,self.run_import,MockCrud(),[oversized,b'{}'],chunk_size,max_line_size=100)
+
+
+class MockPostCrud(MockCrud):
+    """insert_data_from_list validates like the real CRUD: a row without booking_date raises a ValueError."""
+    def insert_data_from_list(self,data:List[List[Any]]):
+        if any(row[self.columns.index('booking_date')] is None for row in data):
+            raise ValueError("booking_date is missing")
+        self.batches.append(data)
+
+class TestPostRequestHandler(TestCase):
+    def initialize(self):
+        self.executor = DatabaseExecutor(getLogger('test'),2,4)
+
+    def finalize(self):
+        self.executor.shutdown(wait=True)
+
+    def post(self,crud:MockPostCrud,bookings:List[Dict[str,Any]],chunk_size:int=7)->str:
+        handler = PostRequestHandler(crud,self.executor,insert_batch_size=2)
+        return asyncio.run(handler.handle_request({'body_stream': body_stream(json.dumps(bookings).encode(),chunk_size)}))
+
+    def test_rows_in_column_order(self):
+        crud = MockPostCrud()
+        shuffled = dict(reversed(list(booking().items())))
+        Asserter.assert_equal(self.post(crud,[booking(),shuffled,booking()]),"Booking created successfully")
+        Asserter.assert_equal([len(batch) for batch in crud.batches],[2,1])
+        Asserter.assert_equal(crud.batches[0][1],[shuffled[column] for column in crud.columns])
+
+    def test_invalid_last_batch_is_bad_request(self):
+        invalid = booking()
+        del invalid['booking_date']
+        crud = MockPostCrud()
+        # the remainder after the last full batch is flushed inside the error mapping as well
+        try:
+            self.post(crud,[booking(),booking(),invalid])
+            raise AssertionError("Invalid booking in the last batch accepted")
+        except HttpRequestError as e:
+            Asserter.assert_equal(e.status_code,400)
+        Asserter.assert_equal([len(batch) for batch in crud.batches],[2])
+
+
+class MockBookingCrud:
+    """Read path of a CRUD without cache: bookings live in a dict, load_booking takes delay seconds."""
+    def __init__(self,delay:float=0.0):
+        self.bookings:Dict[str,bytes] = {BOOKING_ID: f'{{"booking_id":"{BOOKING_ID}"}}'.encode()}
+        self.delay = delay
+
+    def start(self):
+        pass
+
+    def get_cached_booking(self,booking_id:str)->Optional[bytes]:
+        return None
+
+    def get_cached_etag(self,booking_id:str)->Optional[str]:
+        return None
+
+    def load_booking(self,booking_id:str)->Optional[bytes]:
+        sleep(self.delay)
+        return self.bookings.get(booking_id)
+
+    def get_cached_variant(self,booking_id:str,variant:str)->Optional[bytes]:
+        return None
+
+    def put_cached_variant(self,booking_id:str,variant:str,value:bytes):
+        pass
+
+def get_request(booking_id:str=BOOKING_ID,headers:str='')->bytes:
+    return f"GET /booking/{booking_id} HTTP/1.1\r\nConnection: close\r\n{headers}\r\n".encode()
+
+class AsyncServerTestCase(TestCase):
+    """Runs AsyncHttpServer.handle_request on an ephemeral port with its own ServerConfig (no MQTT, no crud.start)."""
+    config_key = ('127.0.0.1',18181)
+
+    def initialize(self):
+        ServerConfig._instance.pop(self.config_key,None) # fresh limits for every test
+        self.config = ServerConfig(*self.config_key)
+        self.crud = MockBookingCrud()
+        self.task_queue = TaskQueue(getLogger('test'),nworkers=1,qsize=2)
+        self.server = AsyncHttpServer(self.crud,self.task_queue,*self.config_key,getLogger('test'))
+        self.port = 0
+
+    def finalize(self):
+        self.server.executor.shutdown(wait=True)
+        ServerConfig._instance.pop(self.config_key,None)
+
+    async def listen(self)->asyncio.AbstractServer:
+        self.server.is_running = True
+        listener = await asyncio.start_server(self.server.handle_request,'127.0.0.1',0)
+        self.port = listener.sockets[0].getsockname()[1]
+        return listener
+
+    async def fetch(self,raw:bytes)->Tuple[HttpResponseHead,bytes]:
+        reader,writer = await asyncio.open_connection('127.0.0.1',self.port)
+        writer.write(raw)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(),10)
+        writer.close()
+        head,_,body = response.partition(b'\r\n\r\n')
+        return parse_response_head(head+b'\r\n\r\n'),body
+
+class TestLoadShedding(AsyncServerTestCase):
+    def test_overloaded_server_answers_503(self):
+        self.config.max_inflight_requests = 1
+        self.crud.delay = 0.5
+        async def scenario():
+            async with await self.listen():
+                slow = asyncio.create_task(self.fetch(get_request()))
+                await asyncio.sleep(0.2) # first request is in flight now
+                shed = await self.fetch(get_request())
+                return await slow,shed
+        (slow_head,_),(shed_head,_) = asyncio.run(scenario())
+        Asserter.assert_equal(slow_head.status_code,200)
+        Asserter.assert_equal(shed_head.status_code,503)
+        Asserter.assert_equal(shed_head.headers.get('retry-after'),str(self.config.retry_after))
+        Asserter.assert_equal(self.server._performance.shed_requests,1)
+
+    def test_confirmations_do_not_shed(self):
+        # the confirmation queue fills up after a few requests, the server must keep answering
+        async def scenario():
+            await self.task_queue.start()
+            async with await self.listen():
+                statuses = [(await self.fetch(get_request()))[0].status_code for _ in range(12)]
+            await asyncio.wait_for(self.task_queue.stop(),10)
+            return statuses
+        Asserter.assert_equal(asyncio.run(scenario()),[200]*12)
+
+    def test_db_queue_depth_sheds(self):
+        self.config.max_queue_depth = 0 # any queued DB call counts as overload
+        async def scenario():
+            async with await self.listen():
+                return (await self.fetch(get_request()))[0].status_code
+        Asserter.assert_equal(asyncio.run(scenario()),503)
+
+class TestConditionalGet(TestCase):
+    def initialize(self):
+        self.executor = DatabaseExecutor(getLogger('test'),2,4)
+        self.crud = MockBookingCrud()
+        self.crud.bookings[BOOKING_ID] = json.dumps(booking(BOOKING_ID)).encode()
+        self.handler = GetBookingHandler(self.crud,self.executor,ResponseCompressor(min_size=64))
+
+    def finalize(self):
+        self.executor.shutdown(wait=True)
+
+    def get(self,headers:Optional[Dict[str,str]]=None,encoding:Optional[str]=None)->Any:
+        request = {'params': {'booking_id': BOOKING_ID},'headers': headers if headers else {},'encoding': encoding}
+        return asyncio.run(self.handler.handle_request(request))
+
+    def test_current_etag_answers_304(self):
+        etag = self.get().headers['ETag']
+        result = self.get({'if-none-match': etag})
+        Asserter.assert_equal((result.status_code,result.body),(304,b''))
+        Asserter.assert_equal(result.headers['ETag'],etag)
+
+    def test_other_etag_gets_body(self):
+        result = self.get({'if-none-match': '"0123"'})
+        Asserter.assert_equal((result.status_code,result.body),(200,self.crud.bookings[BOOKING_ID]))
+
+    def test_weak_and_list_forms(self):
+        etag = self.get().headers['ETag']
+        for if_none_match in (f'W/{etag}',f'"0123", {etag}',f'"0123",W/{etag}','*'):
+            Asserter.assert_equal(self.get({'if-none-match': if_none_match}).status_code,304,f"{if_none_match=}")
+        Asserter.assert_true(not GetBookingHandler.etag_matches('"0123", W/"4567"',etag),"Other ETags matched.")
+
+    def test_compressed_representation(self):
+        plain = self.get().headers['ETag']
+        result = self.get({'if-none-match': plain},'gzip')
+        # the gzip body is another representation -> the plain ETag must not validate it
+        Asserter.assert_equal(result.status_code,200)
+        Asserter.assert_equal(result.headers['ETag'],ResponseCompressor.representation_etag(plain,'gzip'))
+        Asserter.assert_equal(self.get({'if-none-match': result.headers['ETag']},'gzip').status_code,304)
+
+class StalledWriter:
+    """StreamWriter of a client that stopped reading: drain() never completes."""
+    def __init__(self):
+        self.written:List[bytes] = []
+        self.aborted = False
+        self.transport = self
+
+    def get_extra_info(self,name:str)->Any:
+        return ('127.0.0.1',4711)
+
+    def write(self,data:bytes):
+        self.written.append(data)
+
+    def writelines(self,data:List[bytes]):
+        self.written.extend(data)
+
+    async def drain(self):
+        await asyncio.Event().wait()
+
+    def abort(self):
+        self.aborted = True
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+class TestDeadlines(AsyncServerTestCase):
+    def initialize(self):
+        super().initialize()
+        self.config.header_timeout = 0.3
+        self.config.body_timeout = 0.3
+        self.config.handler_timeout = 0.3
+        self.config.write_timeout = 0.3
+
+    def fetch_status(self,raw:bytes)->Tuple[int,bytes]:
+        async def scenario():
+            async with await self.listen():
+                return await self.fetch(raw)
+        head,body = asyncio.run(scenario())
+        return head.status_code,body
+
+    def test_stalled_header(self):
+        status,body = self.fetch_status(f"GET /booking/{BOOKING_ID} HTTP/1.1\r\nHost: ".encode())
+        Asserter.assert_equal((status,body),(408,b"header deadline expired."))
+        Asserter.assert_equal(self.server._performance.expired['header'],1)
+
+    def test_stalled_body(self):
+        status,body = self.fetch_status(get_request(headers='Content-Length: 10\r\n')+b'{"a"')
+        Asserter.assert_equal((status,body),(408,b"body deadline expired."))
+        Asserter.assert_equal(self.server._performance.expired['body'],1)
+
+    def test_stalled_streamed_body(self):
+        # read by the handler itself -> the per-read deadline surfaces as its 408
+        status,_ = self.fetch_status(b"POST /booking HTTP/1.1\r\nContent-Length: 100\r\n\r\n[{\"booking_id\"")
+        Asserter.assert_equal(status,408)
+        Asserter.assert_equal(self.server._performance.expired['body'],1)
+
+    def test_slow_handler(self):
+        self.crud.delay = 0.6
+        status,body = self.fetch_status(get_request())
+        Asserter.assert_equal((status,body),(504,b"handler deadline expired."))
+        Asserter.assert_equal(self.server._performance.expired['handler'],1)
+
+    def test_stalled_writer_is_aborted(self):
+        writer = StalledWriter()
+        async def scenario():
+            reader = asyncio.StreamReader()
+            reader.feed_data(get_request())
+            reader.feed_eof()
+            self.server.is_running = True
+            await asyncio.wait_for(self.server.handle_request(reader,writer),5)
+        asyncio.run(scenario())
+        Asserter.assert_true(writer.aborted,"Connection of a client that does not read kept open.")
+        Asserter.assert_true(writer.written[0].startswith(b"HTTP/1.1 200"))
+        Asserter.assert_equal(self.server._performance.expired,{'header':0,'body':0,'handler':0,'write':1})
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    for test_class in (TestBulkImportHandler,TestPostRequestHandler,TestConditionalGet,TestLoadShedding,TestDeadlines):
+        for method in [method for method in dir(test_class) if method.startswith('test_')]:
+            test_suite.add_test(test_class(method))
+    test_suite.do_tests()
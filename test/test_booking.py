@@ -0,0 +1,47 @@
+import sys
+from datetime import date
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.model.booking import (Booking, BookingAnalyzer, BookingManager,
+                               BookingRecord)
+
+ROW = ('fb6b3247-7a34-48d3-8611-99dd0eb600b1','625cd3c9-0116-452f-816c-91aa6e236110','Jane Doe','jane@example.com','555-0100',
+       date(2024,1,5),date(2024,2,1),None,'Paris (France)','London (UK)','AB123','Plaza Hotel','Penthouse',800.0,
+       'Paid','PayPal',None,'Late check-out',None)
+
+
+class TestBookingRecord(TestCase):
+    def test_fields_match_booking(self):
+        Asserter.assert_equal(list(BookingRecord._fields),list(Booking.model_fields))
+
+    def test_row_round_trip(self):
+        record = BookingRecord.from_row(ROW)
+        Asserter.assert_equal(record.to_row(),ROW)
+        Asserter.assert_equal(record.destination,'Paris (France)')
+
+    def test_booking_conversion(self):
+        booking = BookingManager().convert_params_to_booking(ROW)
+        Asserter.assert_equal(booking.to_record(),BookingRecord.from_row(ROW))
+        Asserter.assert_equal(BookingRecord.from_row(ROW).to_booking(),booking)
+
+    def test_compact(self):
+        Asserter.assert_false(hasattr(BookingRecord.from_row(ROW),'__dict__'))
+        Asserter.assert_true(sys.getsizeof(BookingRecord.from_row(ROW)) < 256)
+
+    def test_manager_with_records(self):
+        manager = BookingManager()
+        manager.add_records([ROW,ROW])
+        keys,values = manager.all_bookings_to_list()
+        Asserter.assert_equal(keys,list(Booking.model_fields))
+        Asserter.assert_equal(values[1],list(ROW))
+        Asserter.assert_equal(BookingAnalyzer().bookings_per_departure_city(manager.get_all_bookings()),[('London (UK)',2)])
+        Asserter.assert_equal(len(BookingManager().get_all_bookings()),0,"Managers must not share a default list")
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestBookingRecord) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestBookingRecord(method))
+    test_suite.do_tests()
@@ -0,0 +1,65 @@
+import csv
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.model.columnar import COLUMN_KINDS, ColumnarBookingLoader
+
+ROWS = [['b1','c1','Jane Doe','jane@example.com','123','2024-01-05','2024-02-01','2024-02-10','Paris (France)','London (UK)','AB123','Smith, Jones Hotel','Penthouse','1200.50','Paid','PayPal','Agency','Window seat','LP00001'],
+        ['b2','c2','John Roe','john@example.com','456','2024-01-06','2024-03-01','','Tokyo (Japan)','Dubai (UAE)','CD456','Plaza Hotel','Family Room','800.00','Pending','Credit Card','','No special request','LP00002'],
+        ['b3','c3','Ann Poe','ann@example.com','789','2024-01-07','2024-03-05','2024-03-09','Paris (France)','London (UK)','EF789','Ritz Hotel','Penthouse','999.99','Paid','PayPal','Agency','Window seat','LP00003']]
+
+
+class TestColumnarLoader(TestCase):
+    def initialize(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory,'bookings.csv')
+        with open(self.path,'w',newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(list(COLUMN_KINDS))
+            writer.writerows(ROWS)
+
+    def finalize(self):
+        shutil.rmtree(self.directory)
+
+    def test_typed_columns(self):
+        columns = ColumnarBookingLoader(use_cache=False).load(self.path)
+        Asserter.assert_equal(len(columns),3)
+        Asserter.assert_equal(columns['total_price'].dtype,np.float64)
+        Asserter.assert_equal(columns['booking_date'][0],np.datetime64('2024-01-05'))
+        Asserter.assert_true(np.isnat(columns['return_date'][1]))
+        Asserter.assert_equal(columns['destination'].tolist(),[0,1,0])
+        Asserter.assert_equal(columns.labels('destination').tolist(),['Paris (France)','Tokyo (Japan)','Paris (France)'])
+        Asserter.assert_equal(columns['hotel_name'][0],'Smith, Jones Hotel')
+
+    def test_filter(self):
+        columns = ColumnarBookingLoader(use_cache=False).load(self.path)
+        paid = columns.filter(columns['payment_status'] == columns.code_of('payment_status','Paid'))
+        Asserter.assert_equal(paid['booking_id'].tolist(),['b1','b3'])
+
+    def test_memory_mapped_cache(self):
+        loader = ColumnarBookingLoader()
+        first = loader.load(self.path)
+        Asserter.assert_true(os.path.isfile(self.path+'.columns/meta.json'))
+        second = loader.load(self.path)
+        Asserter.assert_true(isinstance(second['total_price'],np.memmap),"Reload must come from the mapped cache")
+        Asserter.assert_equal(second['total_price'].tolist(),first['total_price'].tolist())
+        Asserter.assert_equal(second.categories,first.categories)
+
+    def test_cache_invalidated_on_change(self):
+        loader = ColumnarBookingLoader()
+        loader.load(self.path)
+        with open(self.path,'a',newline='') as f:
+            csv.writer(f).writerow(ROWS[0])
+        Asserter.assert_equal(len(loader.load(self.path)),4)
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestColumnarLoader) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestColumnarLoader(method))
+    test_suite.do_tests()
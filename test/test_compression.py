@@ -0,0 +1,48 @@
+import asyncio
+import gzip
+import zlib
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.compression import ResponseCompressor, negotiate_encoding
+
+
+class TestCompression(TestCase):
+    def initialize(self):
+        self.compressor = ResponseCompressor(min_size=100)
+        self.body = b'[' + b','.join(b'{"booking_id": "cda20bf0-06f0-47ee-ad46-c5ed670af9e0"}' for _ in range(50)) + b']'
+
+    def test_negotiate_encoding(self):
+        Asserter.assert_equal(negotiate_encoding("gzip, deflate, br"),'gzip')
+        Asserter.assert_equal(negotiate_encoding("deflate;q=1.0, gzip;q=0.5"),'deflate')
+        Asserter.assert_equal(negotiate_encoding("gzip;q=0, br"),None)
+        Asserter.assert_equal(negotiate_encoding("*"),'gzip')
+        Asserter.assert_equal(negotiate_encoding("identity"),None)
+
+    def test_round_trip(self):
+        Asserter.assert_equal(gzip.decompress(self.compressor.compress(self.body,'gzip')),self.body)
+        Asserter.assert_equal(zlib.decompress(self.compressor.compress(self.body,'deflate')),self.body)
+
+    def test_min_size(self):
+        Asserter.assert_false(self.compressor.should_compress(b'{}'))
+        Asserter.assert_true(self.compressor.should_compress(self.body))
+
+    def test_compress_stream(self):
+        async def chunks():
+            for idx in range(0,len(self.body),64):
+                yield self.body[idx:idx+64]
+        async def collect():
+            return b''.join([piece async for piece in self.compressor.compress_stream(chunks(),'gzip')])
+        Asserter.assert_equal(gzip.decompress(asyncio.run(collect())),self.body)
+
+    def test_representation_etag(self):
+        Asserter.assert_equal(ResponseCompressor.representation_etag('"abc"','gzip'),'"abc-gzip"')
+        Asserter.assert_equal(ResponseCompressor.representation_etag('"abc"',None),'"abc"')
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestCompression) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestCompression(method))
+    test_suite.do_tests()
@@ -1,11 +1,19 @@
 from datetime import date
 from inspect import getmembers, ismethod
+from logging import getLogger
+from threading import Thread
+from time import sleep
 from typing import Any, Callable, Dict, List, Optional, Tuple
 from uuid import uuid4
 
+from mockCache import MockCache
+from pydantic import ValidationError
 from unit_test_framework import Asserter, TestCase, TestSuite
 
-from app.model.database import DatabaseConnection, travelCRUD
+from app.model.booking import BookingManager
+from app.model.database import (ConnectionPool, DatabaseConnection,
+                                PoolTimeoutError, cachedTravelCRUD,
+                                travelCRUD)
 
 
 class MockCursor:
@@ -22,6 +30,12 @@ class MockCursor:
         self.executed_queries.append((query,params))
         self.rowcount = len(params) if params else 0
     
+    def copy_expert(self,query:str,file:Any,size:int=8192):
+        copied = []
+        while data := file.read(size):
+            copied.append(data)
+        self.executed_queries.append((query,''.join(copied)))
+    
     def fetchall(self) ->Optional[List[Any]]:
         return self.fetch_results
 
@@ -55,6 +69,153 @@ class MockDatabaseConnection(DatabaseConnection):
     def __exit__(self,exc_type,exc_val,exc_tb):
         pass
 
+class MockConnection:
+    def __init__(self):
+        self.closed = 0
+        self.cursor_instance = MockCursor()
+        self.rollbacks = 0
+    
+    def cursor(self):
+        return self.cursor_instance
+    
+    def rollback(self):
+        self.rollbacks += 1
+    
+    def close(self):
+        self.closed = 1
+
+class TestConnectionPool(TestCase):
+    def initialize(self):
+        self.opened:List[MockConnection] = []
+        self.pool = ConnectionPool(self.connect,getLogger('test'),min_size=1,max_size=2,checkout_timeout=0.2)
+    
+    def connect(self)->MockConnection:
+        conn = MockConnection()
+        self.opened.append(conn)
+        return conn
+    
+    def finalize(self):
+        self.pool.close()
+    
+    def test_reuses_connections(self):
+        Asserter.assert_equal(len(self.opened),1,"min_size connections not opened up front")
+        for _ in range(3):
+            entry = self.pool.checkout()
+            self.pool.checkin(entry)
+        Asserter.assert_equal(len(self.opened),1,"Pool opened a new connection for every checkout")
+        Asserter.assert_equal(self.pool.performance.checkouts,3)
+    
+    def test_max_size_and_timeout(self):
+        first,second = self.pool.checkout(),self.pool.checkout()
+        Asserter.assert_equal(len(self.opened),2)
+        try:
+            self.pool.checkout()
+            Asserter.assert_true(False,"Checkout beyond max_size did not time out")
+        except PoolTimeoutError:
+            pass
+        Asserter.assert_equal(self.pool.performance.checkout_timeouts,1)
+        # a waiting checkout gets the connection that is returned
+        Thread(target=lambda: (sleep(0.05),self.pool.checkin(first))).start()
+        Asserter.assert_true(self.pool.checkout() is first,"Returned connection not handed to the waiting checkout")
+        self.pool.checkin(second)
+    
+    def test_discards_broken_and_expired(self):
+        entry = self.pool.checkout()
+        self.pool.checkin(entry,broken=True)
+        Asserter.assert_equal(self.opened[0].closed,1,"Broken connection not closed")
+        entry = self.pool.checkout()
+        Asserter.assert_true(entry.conn is self.opened[1],"Broken connection handed out again")
+        self.pool.max_lifetime = 0.0
+        self.pool.checkin(entry)
+        Asserter.assert_equal(self.pool.performance.discarded,{'broken':1,'expired':1,'failed_check':0})
+    
+    def test_health_check_on_checkout(self):
+        self.pool.health_check_after = 0.0
+        entry = self.pool.checkout()
+        executed_query,_ = entry.conn.cursor_instance.executed_queries[-1]
+        Asserter.assert_equal(executed_query,'SELECT 1',"Idle connection not probed before reuse")
+        Asserter.assert_equal(entry.conn.rollbacks,1)
+        self.pool.checkin(entry)
+
+class MockPooledDatabaseConnection(MockDatabaseConnection):
+    reuses_connections = True
+    
+    def __init__(self,**kwargs):
+        super().__init__(**kwargs)
+        self.cursor_instance.connection = self
+
+def booking_row(booking_id:Optional[str]=None)->List[Any]:
+    return [booking_id or str(uuid4()), str(uuid4()), "John Doe", "john@example.com", "1234567890", "2023-01-01", "2023-02-01", None, "Paris",
+            "New York", "FL123", "Hotel Paris", "Double", 1000.0, "Paid", "Credit Card", "Best Travel", None, "LP12345"]
+
+class TestCachedTravelCrud(TestCase):
+    def initialize(self):
+        self.db = MockDatabaseConnection()
+        self.cache = MockCache()
+        self.crud = cachedTravelCRUD(self.db,{},'test_bookings',getLogger('test'),cache=self.cache)
+    
+    def test_invalid_row_writes_and_caches_nothing(self):
+        valid,invalid = booking_row(),booking_row()
+        invalid[5] = 'not a date'
+        Asserter.assert_raises(ValidationError,self.crud.insert_data_from_list,[valid,invalid])
+        Asserter.assert_equal(self.db.cursor_instance.executed_queries,[],"Query sent although a row was invalid.")
+        Asserter.assert_true(self.cache.get(valid[0]) is None,"Row of an aborted insert cached.")
+    
+    def test_invalid_row_aborts_copy(self):
+        self.crud.copy_threshold = 2
+        rows = [booking_row() for _ in range(3)]
+        rows[2][5] = 'not a date'
+        # validated while COPY pulls the rows -> the error aborts the stream, no upsert from the staging table
+        Asserter.assert_raises(ValidationError,self.crud.insert_data_from_list,iter(rows))
+        queries = [query for query,_ in self.db.cursor_instance.executed_queries]
+        Asserter.assert_equal(len(queries),1,"Upsert sent after the COPY was aborted.")
+        Asserter.assert_true(queries[0].startswith("CREATE TEMP TABLE"))
+    
+    def test_insert_invalidates_written_bookings(self):
+        row,other = booking_row(),booking_row()
+        self.cache.put(row[0],b'stale')
+        self.cache.put(other[0],b'untouched')
+        Asserter.assert_equal(self.crud.insert_data_from_list([row],on_conflict='ignore'),1)
+        Asserter.assert_true("RETURNING" not in self.db.cursor_instance.executed_queries[-1][0],"Written ids fetched although nothing is cached from them.")
+        Asserter.assert_true(self.cache.get(row[0]) is None,"Stale entry of a written booking kept.")
+        Asserter.assert_equal(self.cache.get(other[0]),b'untouched')
+    
+    def test_large_insert_clears_cache(self):
+        self.crud.invalidate_limit = 2
+        self.cache.put('other',b'entry')
+        Asserter.assert_equal(self.crud.insert_data_from_list([booking_row() for _ in range(3)]),1)
+        Asserter.assert_equal(self.cache.entries,{},"Cache not cleared after an insert beyond invalidate_limit.")
+    
+    def test_failed_insert_caches_nothing(self):
+        row = booking_row()
+        def fail(query:str,params:Tuple[Any,...]=()):
+            raise RuntimeError("connection lost")
+        self.db.cursor_instance.execute = fail
+        Asserter.assert_true(self.crud.insert_data_from_list([row]) is None,"Failed insert reported as written.")
+        Asserter.assert_true(self.cache.get(row[0]) is None,"Row of a failed insert cached.")
+    
+    def test_insert_rows_takes_validated_rows(self):
+        row = BookingManager([]).convert_params_to_booking(booking_row()).get_values_as_list()
+        self.cache.put(row[0],b'stale')
+        Asserter.assert_equal(self.crud.insert_rows([row]),1)
+        Asserter.assert_true(self.cache.get(row[0]) is None,"Stale entry of a written booking kept.")
+    
+    def test_etag_changes_after_write(self):
+        row = booking_row()
+        self.db.cursor_instance.fetch_results = [tuple(row)]
+        self.crud.load_booking(row[0])
+        etag = self.crud.get_cached_etag(row[0])
+        Asserter.assert_true(etag is not None,"Loaded booking cached without ETag.")
+        for write,status in ((lambda: self.crud.update_payment_status(row[0],'Refunded'),'Refunded'),
+                             (lambda: self.crud.insert_rows([row]),'Pending')):
+            write()
+            Asserter.assert_true(self.crud.get_cached_etag(row[0]) is None,"Old ETag still served after a write.")
+            row[14] = status
+            self.db.cursor_instance.fetch_results = [tuple(row)]
+            self.crud.load_booking(row[0])
+            Asserter.assert_true(self.crud.get_cached_etag(row[0]) not in (None,etag),"ETag unchanged after a write.")
+            etag = self.crud.get_cached_etag(row[0])
+
 class TestTravelCrud(TestCase):
     def initialize(self):
         # get DB
@@ -62,7 +223,7 @@ class TestTravelCrud(TestCase):
         self.table_name = 'test_bookings'
         
         # 
-        self.crud = travelCRUD(MockDatabaseConnection,self.db_params,self.table_name)
+        self.crud = travelCRUD(MockDatabaseConnection,self.db_params,self.table_name,getLogger('test'))
     
     def finalize(self):
         self.crud.executed_queries_history = []          
@@ -73,6 +234,46 @@ class TestTravelCrud(TestCase):
         executed_query = self.crud.executed_queries_history[-1][0]
         Asserter.assert_true("CREATE TABLE IF NOT EXISTS" in executed_query,"CREATE TABLE query not executed")
         Asserter.assert_true(self.table_name in executed_query, "Table name not in CREATE TABLE query")
+    def test_prepared_statements(self):
+        db = MockPooledDatabaseConnection() # instance is called per operation -> one connection for all, like a pool of size 1
+        crud = travelCRUD(db,self.db_params,self.table_name,getLogger('test'))
+        booking_id = str(uuid4())
+        crud.get_booking_id(booking_id)
+        crud.get_booking_id(booking_id)
+        crud.delete_booking(booking_id)
+        queries = [query for query,_ in db.cursor_instance.executed_queries]
+        Asserter.assert_equal(queries,[f"PREPARE test_bookings_booking_by_id AS SELECT * FROM {self.table_name} WHERE booking_id = $1",
+                                       "EXECUTE test_bookings_booking_by_id (%s)",
+                                       "EXECUTE test_bookings_booking_by_id (%s)",
+                                       f"PREPARE test_bookings_delete_booking AS DELETE FROM {self.table_name} WHERE booking_id = $1",
+                                       "EXECUTE test_bookings_delete_booking (%s)"])
+        Asserter.assert_equal(crud.get_info()['prepared_statements']['hits'],1)
+        Asserter.assert_equal(crud.get_info()['prepared_statements']['misses'],2)
+    def test_keyset_pagination(self):
+        after = str(uuid4())
+        self.crud.get_booking_id(page_size=20,after=after)
+        executed_query,params = self.crud.executed_queries_history[-1]
+        Asserter.assert_true("WHERE booking_id > %s ORDER BY booking_id LIMIT %s" in executed_query,"No keyset query for a continued page.")
+        Asserter.assert_equal(params,(after,20))
+        self.crud.get_booking_id(page_size=20)
+        executed_query,params = self.crud.executed_queries_history[-1]
+        Asserter.assert_true("ORDER BY booking_id LIMIT %s" in executed_query and "WHERE" not in executed_query,"First page must start at the smallest id.")
+    def test_large_page_uses_server_side_cursor(self):
+        db = MockPooledDatabaseConnection()
+        named_cursors:List[Tuple[str,MockCursor]] = []
+        def named_cursor(name:str)->MockCursor:
+            cursor = MockCursor()
+            cursor.fetch_results = [(str(uuid4()),) for _ in range(5)]
+            cursor.fetchmany = lambda size: [cursor.fetch_results.pop() for _ in range(min(size,len(cursor.fetch_results)))]
+            named_cursors.append((name,cursor))
+            return cursor
+        db.cursor = lambda name=None: named_cursor(name) if name else db.cursor_instance
+        crud = travelCRUD(db,self.db_params,self.table_name,getLogger('test'))
+        batches = list(crud.iter_booking_ids(page_size=1000,batch_size=2))
+        Asserter.assert_equal([len(batch) for batch in batches],[2,2,1])
+        Asserter.assert_equal(len(named_cursors),1,"Large page not read through a named cursor.")
+        Asserter.assert_true(named_cursors[0][0].startswith('booking_ids_'))
+        Asserter.assert_equal(db.cursor_instance.executed_queries,[],"Large page must not be fetched on the regular cursor.")
     def test_insert_data_from_list(self):
         test_data:List[Tuple[Any,...]] = [(
                 str(uuid4()), str(uuid4()), "John Doe", "john@example.com", "1234567890",
@@ -83,7 +284,24 @@ class TestTravelCrud(TestCase):
         self.crud.insert_data_from_list(test_data)
         executed_query,params = self.crud.executed_queries_history[-1]
         Asserter.assert_true("INSERT INTO" in executed_query, "INSERT query not executed.")
-        Asserter.assert_equal(params,test_data,"Inserted data does not match test data")
+        Asserter.assert_true("ON CONFLICT (booking_id) DO UPDATE" in executed_query, "INSERT is no upsert.")
+        Asserter.assert_equal(params,list(test_data[0]),"Inserted data does not match test data")
+    def test_insert_data_copy(self):
+        self.crud.copy_threshold = 2
+        booking_id = str(uuid4())
+        rows = ((booking_id if idx != 1 else str(uuid4()), str(uuid4()), f"Jane\tDoe {idx}", "jane@example.com", "555",
+                 date(2023, 1, 1), date(2023, 2, 1), None, "Paris", "New York", "FL123", "Hotel Paris", "Double", 99.5, "Paid",
+                 "PayPal", None, "Window\nseat", None) for idx in range(3)) # generator -> must not be materialized
+        self.crud.insert_data_from_list(rows,on_conflict='ignore')
+        queries = self.crud.executed_queries_history
+        Asserter.assert_true("CREATE TEMP TABLE test_bookings_staging" in queries[-3][0], "No staging table created.")
+        copy_query,copied = queries[-2]
+        Asserter.assert_true(copy_query.startswith("COPY test_bookings_staging"), "Rows not sent via COPY.")
+        lines = copied.split('\n')
+        Asserter.assert_equal(len(lines),4)
+        Asserter.assert_true(lines[0].startswith(booking_id+'\t') and '\tJane\\tDoe 0\t' in lines[0], "Row not in COPY text format.")
+        Asserter.assert_true('\\N' in lines[0] and 'Window\\nseat' in lines[0], "NULL or escapes wrong in COPY data.")
+        Asserter.assert_true("DISTINCT ON (booking_id)" in queries[-1][0] and "DO NOTHING" in queries[-1][0], "No upsert from the staging table.")
 
 
 if __name__ == '__main__':
@@ -91,7 +309,10 @@ if __name__ == '__main__':
     test_methods = [method for method in dir(TestTravelCrud) if method.startswith('test_')]
     for method in test_methods:
         test_suite.add_test(TestTravelCrud(method))
-    class_methods_to_test = [item for item in getmembers(travelCRUD(MockDatabaseConnection,{},''),predicate=ismethod) if not item[0].startswith('_')]
+    for test_class in (TestConnectionPool,TestCachedTravelCrud):
+        for method in [method for method in dir(test_class) if method.startswith('test_')]:
+            test_suite.add_test(test_class(method))
+    class_methods_to_test = [item for item in getmembers(travelCRUD(MockDatabaseConnection,{},'',getLogger('test')),predicate=ismethod) if not item[0].startswith('_')]
     print(f"Need to test {len(class_methods_to_test)} different methods for travelCRUD-class.\n--------")
     test_suite.do_tests()
     print("--------")
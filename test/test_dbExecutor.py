@@ -0,0 +1,41 @@
+import asyncio
+from logging import getLogger
+from time import sleep
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.dbExecutor import DatabaseExecutor
+
+
+class TestDatabaseExecutor(TestCase):
+    def initialize(self):
+        # one worker, no queue -> every further call waits for a slot
+        self.executor = DatabaseExecutor(getLogger('test'),max_workers=1,max_queue=0)
+
+    def finalize(self):
+        self.executor.shutdown(wait=True)
+
+    async def run_calls(self,ncalls:int,duration:float):
+        return await asyncio.gather(*(self.executor.run(sleep,duration) for _ in range(ncalls)))
+
+    def test_slot_wait_counts_as_queueing(self):
+        asyncio.run(self.run_calls(3,0.1))
+        performance = self.executor.performance
+        Asserter.assert_equal(performance.max_queue_depth,2,"Calls waiting for a slot not counted in the queue depth")
+        Asserter.assert_equal(performance.queue_depth,0)
+        Asserter.assert_true(max(performance.wait_times) >= 0.15,f"Slot wait missing from wait times: {performance.wait_times}")
+        Asserter.assert_true(min(performance.wait_times) < 0.05,"First call should not wait")
+        Asserter.assert_equal(self.executor.get_info()['pending'],0)
+
+    def test_results_and_errors(self):
+        Asserter.assert_equal(asyncio.run(self.executor.run(sum,[1,2,3])),6)
+        Asserter.assert_raises(ZeroDivisionError,asyncio.run,self.executor.run(divmod,1,0))
+        Asserter.assert_equal(self.executor.get_info()['pending'],0)
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestDatabaseExecutor) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestDatabaseExecutor(method))
+    test_suite.do_tests()
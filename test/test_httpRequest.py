@@ -0,0 +1,79 @@
+import asyncio
+from asyncio import StreamReader
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.httpRequest import (HttpRequestError, HttpRequestReader,
+                                        decode_page_token, encode_page_token,
+                                        page_query, parse_request_head)
+
+
+def read_from_bytes(raw:bytes,**kwargs):
+    async def read():
+        reader = StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await HttpRequestReader(reader,**kwargs).read_request()
+    return asyncio.run(read())
+
+class TestHttpRequestReader(TestCase):
+    def test_parse_request_head(self):
+        request = parse_request_head(b"GET /booking/abc?page=2 HTTP/1.1\r\nHost: localhost\r\nX-Trace:  a:b \r\n\r\n")
+        Asserter.assert_equal(request.method,'GET')
+        Asserter.assert_equal(request.path,'/booking/abc')
+        Asserter.assert_equal(request.query,{'page':'2'})
+        Asserter.assert_equal(request.headers,{'host':'localhost','x-trace':'a:b'})
+
+    def test_malformed_request_line(self):
+        Asserter.assert_raises(HttpRequestError,parse_request_head,b"GET /booking\r\n\r\n")
+
+    def test_body_larger_than_one_read(self):
+        body = b'{"customer_name": "' + b'x'*5000 + b'"}'
+        raw = b"POST /booking HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+        request = read_from_bytes(raw)
+        Asserter.assert_equal(request.body,body,"Body must not be truncated")
+
+    def test_oversized_body_rejected(self):
+        raw = b"POST /booking HTTP/1.1\r\nContent-Length: 100\r\n\r\n" + b'x'*100
+        try:
+            read_from_bytes(raw,max_body_size=10)
+        except HttpRequestError as e:
+            Asserter.assert_equal(e.status_code,413)
+            return
+        raise AssertionError("Oversized body was accepted.")
+
+    def test_eof_returns_none(self):
+        Asserter.assert_equal(read_from_bytes(b""),None)
+
+    def test_stream_body(self):
+        body = b'[' + b','.join([b'{"n": 1}']*1000) + b']'
+        raw = b"POST /booking HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body + b"GET / HTTP/1.1\r\n\r\n"
+        async def read():
+            reader = StreamReader()
+            reader.feed_data(raw)
+            reader.feed_eof()
+            request_reader = HttpRequestReader(reader)
+            request = await request_reader.read_head()
+            chunks = [chunk async for chunk in request_reader.stream_body(request,len(body),chunk_size=1024)]
+            return chunks,request,await request_reader.read_head()
+        chunks,request,next_request = asyncio.run(read())
+        Asserter.assert_equal(b''.join(chunks),body)
+        Asserter.assert_true(len(chunks) > 1,"Body must arrive in pieces")
+        Asserter.assert_equal(request.body_stream.remaining,0)
+        Asserter.assert_equal(next_request.method,'GET',"Stream must stop exactly at the body end")
+    def test_page_query(self):
+        booking_id = 'fb6b3247-7a34-48d3-8611-99dd0eb600b1'
+        token = encode_page_token(booking_id)
+        Asserter.assert_true(booking_id not in token and '=' not in token,"Token must be opaque and URL-safe")
+        Asserter.assert_equal(decode_page_token(token),booking_id)
+        Asserter.assert_equal(page_query({'page_size': '20','page_token': token},50,100),(20,booking_id))
+        Asserter.assert_equal(page_query({},50,100),(50,None))
+        for query in ({'page_size': 'ten'},{'page_size': '0'},{'page_size': '101'},{'page_token': 'bm9wZQ'},{'page_token': encode_page_token('1 OR 1=1')}):
+            Asserter.assert_raises(HttpRequestError,page_query,query,50,100)
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestHttpRequestReader) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestHttpRequestReader(method))
+    test_suite.do_tests()
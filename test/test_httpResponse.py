@@ -0,0 +1,71 @@
+import asyncio
+from socket import socketpair
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.httpResponse import (ChunkedHttpResponse, HttpResponse,
+                                         connection_header)
+
+
+class CollectingWriter:
+    def __init__(self):
+        self.data = b''
+
+    def write(self,data:bytes):
+        self.data += data
+
+    def writelines(self,buffers):
+        for buffer in buffers:
+            self.write(bytes(buffer))
+
+    async def drain(self):
+        pass
+
+
+class TestHttpResponse(TestCase):
+    def test_content_length_counts_bytes(self):
+        response = HttpResponse(200,'{"customer_name": "Jürgen Müller"}')
+        Asserter.assert_equal(response.content_length,len('{"customer_name": "Jürgen Müller"}'.encode('utf-8')))
+        Asserter.assert_true(b"Content-Length: 36\r\n" in response.head())
+
+    def test_memoryview_body(self):
+        response = HttpResponse(200,memoryview(b'[1,2,3]'))
+        Asserter.assert_equal(response.to_buffers()[1].tobytes(),b'[1,2,3]')
+        Asserter.assert_true(response.head().endswith(b"Content-Length: 7\r\nConnection: close\r\n\r\n"))
+
+    def test_keep_alive_header(self):
+        response = HttpResponse(200,b'',connection=connection_header(True,5.0,100))
+        Asserter.assert_true(b"Keep-Alive: timeout=5, max=100\r\n" in response.head())
+        Asserter.assert_equal(response.to_buffers(),[response.head()],"Empty body must not be written")
+
+    def test_send_to(self):
+        server_side,client_side = socketpair()
+        with server_side, client_side:
+            HttpResponse(200,b'{"ok": true}').send_to(server_side)
+            server_side.shutdown(1)
+            received = b''
+            while chunk := client_side.recv(1024):
+                received += chunk
+        Asserter.assert_true(received.startswith(b"HTTP/1.1 200 OK\r\n"))
+        Asserter.assert_true(received.endswith(b'\r\n\r\n{"ok": true}'))
+
+    def test_chunked_stream(self):
+        async def chunks():
+            yield b'['
+            yield b''
+            yield '{"booking_id": "a"}'
+            yield b']'
+        writer = CollectingWriter()
+        asyncio.run(ChunkedHttpResponse(200,chunks()).stream_to(writer))
+        head,_,body = writer.data.partition(b"\r\n\r\n")
+        Asserter.assert_true(b"Transfer-Encoding: chunked" in head)
+        Asserter.assert_false(b"Content-Length" in head)
+        Asserter.assert_equal(body,b'1\r\n[\r\n13\r\n{"booking_id": "a"}\r\n1\r\n]\r\n0\r\n\r\n')
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestHttpResponse) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestHttpResponse(method))
+    test_suite.do_tests()
@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import tempfile
+import time
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.parser import CsvParser, JsonParser, JsonSizeError
+
+
+class TestJsonParser(TestCase):
+    def initialize(self):
+        self.parser = JsonParser()
+
+    def expect_error(self,source:str):
+        try:
+            self.parser.parse_one(source)
+        except ValueError:
+            return
+        raise AssertionError(f"No error raised for {source!r}.")
+
+    def test_matches_stdlib(self):
+        documents = ['{"a": [1, 2.5, -3e2, true, false, null], "b": {"c": ""}}',
+                     ' [ {"x" : 1} , [] , {} , "y" ] ',
+                     '"plain"', '0', '-0.25', '1E+3',
+                     '{"booking_id": "fb6b3247-7a34-48d3-8611-99dd0eb600b1", "total_price": 1234.56, "special_requests": null}']
+        for document in documents:
+            Asserter.assert_equal(self.parser.parse_one(document),json.loads(document),document)
+
+    def test_escapes(self):
+        document = r'["a\"b\\c\/d\n", "\u00e9\ud83d\ude00", "tab\tend"]'
+        Asserter.assert_equal(self.parser.parse_one(document),json.loads(document))
+
+    def test_deep_nesting(self):
+        depth = 100000 # far beyond the recursion limit
+        document = '['*depth+']'*depth
+        value = self.parser.parse_one(document)
+        for _ in range(depth-1):
+            value = value[0]
+        Asserter.assert_equal(value,[])
+
+    def test_invalid(self):
+        for source in ['', '[1,]', '{"a" 1}', '{"a": 1,}', '[1 2]', '"open', '01', 'nul', '{1: 2}', '[1]]', '"\\x"']:
+            self.expect_error(source)
+
+    def feed_all(self,raw:bytes,step:int)->list:
+        elements = []
+        for idx in range(0,len(raw),step):
+            elements.extend(self.parser.feed(raw[idx:idx+step]))
+        return elements+self.parser.close()
+
+    def test_feed_elements(self):
+        bookings = [{'booking_id': 'a', 'hotel_name': 'Smith, Jones ] "Hotel"', 'rooms': [1, {'x': '}'}]}, {'booking_id': 'b\\'}, [], 'é']
+        raw = json.dumps(bookings,ensure_ascii=False).encode('utf-8')
+        for step in (1,3,64):
+            Asserter.assert_equal(self.feed_all(raw,step),bookings,f"{step=}")
+
+    def test_feed_emits_early(self):
+        Asserter.assert_equal(self.parser.feed(b'[{"a": 1}, {"b"'),[{'a': 1}])
+        Asserter.assert_equal(self.parser.feed(b': 2}]'),[{'b': 2}])
+        Asserter.assert_equal(self.parser.close(),[])
+
+    def test_feed_single_document(self):
+        Asserter.assert_equal(self.feed_all(b'{"booking_id": "a"}',4),[{'booking_id': 'a'}])
+
+    def test_feed_invalid(self):
+        for source in [b'[1,]', b'[,1]', b'[1 2]', b'[1', b'[1]x']:
+            try:
+                self.feed_all(source,2)
+            except ValueError:
+                self.parser.reset()
+                continue
+            raise AssertionError(f"No error raised for {source!r}.")
+
+    def test_feed_deep_nesting_is_invalid(self):
+        Asserter.assert_raises(ValueError,self.feed_all,b'['+b'['*100000+b']'*100000+b']',65536)
+
+    def test_feed_element_cap(self):
+        parser = JsonParser(max_element_size=20)
+        Asserter.assert_equal(parser.feed(b'[{"a": 1}, '),[{'a': 1}])
+        Asserter.assert_raises(JsonSizeError,parser.feed,b'{"b": "'+b'x'*30)
+        # a complete oversized element inside one chunk is caught as well
+        Asserter.assert_raises(JsonSizeError,JsonParser(max_element_size=20).feed,b'[{"b": "'+b'x'*30+b'"}]')
+
+    def test_feed_document_cap(self):
+        parser = JsonParser(max_element_size=20,max_document_size=40)
+        Asserter.assert_equal(parser.feed(b'{"a": "'+b'x'*25),[]) # elements cap does not apply to a non-array body
+        Asserter.assert_raises(JsonSizeError,parser.feed,b'x'*20)
+
+    def test_feed_large_element_is_linear(self):
+        # one element of 32 MiB in 64 KiB chunks must not be copied per chunk
+        chunk = b'x'*65536
+        start = time.perf_counter()
+        self.parser.feed(b'[{"a": "')
+        for _ in range(512):
+            self.parser.feed(chunk)
+        elements = self.parser.feed(b'"}]')+self.parser.close()
+        Asserter.assert_equal(len(elements[0]['a']),512*65536)
+        Asserter.assert_true(time.perf_counter()-start < 2.0)
+
+class TestCsvParser(TestCase):
+    def initialize(self):
+        self.rows = [[str(idx),f'Smith, Jones "{idx}" Hotel',f'{idx*1.5:.2f}'] for idx in range(2000)]
+        self.paths = []
+        for _ in range(2):
+            with tempfile.NamedTemporaryFile('w',suffix='.csv',newline='',delete=False) as f:
+                writer = csv.writer(f)
+                writer.writerow(['Booking ID','Hotel Name','Total Price'])
+                writer.writerows(self.rows)
+                self.paths.append(f.name)
+
+    def finalize(self):
+        for path in self.paths:
+            os.remove(path)
+
+    def test_quoted_fields(self):
+        Asserter.assert_equal(next(CsvParser().parse_one(self.paths[0])),['0','Smith, Jones "0" Hotel','0.00'])
+
+    def test_chunked_matches_sequential(self):
+        parser = CsvParser(batch_size=300,chunk_size=4096,max_workers=2)
+        batches = list(parser.parse_batches(self.paths[0]))
+        Asserter.assert_true(all(len(batch) <= 300 for batch in batches))
+        Asserter.assert_equal([row for batch in batches for row in batch],self.rows)
+
+    def test_multiple_files(self):
+        Asserter.assert_equal(CsvParser(chunk_size=4096,max_workers=2).parse_complete(self.paths),self.rows+self.rows)
+
+    def test_missing_file(self):
+        Asserter.assert_raises(ValueError,CsvParser().parse_complete,'/nonexistent/bookings.csv')
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    for test_class in (TestJsonParser,TestCsvParser):
+        for method in [method for method in dir(test_class) if method.startswith('test_')]:
+            test_suite.add_test(test_class(method))
+    test_suite.do_tests()
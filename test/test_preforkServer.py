@@ -0,0 +1,64 @@
+import os
+import signal
+from logging import CRITICAL, getLogger
+from threading import Timer
+from time import monotonic
+from typing import List
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.preforkServer import PreforkSupervisor
+
+
+async def crashing_worker(worker_idx:int):
+    raise RuntimeError(f"worker {worker_idx} failed on purpose")
+
+class TestPreforkSupervisor(TestCase):
+    def initialize(self):
+        logger = getLogger('test.prefork')
+        logger.setLevel(CRITICAL) # the crashes are on purpose
+        self.supervisor = PreforkSupervisor(crashing_worker,1,logger,restart_delay=0.05,max_restart_delay=0.1,min_uptime=10.0)
+        self.spawned:List[int] = []
+
+    def stub_spawn(self):
+        self.supervisor._spawn = self.spawned.append
+
+    def test_exit_schedules_restart_without_sleeping(self):
+        self.stub_spawn()
+        self.supervisor.restart_delay = self.supervisor.max_restart_delay = 5.0
+        self.supervisor._workers[4242] = 0
+        self.supervisor._started_at[0] = monotonic()
+        start = monotonic()
+        self.supervisor._handle_exit(4242,1 << 8) # exit code 1
+        Asserter.assert_true(monotonic()-start < 0.5,"Supervisor slept through the back-off")
+        Asserter.assert_equal(self.spawned,[])
+        Asserter.assert_true(4.0 < self.supervisor.get_info()['pending_restarts'][0] <= 5.0)
+
+    def test_due_restarts_spawn(self):
+        self.stub_spawn()
+        self.supervisor._restart_at = {0: monotonic()-1.0,1: monotonic()+60.0}
+        self.supervisor._respawn_due()
+        Asserter.assert_equal(self.spawned,[0])
+        Asserter.assert_equal(list(self.supervisor._restart_at),[1])
+        Asserter.assert_equal(self.supervisor._restarts,1)
+
+    def test_run_restarts_crashing_worker(self):
+        handlers = signal.getsignal(signal.SIGTERM),signal.getsignal(signal.SIGINT)
+        timer = Timer(1.0,os.kill,(os.getpid(),signal.SIGTERM))
+        timer.start()
+        try:
+            self.supervisor.run()
+        finally:
+            timer.cancel()
+            signal.signal(signal.SIGTERM,handlers[0])
+            signal.signal(signal.SIGINT,handlers[1])
+        Asserter.assert_true(self.supervisor._restarts >= 3,f"Only {self.supervisor._restarts} restarts within 1 s")
+        Asserter.assert_equal(self.supervisor.get_info()['worker_pids'],{})
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestPreforkSupervisor) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestPreforkSupervisor(method))
+    test_suite.do_tests()
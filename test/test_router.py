@@ -0,0 +1,48 @@
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.httpRequest import HttpRequestError
+from app.controller.router import Router
+
+
+class TestRouter(TestCase):
+    def initialize(self):
+        self.router:Router[str] = Router()
+        self.router.add_route('GET','/booking','list')
+        self.router.add_route('POST','/booking','create')
+        self.router.add_route('GET','/booking/{booking_id:uuid}','get')
+        self.router.add_route('GET','/page/{number:int}','page')
+
+    def expect_status(self,status_code:int,method:str,path:str)->HttpRequestError:
+        try:
+            self.router.match(method,path)
+        except HttpRequestError as e:
+            Asserter.assert_equal(e.status_code,status_code)
+            return e
+        raise AssertionError(f"{method} {path} matched, expected {status_code}.")
+
+    def test_static_routes(self):
+        Asserter.assert_equal(self.router.match('GET','/booking'),('list',{}))
+        Asserter.assert_equal(self.router.match('POST','/booking/'),('create',{}))
+
+    def test_typed_parameters(self):
+        handler,params = self.router.match('GET','/booking/CDA20BF0-06F0-47EE-AD46-C5ED670AF9E0')
+        Asserter.assert_equal(handler,'get')
+        Asserter.assert_equal(params,{'booking_id':'cda20bf0-06f0-47ee-ad46-c5ed670af9e0'})
+        Asserter.assert_equal(self.router.match('GET','/page/3'),('page',{'number':3}))
+
+    def test_not_found(self):
+        self.expect_status(404,'GET','/booking/not-a-uuid')
+        self.expect_status(404,'GET','/page/three')
+        self.expect_status(404,'GET','/')
+
+    def test_method_not_allowed(self):
+        error = self.expect_status(405,'DELETE','/booking')
+        Asserter.assert_equal(error.headers,{'Allow':'GET, POST'})
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestRouter) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestRouter(method))
+    test_suite.do_tests()
@@ -0,0 +1,77 @@
+from select import select
+from socket import create_connection, socket
+from threading import Thread
+from time import sleep
+from typing import Any, Optional
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.selectorServer import SelectorHTTPserver
+
+BOOKING_ID = 'fb6b3247-7a34-48d3-8611-99dd0eb600b1'
+
+
+class MockCrud:
+    def get_booking_id(self,booking_id:Optional[str]=None,**kwargs:Any)->bytes:
+        return f'{{"booking_id":"{booking_id}"}}'.encode()
+
+def free_port()->int:
+    with socket() as sock:
+        sock.bind(('localhost',0))
+        return sock.getsockname()[1]
+
+class TestSelectorDeadlines(TestCase):
+    def initialize(self):
+        self.server = SelectorHTTPserver(MockCrud(),'localhost',free_port())
+        self.server.header_timeout = 0.4
+        self.server.body_timeout = 0.4
+        self.server.keepalive_timeout = 0.4
+        self.server.select_timeout = 0.05
+        self.thread = Thread(target=self.server.start,daemon=True)
+        self.thread.start()
+        while not self.server.running:
+            sleep(0.01)
+
+    def finalize(self):
+        self.server.stop()
+        self.thread.join(5)
+
+    def connect(self)->socket:
+        sock = create_connection((self.server.config.host,self.server.config.port))
+        sock.settimeout(5)
+        return sock
+
+    def test_trickled_head_expires(self):
+        # one byte at a time keeps the connection active, the header deadline still runs out
+        with self.connect() as sock:
+            for byte in b"GET /booking/"+BOOKING_ID.encode():
+                sock.sendall(bytes([byte]))
+                if select([sock],[],[],0.05)[0]:
+                    break # answered -> stop sending into a closing connection
+            response = sock.recv(4096)
+        Asserter.assert_true(response.startswith(b"HTTP/1.1 408"),f"No 408 for a trickled request head: {response!r}")
+        Asserter.assert_equal(self.server.expired['header'],1)
+
+    def test_incomplete_body_expires(self):
+        with self.connect() as sock:
+            sock.sendall(b"POST /booking HTTP/1.1\r\nContent-Length: 10\r\n\r\n{\"a\"")
+            response = sock.recv(4096)
+        Asserter.assert_true(response.startswith(b"HTTP/1.1 408"),f"No 408 for an incomplete body: {response!r}")
+        Asserter.assert_true(b"body deadline expired" in response)
+        Asserter.assert_equal(self.server.expired['body'],1)
+
+    def test_idle_connection_closed_silently(self):
+        with self.connect() as sock:
+            sock.sendall(f"GET /booking/{BOOKING_ID} HTTP/1.1\r\n\r\n".encode())
+            response = sock.recv(4096)
+            Asserter.assert_true(response.startswith(b"HTTP/1.1 200") and BOOKING_ID.encode() in response,f"Unexpected response: {response!r}")
+            Asserter.assert_equal(sock.recv(4096),b'',"Idle keep-alive connection not closed")
+        Asserter.assert_equal(self.server.expired,{'header':0,'body':0})
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestSelectorDeadlines) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestSelectorDeadlines(method))
+    test_suite.do_tests()
@@ -0,0 +1,36 @@
+from datetime import date
+from decimal import Decimal
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.model.booking import BookingManager
+from app.model.serializer import BookingSerializer
+
+ROW = ('fb6b3247-7a34-48d3-8611-99dd0eb600b1','625cd3c9-0116-452f-816c-91aa6e236110','José "JD" Núñez','jose@example.com','+1 555\t0100',
+       date(2024,1,5),date(2024,2,1),None,'Paris (France)','London (UK)','AB123','Smith, Jones Hotel','Penthouse',Decimal('800.00'),
+       'Paid','PayPal',None,'Late check-out\n',None)
+
+
+class TestBookingSerializer(TestCase):
+    def initialize(self):
+        self.serializer = BookingSerializer()
+
+    def test_matches_pydantic(self):
+        expected = BookingManager([]).convert_params_to_booking(ROW).json().encode('utf-8')
+        Asserter.assert_equal(self.serializer.serialize(ROW),expected)
+
+    def test_validated_values_match_db_row(self):
+        # the insert path caches validated values, the read path DB rows -> both must give the same bytes (same ETag)
+        validated = BookingManager([]).convert_params_to_booking(ROW).get_values_as_list()
+        Asserter.assert_equal(self.serializer.serialize(validated),self.serializer.serialize(ROW))
+
+    def test_wrong_length(self):
+        Asserter.assert_raises(ValueError,self.serializer.serialize,ROW[:-1])
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestBookingSerializer) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestBookingSerializer(method))
+    test_suite.do_tests()
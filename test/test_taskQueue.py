@@ -0,0 +1,40 @@
+import asyncio
+from logging import getLogger
+from typing import List
+
+from unit_test_framework import Asserter, TestCase, TestSuite
+
+from app.controller.taskQueue import TaskQueue
+
+
+class TestTaskQueue(TestCase):
+    def initialize(self):
+        self.done:List[int] = []
+
+    async def record(self,idx:int):
+        await asyncio.sleep(0.01)
+        self.done.append(idx)
+
+    async def run_tasks(self,ntasks:int,nworkers:int,qsize:int):
+        task_queue = TaskQueue(getLogger('test'),nworkers=nworkers,qsize=qsize)
+        await task_queue.start()
+        for idx in range(ntasks):
+            await task_queue.add_task(self.record,idx)
+        await asyncio.wait_for(task_queue.stop(),5)
+
+    def test_workers_keep_running(self):
+        # far more tasks than workers + queue slots -> every worker has to take task after task
+        asyncio.run(self.run_tasks(20,2,3))
+        Asserter.assert_equal(sorted(self.done),list(range(20)))
+
+    def test_stop_idle_queue(self):
+        asyncio.run(self.run_tasks(0,2,3))
+        Asserter.assert_equal(self.done,[])
+
+
+if __name__ == '__main__':
+    test_suite = TestSuite()
+    test_methods = [method for method in dir(TestTaskQueue) if method.startswith('test_')]
+    for method in test_methods:
+        test_suite.add_test(TestTaskQueue(method))
+    test_suite.do_tests()